@@ -0,0 +1,135 @@
+"""
+Benchmark of the cost-exact searches on a road network and on its contracted graph (see graph.contraction).
+
+The synthetic road network is a grid of junctions whose roads are drawn with several nodes between
+each pair of junctions, as maps draw curves. It is built twice: with one edge per road segment, and
+with an edge per direction of travel, each of them two-way, as osmnx maps are loaded (see
+geography.load_map_data_to_graph). Depots and end points are picked among all its nodes,
+so some of them sit in the middle of a road and are kept by the contraction. Routes found on the
+contracted graph are expanded back to the nodes of the road network and checked to cost the same.
+
+Run from the root of the repository with bin/benchmark-contraction.
+"""
+
+import argparse
+import random
+import time
+
+from algorithms.informed import heuristics
+from algorithms.informed.a_star import a_star_route
+from algorithms.uninformed.uniform_cost import ucs_route
+from end_point import EndPoint
+from graph.contraction import contracted_graph, enable_contraction
+from graph.graph import Graph
+from graph.position import Position
+from load_dataset import State
+from metrics import EXPANSIONS
+from start_point import StartPoint
+from supply import Inventory
+from weather import Weather, WeatherCondition
+
+def road_grid(size, road_nodes, two_way=False, step=0.001, seed=0):
+    """
+    Builds a size x size grid of junctions, one every step degrees, linked by roads drawn with road_nodes
+    nodes between each pair of junctions, slightly off the straight line. With two_way, each road segment
+    is added once per direction of travel, as osmnx maps are.
+    """
+    rng = random.Random(seed)
+    graph = Graph()
+    junctions = [Position(-8.4 + column * step, 41.5 + row * step) for row in range(size) for column in range(size)]
+    for position in junctions:
+        graph.add_node(position, len(graph.nodes))
+
+    def add_road(start, end):
+        previous = start
+        for index in range(1, road_nodes + 1):
+            fraction = index / (road_nodes + 1)
+            position = Position(start.x + (end.x - start.x) * fraction + rng.uniform(-0.05, 0.05) * step,
+                                start.y + (end.y - start.y) * fraction + rng.uniform(-0.05, 0.05) * step)
+            graph.add_node(position, len(graph.nodes))
+            add_segment(previous, position)
+            previous = position
+        add_segment(previous, end)
+
+    def add_segment(start, end):
+        graph.add_edge(start, end)
+        if two_way:
+            graph.add_edge(end, start)
+
+    for row in range(size):
+        for column in range(size):
+            position = junctions[row * size + column]
+            if column + 1 < size:
+                add_road(position, junctions[row * size + column + 1])
+            if row + 1 < size:
+                add_road(position, junctions[(row + 1) * size + column])
+    return graph
+
+def expansions(algorithm):
+    return EXPANSIONS.values.get((algorithm,), [None, 0])[1]
+
+def run(size, road_nodes, queries, seed):
+    for two_way, layout in ((False, "one edge per road segment"), (True, "two-way edges per direction, as osmnx")):
+        print(f"{layout}:")
+        compare(road_grid(size, road_nodes, two_way, seed=seed), queries, seed)
+
+def compare(graph, queries, seed):
+    rng = random.Random(seed)
+    weather = Weather(WeatherCondition.SUNNY)
+    positions = list(graph.nodes)
+    for position in rng.sample(positions, len(positions) // 10):
+        weather.set_condition(position, rng.choice([WeatherCondition.RAINY, WeatherCondition.SNOWY]))
+    points = [(StartPoint(source, Inventory()), EndPoint(target, Inventory(), 0))
+              for source, target in (rng.sample(positions, 2) for _ in range(queries))]
+    state = State(0, [], points[0][0], [end_point for _, end_point in points], graph, weather)
+
+    searches = [
+        ("ucs", lambda start, end: ucs_route(state, start, end, 0, weather, set())),
+        ("a_star", lambda start, end: a_star_route(state, start, end, heuristics.haversine_heuristic, 0,
+                                                   weather, set())),
+    ]
+    results = {}
+    for contracted in (False, True):
+        if contracted:
+            keep = [point.position for pair in points for point in pair]
+            start = time.perf_counter()
+            enable_contraction(graph, keep)
+            reduced = contracted_graph(graph)
+            print(f"contraction: {len(graph.nodes)} -> {len(reduced.nodes)} nodes, {graph.edge_count // 2} -> "
+                  f"{reduced.edge_count // 2} edges in {(time.perf_counter() - start) * 1000:.0f}ms")
+        for name, search in searches:
+            search(*points[0])  # Builds the layer and cost table
+            before = expansions(name)
+            start = time.perf_counter()
+            routes = [search(start_point, end_point) for start_point, end_point in points]
+            results[(name, contracted)] = (time.perf_counter() - start, expansions(name) - before, routes)
+
+    print(f"{queries} queries")
+    print(f"{'search':8s} {'time':>9s} {'contracted':>11s} {'speedup':>8s} {'expanded':>9s} {'contracted':>11s} "
+          f"{'max error':>10s}")
+    for name, _ in searches:
+        elapsed, expanded, routes = results[(name, False)]
+        contracted_elapsed, contracted_expanded, contracted_routes = results[(name, True)]
+        error = 0
+        for (path, cost), (contracted_path, contracted_cost) in zip(routes, contracted_routes):
+            error = max(error, abs(cost - contracted_cost))
+            if (path is None) != (contracted_path is None) or path and (path[0], path[-1]) != (
+                    contracted_path[0], contracted_path[-1]) or path and any(
+                    graph.nodes[b] not in [neighbour for neighbour, _ in graph.nodes[a].neighbours]
+                    for a, b in zip(contracted_path, contracted_path[1:])):
+                raise AssertionError(f"{name} found a route on the contracted graph that isn't one of the road network")
+        print(f"{name:8s} {elapsed * 1000 / queries:7.2f}ms {contracted_elapsed * 1000 / queries:9.2f}ms "
+              f"{elapsed / contracted_elapsed:7.1f}x {expanded // queries:9d} {contracted_expanded // queries:11d} "
+              f"{error:10.2e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the searches on a road network and its contracted graph.")
+    parser.add_argument("--size", type=int, default=40, help="Junctions on each side of the grid")
+    parser.add_argument("--road-nodes", type=int, default=5, help="Nodes drawn between each pair of junctions")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.size, args.road_nodes, args.queries, args.seed)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+from algorithms.path_profile import path_profile
+from algorithms.supplies_per_vehicles import split_supplies_per_vehicle
+from graph.layers import terrain_graph
+from supply import Inventory, inventory_from_supplies
+from vehicle import VehicleStatus
+
+CAPACITY_TOLERANCE = 1e-9  # Loads are summed in another order when planned, so may differ by rounding
+
+class DeliveryPlan:
+    """
+    A delivery found by a search, not yet applied to the simulation state.
+
+    Planning only reads the state, so plans for many candidates (algorithms, end points, depots)
+    can be computed side by side and only the chosen one applied with commit_plan. A plan can't be
+    changed once made.
+
+    Attributes:
+        start_point (StartPoint): The start point the supplies are taken from.
+        end_point (EndPoint): The end point the supplies are sent to.
+        path (tuple): The positions of the path, None if no delivery can be made or no path was searched.
+        total_distance (float): The cost of the path, in kilometres.
+        total_time (float): The time the delivery takes, in hours.
+        supplies (Inventory): The supplies sent, read-only.
+        loads (tuple): (vehicle, tuple of Supply) pairs of the vehicles sharing the supplies.
+        message (str): Why no delivery can be made, None for a delivery.
+        profile (PathProfile): The distances along the path under each weather condition, to time it for any
+                               vehicle or part of it. None without a path.
+    """
+    def __init__(self, start_point, end_point, path, total_distance=0, total_time=0, supplies=None, loads=(),
+                 message=None, profile=None):
+        if supplies is not None:
+            supplies.quantities.setflags(write=False)
+        self.__dict__.update(
+            start_point=start_point,
+            end_point=end_point,
+            path=tuple(path) if path is not None else None,
+            total_distance=total_distance,
+            total_time=total_time,
+            supplies=supplies,
+            loads=tuple((vehicle, tuple(vehicle_supplies)) for vehicle, vehicle_supplies in loads),
+            message=message,
+            profile=profile,
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("A delivery plan can't be changed, plan the delivery again instead")
+
+    def result(self):
+        """
+        Returns the plan the way the delivery searches report a delivery.
+
+        Returns:
+            tuple: The path as a list of positions, total distance covered, total time taken, and a dictionary
+                   mapping vehicle IDs to the supplies they deliver, or (None, 0, 0, message) if no delivery
+                   can be made.
+        """
+        if self.message is not None:
+            return None, 0, 0, self.message
+        return (list(self.path) if self.path is not None else None, self.total_distance, self.total_time,
+                {vehicle.id: [s.type.name for s in vehicle_supplies] for vehicle, vehicle_supplies in self.loads})
+
+def supplies_to_send(start_point, end_point):
+    """
+    Returns the supplies the start point can send to an end point.
+
+    Args:
+        start_point (StartPoint): The start point holding the available supplies.
+        end_point (EndPoint): The end point with the supplies it needs.
+
+    Returns:
+        Inventory: The quantity of each supply type to send.
+    """
+    return start_point.supplies.allocate(end_point.supplies_needed)
+
+def plan_delivery(state, start_point, end_point, path, total_distance, terrain, weather, total_time=None):
+    """
+    Plans the delivery of the supplies needed at an end point along a path found by a search.
+
+    The idle vehicles at the start point that can reach the end point share the supplies; each
+    vehicle given some will move to the end point and spend the fuel for the distance.
+
+    Args:
+        state (object): The current simulation state, including vehicles and graph information.
+        start_point (object): The starting node containing the supplies to be delivered.
+        end_point (object): The destination node where supplies are needed.
+        path (list): The positions of the path, from the start point to the end point.
+        total_distance (float): The cost of the path, in kilometres.
+        terrain (int): The terrain of the vehicles.
+        weather (Weather): Weather conditions affecting the velocity of the vehicles.
+        total_time (float, optional): The time the delivery takes, in hours. By default, the time each
+                                      vehicle takes to travel the path at its velocity is added up, or
+                                      without a path, the slowest vehicle given supplies travels the
+                                      distance at its average velocity.
+
+    Returns:
+        DeliveryPlan: The delivery, or a plan with a message if no vehicle is available.
+    """
+    supplies = supplies_to_send(start_point, end_point)
+    vehicles = state.vehicles.available(start_point.position, terrain, total_distance)
+    supplies_per_vehicle = split_supplies_per_vehicle(vehicles, supplies.supplies())
+    if not supplies_per_vehicle:
+        return DeliveryPlan(start_point, end_point, None, message="There aren't any available vehicles.")
+    if not any(supplies_per_vehicle):
+        return DeliveryPlan(start_point, end_point, None, message="No available vehicle can carry the supplies.")
+
+    # The path is profiled once, then timed for each vehicle without going over it again
+    profile = path_profile(terrain_graph(state.graph, terrain), weather, path) if path is not None else None
+    if total_time is None and profile is None:
+        total_time = total_distance / min(vehicle.type.average_velocity for vehicle, vehicle_supplies
+                                          in zip(vehicles, supplies_per_vehicle) if vehicle_supplies)
+    elif total_time is None:
+        total_time = sum(profile.time(vehicle.type) for vehicle, vehicle_supplies
+                         in zip(vehicles, supplies_per_vehicle) if vehicle_supplies)
+
+    return DeliveryPlan(start_point, end_point, path, total_distance, total_time, supplies,
+                        zip(vehicles, supplies_per_vehicle), profile=profile)
+
+def commit_plan(state, plan):
+    """
+    Applies a delivery plan to the simulation state.
+
+    The vehicles given supplies move to the end point, become busy, spend the fuel for the distance
+    and carry their load. The supplies they carry are taken from the start point and satisfy the
+    needs of the end point; supplies no vehicle had room for stay at the start point. A plan made before other deliveries took its vehicles, their fuel or capacity, or the
+    supplies it sends is out of date and isn't applied.
+
+    Args:
+        state (object): The simulation state the plan was made for.
+        plan (DeliveryPlan): The plan to apply.
+
+    Returns:
+        tuple: The path as a list of positions, total distance covered, total time taken, and a dictionary
+               mapping vehicle IDs to the supplies they delivered, or (None, 0, 0, message) if the plan
+               has no delivery or is out of date.
+    """
+    if plan.message is not None:
+        return plan.result()
+
+    loads = [(vehicle, inventory_from_supplies(vehicle_supplies)) for vehicle, vehicle_supplies in plan.loads
+             if vehicle_supplies]
+    for vehicle, cargo in loads:
+        if (vehicle.vehicle_status != VehicleStatus.IDLE or vehicle.position != plan.start_point.position
+                or vehicle.current_fuel < plan.total_distance
+                or vehicle.current_weight + cargo.weight() > vehicle.type.weight_capacity + CAPACITY_TOLERANCE
+                or vehicle.current_volume + cargo.volume() > vehicle.type.volume_capacity + CAPACITY_TOLERANCE):
+            return None, 0, 0, "The plan is out of date."
+    carried = Inventory()
+    for _, cargo in loads:
+        carried.add(cargo)
+    if (carried.quantities > plan.start_point.supplies.quantities).any():
+        return None, 0, 0, "The plan is out of date."
+
+    for vehicle, cargo in loads:
+        vehicle.position = plan.end_point.position
+        vehicle.vehicle_status = VehicleStatus.BUSY
+        vehicle.current_fuel -= plan.total_distance
+        vehicle.current_weight += cargo.weight()
+        vehicle.current_volume += cargo.volume()
+        vehicle.cargo.add(cargo)
+
+    plan.start_point.supplies.consume(carried)
+    plan.end_point.satisfy_supplies(carried)
+    return plan.result()
+
+def deliver(state, start_point, end_point, path, total_distance, terrain, weather, total_time=None):
+    """
+    Plans the delivery of the supplies needed at an end point along a path and applies it at once
+    (see plan_delivery and commit_plan).
+    """
+    return commit_plan(state, plan_delivery(state, start_point, end_point, path, total_distance, terrain, weather,
+                                            total_time))
@@ -0,0 +1,78 @@
+import heapq
+
+from graph.edge_costs import edge_cost_table
+from graph.layers import terrain_layer
+
+def nearest_depots(graph, weather, terrain, blocked_routes, start_points, end_points):
+    """
+    Assigns every end point to its nearest reachable start point (depot), with a single multi-source
+    Dijkstra search.
+
+    Every depot is a source at cost 0, and each node is labelled with the depot it is settled from,
+    which is the depot it is cheapest to reach it from. The search stops once every end point is
+    settled, so it costs about as much as a single search instead of one per depot.
+
+    Args:
+        graph (Graph or TiledGraph): The road network.
+        weather (Weather): Current weather conditions affecting the cost of edges.
+        terrain (int): The terrain (Transportation value) of the vehicles.
+        blocked_routes (set): A set of blocked routes that vehicles cannot use.
+        start_points (list): The depots.
+        end_points (list): The end points to assign.
+
+    Returns:
+        list: For each end point, the index of its nearest depot and the cost to reach it in kilometres,
+              or (None, inf) if no depot can reach it.
+    """
+    layer = terrain_layer(graph, terrain, blocked_routes)
+    edge_costs = edge_cost_table(layer.graph, weather)
+    nodes = layer.graph.nodes
+
+    wanted = {}
+    for index, end_point in enumerate(end_points):
+        wanted.setdefault(end_point.position, []).append(index)
+    remaining = len(wanted)
+
+    costs = {}
+    pq = []
+    for depot, start_point in enumerate(start_points):
+        if costs.get(start_point.position, float('inf')) > 0:
+            costs[start_point.position] = 0
+            heapq.heappush(pq, (0, depot, start_point.position))
+
+    assignments = [(None, float('inf'))] * len(end_points)
+    visited = set()
+    while pq and remaining:
+        cost, depot, position = heapq.heappop(pq)
+        if position in visited:
+            continue
+        visited.add(position)
+
+        if position in wanted:
+            for index in wanted[position]:
+                assignments[index] = (depot, cost)
+            remaining -= 1
+
+        node = nodes.get(position)
+        if node is None:
+            continue
+        edge_costs.prepare(node)
+        for neighbor, edge in layer.neighbours(node):
+            if edge_costs.blocked[edge]:
+                continue
+            new_cost = cost + edge_costs.costs[edge]
+            if new_cost < costs.get(neighbor.position, float('inf')):
+                costs[neighbor.position] = new_cost
+                heapq.heappush(pq, (new_cost, depot, neighbor.position))
+
+    return assignments
+
+def nearest_depot(state, end_point, terrain, blocked_routes):
+    """
+    Returns the depot of the state a delivery to an end point should start from: its nearest
+    reachable depot, or the first depot if none can reach it.
+    """
+    if len(state.start_points) == 1:
+        return state.start_point
+    depot, _ = nearest_depots(state.graph, state.weather, terrain, blocked_routes, state.start_points, [end_point])[0]
+    return state.start_points[0 if depot is None else depot]
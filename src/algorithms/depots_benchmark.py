@@ -0,0 +1,72 @@
+"""
+Benchmark of the assignment of end points to their nearest depot: a single multi-source search
+against one search per depot, on a synthetic grid with dozens of depots and thousands of end points.
+
+Run from the root of the repository with bin/benchmark-depots.
+"""
+
+import argparse
+import random
+import time
+
+from algorithms.depots import nearest_depots
+from end_point import EndPoint
+from graph.graph import Graph
+from graph.position import Position
+from start_point import StartPoint
+from supply import Inventory
+from weather import Weather, WeatherCondition
+
+def grid_graph(size, step=0.001):
+    """
+    Builds a size x size grid of roads, one node every step degrees.
+    """
+    graph = Graph()
+    positions = [Position(-8.4 + column * step, 41.5 + row * step) for row in range(size) for column in range(size)]
+    for node_id, position in enumerate(positions):
+        graph.add_node(position, node_id)
+    for row in range(size):
+        for column in range(size):
+            position = positions[row * size + column]
+            if column + 1 < size:
+                graph.add_edge(position, positions[row * size + column + 1])
+            if row + 1 < size:
+                graph.add_edge(position, positions[(row + 1) * size + column])
+    return graph, positions
+
+def run(size, depots, end_points, seed):
+    rng = random.Random(seed)
+    graph, positions = grid_graph(size)
+    weather = Weather(WeatherCondition.SUNNY)
+    start_points = [StartPoint(position, Inventory()) for position in rng.sample(positions, depots)]
+    targets = [EndPoint(position, Inventory(), 0) for position in rng.sample(positions, end_points)]
+    print(f"{len(graph.nodes)} nodes, {depots} depots, {end_points} end points")
+
+    start = time.perf_counter()
+    assignments = nearest_depots(graph, weather, 0, set(), start_points, targets)
+    multi_source = time.perf_counter() - start
+
+    start = time.perf_counter()
+    per_depot = [nearest_depots(graph, weather, 0, set(), [start_point], targets) for start_point in start_points]
+    separate = time.perf_counter() - start
+
+    # Ties may go to either depot, so only the costs have to agree
+    for index, (depot, cost) in enumerate(assignments):
+        best = min(costs[index][1] for costs in per_depot)
+        if abs(cost - best) > 1e-9 or (depot is not None and abs(per_depot[depot][index][1] - cost) > 1e-9):
+            raise AssertionError(f"End point {index}: depot {depot} at {cost} km, cheapest is {best} km")
+
+    print(f"multi-source: {multi_source * 1000:.1f} ms")
+    print(f"per depot:    {separate * 1000:.1f} ms ({separate / multi_source:.1f}x slower)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the assignment of end points to their nearest depot.")
+    parser.add_argument("--size", type=int, default=150, help="Nodes on each side of the grid")
+    parser.add_argument("--depots", type=int, default=40)
+    parser.add_argument("--end-points", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.size, args.depots, args.end_points, args.seed)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+import heapq
+from time import perf_counter
+
+from algorithms.delivery import commit_plan, plan_delivery, supplies_to_send
+from algorithms.depots import nearest_depots
+from metrics import DISPATCH_BATCHES, DISPATCH_DECISIONS
+
+PRIORITY_WEIGHT = 4  # How much more urgent a unit of need is at a priority end point than elsewhere
+
+def urgency(end_point):
+    """
+    Returns how urgently an end point needs supplies: the weight of the supplies it still needs,
+    scaled up for priority end points.
+    """
+    return (1 + PRIORITY_WEIGHT * end_point.priority) * end_point.supplies_needed.weight()
+
+class DispatchScheduler:
+    """
+    Serves the needs of every end point, most urgent first, with the idle vehicles of the depots.
+
+    The end points with unmet needs are kept in a heap by urgency. An end point is pushed again
+    whenever its needs change, and the entries pushed before are skipped as stale when popped, so
+    re-prioritizing an end point costs O(log n) instead of a rebuild of the heap. Each end point is
+    served from its nearest depot, found for all of them at once by a multi-source search that is
+    only run again when the weather or the closed routes change.
+
+    End points that can't be served (no idle vehicle with enough fuel or no supplies at their depot,
+    or no depot reaches them) wait outside the heap until vehicles are released or conditions change.
+
+    Attributes:
+        state (State): The simulation state the deliveries update.
+        terrain (int): The terrain (Transportation value) of the vehicles dispatched.
+        blocked_routes (set): The closed routes, as "id1,id2" strings.
+        heap (list): (-urgency, end point index, version) entries.
+        versions (list): The version of the latest entry of each end point.
+        waiting (set): Indexes of the end points that couldn't be served.
+        assignments (list): (depot index, cost) of each end point, None until the next search.
+        weather_version (int): The weather version the assignments were computed with.
+        closed_routes (frozenset): The closed routes the assignments were computed with.
+        decisions (int): The number of deliveries dispatched so far.
+    """
+    def __init__(self, state, terrain=0, blocked_routes=None):
+        self.state = state
+        self.terrain = terrain
+        self.blocked_routes = blocked_routes if blocked_routes is not None else set()
+        self.heap = []
+        self.versions = [0] * len(state.end_points)
+        self.waiting = set()
+        self.assignments = None
+        self.weather_version = None
+        self.closed_routes = frozenset()
+        self.decisions = 0
+        for index in range(len(state.end_points)):
+            self.needs_changed(index)
+
+    def needs_changed(self, index):
+        """
+        Re-prioritizes an end point after its needs changed.
+
+        Args:
+            index (int): The index of the end point.
+        """
+        self.versions[index] += 1
+        self.waiting.discard(index)
+        priority = urgency(self.state.end_points[index])
+        if priority > 0:
+            heapq.heappush(self.heap, (-priority, index, self.versions[index]))
+
+    def vehicles_released(self):
+        """
+        Gives the waiting end points another chance, after vehicles became idle or depots were restocked.
+        """
+        for index in list(self.waiting):
+            self.needs_changed(index)
+
+    def conditions_changed(self):
+        """
+        Makes the next batch search the nearest depots again and gives the waiting end points another chance.
+        The weather and closed routes are also checked at the start of every batch.
+        """
+        self.assignments = None
+        self.vehicles_released()
+
+    def depot_assignments(self):
+        """
+        Returns the nearest depot of each end point, searched again if the weather or closed routes changed.
+        """
+        state = self.state
+        if (self.assignments is None or self.weather_version != state.weather.version
+                or self.closed_routes != self.blocked_routes):
+            if self.assignments is not None:
+                self.vehicles_released()
+            self.assignments = nearest_depots(state.graph, state.weather, self.terrain, self.blocked_routes,
+                                              state.start_points, state.end_points)
+            self.weather_version = state.weather.version
+            self.closed_routes = frozenset(self.blocked_routes)
+        return self.assignments
+
+    def dispatch(self, batch_size=None):
+        """
+        Dispatches a batch of deliveries to the most urgent end points.
+
+        Each delivery is made from the end point's nearest depot by its idle vehicles with enough fuel,
+        as in the searches. No route is searched: the vehicles are sent along the cheapest route, which
+        a search finds when they leave, and the delivery is timed for the slowest of those given supplies.
+
+        Args:
+            batch_size (int, optional): The most deliveries dispatched. Defaults to as many as possible.
+
+        Returns:
+            list: (end point index, depot index, cost in kilometres, time in hours, vehicle ID -> supply
+                  names) of each delivery, most urgent first.
+        """
+        started = perf_counter()
+        state = self.state
+        assignments = self.depot_assignments()
+        decisions = []
+        while self.heap and (batch_size is None or len(decisions) < batch_size):
+            if state.vehicles.fastest_idle() is None:
+                break
+            _, index, version = heapq.heappop(self.heap)
+            if version != self.versions[index]:
+                continue
+
+            depot, cost = assignments[index]
+            end_point = state.end_points[index]
+            start_point = state.start_points[depot] if depot is not None else None
+            vehicles = state.vehicles.available(start_point.position, self.terrain, cost) if start_point else []
+            if not vehicles or supplies_to_send(start_point, end_point).total() <= 0:
+                self.waiting.add(index)
+                continue
+
+            # Without a path, the delivery is timed by the slowest vehicle given supplies
+            plan = plan_delivery(state, start_point, end_point, None, cost, self.terrain, state.weather)
+            if plan.message is not None:
+                # None of the vehicles has room for any of the supplies
+                self.waiting.add(index)
+                continue
+            _, _, _, supplies_info = commit_plan(state, plan)
+            decisions.append((index, depot, cost, plan.total_time, supplies_info))
+            self.decisions += 1
+            # Needs the depot couldn't cover wait for a restock
+            self.needs_changed(index)
+
+        DISPATCH_DECISIONS.inc(len(decisions))
+        DISPATCH_BATCHES.observe(perf_counter() - started)
+        return decisions
@@ -0,0 +1,86 @@
+"""
+Headless run of the dispatch scheduler: serves thousands of end points of a synthetic grid from a few
+depots, returning the vehicles to their depots after every batch, and reports the dispatch decisions
+made per second. The metrics recorded during the run can be appended to a JSON-lines file.
+
+Run from the root of the repository with bin/benchmark-dispatch.
+"""
+
+import argparse
+import random
+import time
+
+from algorithms.depots_benchmark import grid_graph
+from algorithms.dispatch import DispatchScheduler
+from end_point import EndPoint
+from load_dataset import State
+from metrics import write_metrics
+from start_point import StartPoint
+from supply import Inventory
+from vehicle import Vehicle, VehicleStatus, VehicleType
+from weather import Weather, WeatherCondition
+
+def return_to_depots(state):
+    """
+    Sends the busy vehicles back to their depots, refuelled and unloaded.
+    """
+    for vehicle in state.vehicles:
+        if vehicle.vehicle_status == VehicleStatus.BUSY:
+            vehicle.position = state.start_points[vehicle.depot].position
+            vehicle.current_fuel = vehicle.type.fuel_capacity
+            vehicle.current_weight = 0
+            vehicle.current_volume = 0
+            vehicle.cargo = Inventory()
+            vehicle.vehicle_status = VehicleStatus.IDLE
+
+def run(size, depots, end_points, vehicles, batch_size, seed):
+    rng = random.Random(seed)
+    graph, positions = grid_graph(size)
+    start_points = [StartPoint(position, Inventory([1e9, 1e9, 1e9])) for position in rng.sample(positions, depots)]
+    targets = [EndPoint(position, Inventory([rng.randint(0, 20), rng.randint(0, 20), rng.randint(0, 10)]),
+                        int(rng.random() < 0.2))
+               for position in rng.sample(positions, end_points)]
+    truck = VehicleType("Camião", 0, 1000, 100, 100, 60)
+    fleet = [Vehicle(i + 1, start_points[i % depots].position, truck, 1000, 0, 0, VehicleStatus.IDLE, i % depots)
+             for i in range(vehicles)]
+    state = State(0, fleet, start_points, targets, graph, Weather(WeatherCondition.SUNNY))
+    print(f"{len(graph.nodes)} nodes, {depots} depots, {end_points} end points, {vehicles} vehicles")
+
+    scheduler = DispatchScheduler(state)
+    start = time.perf_counter()
+    scheduler.depot_assignments()
+    search = time.perf_counter() - start
+
+    batches = 0
+    while True:
+        decisions = scheduler.dispatch(batch_size)
+        if not decisions:
+            break
+        batches += 1
+        return_to_depots(state)
+        scheduler.vehicles_released()
+    elapsed = time.perf_counter() - start
+
+    unmet = sum(1 for end_point in targets if end_point.supplies_needed.total() > 0)
+    print(f"nearest depot search: {search * 1000:.1f} ms")
+    print(f"{scheduler.decisions} decisions in {batches} batches, {elapsed:.2f} s "
+          f"({scheduler.decisions / elapsed:.0f} decisions/s)")
+    print(f"end points with unmet needs: {unmet}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the dispatch scheduler headless on a synthetic scenario.")
+    parser.add_argument("--size", type=int, default=100, help="Nodes on each side of the grid")
+    parser.add_argument("--depots", type=int, default=10)
+    parser.add_argument("--end-points", type=int, default=5000)
+    parser.add_argument("--vehicles", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--metrics-jsonl", help="Append the metrics of the run to this JSON-lines file")
+    args = parser.parse_args()
+    run(args.size, args.depots, args.end_points, args.vehicles, args.batch_size, args.seed)
+    if args.metrics_jsonl:
+        with open(args.metrics_jsonl, "a") as file:
+            write_metrics(file)
+
+if __name__ == '__main__':
+    main()
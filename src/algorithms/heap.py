@@ -0,0 +1,238 @@
+import heapq
+from collections import deque
+
+class IndexedHeap:
+    """
+    A d-ary min-heap of keys (e.g. node ids) by priority, with decrease-key.
+
+    Each key is in the heap at most once: pushing a key already in it lowers its priority instead
+    of adding a stale entry, so the frontier of a search never grows past the nodes it has reached.
+    The heap keeps the index of each key's entry, so finding the entry is O(1) and moving it
+    O(log_d n). Entries of equal priority are popped in the order they were last pushed, so searches
+    break ties the same way on every run without ever comparing the keys.
+
+    Attributes:
+        arity (int): The number of children of each entry.
+        entries (list): The (priority, order, key) entries, in heap order.
+        index (dict): The index of the entry of each key in entries.
+        order (int): The order given to the next entry pushed.
+    """
+    def __init__(self, arity=4):
+        self.arity = arity
+        self.entries = []
+        self.index = {}
+        self.order = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def push(self, key, priority):
+        """
+        Adds a key, or lowers its priority if it is already in the heap.
+
+        Args:
+            key (hashable): The key.
+            priority (float): The priority, lower first.
+
+        Returns:
+            bool: Whether the key was added or its priority lowered.
+        """
+        i = self.index.get(key)
+        if i is None:
+            i = len(self.entries)
+            self.entries.append(None)
+        elif priority >= self.entries[i][0]:
+            return False
+        self.order += 1
+        self.sift_up(i, (priority, self.order, key))
+        return True
+
+    def pop(self):
+        """
+        Removes the key of lowest priority.
+
+        Returns:
+            tuple: The key and its priority.
+        """
+        entries = self.entries
+        top = entries[0]
+        last = entries.pop()
+        del self.index[top[2]]
+        if entries:
+            self.sift_down(0, last)
+        return top[2], top[0]
+
+    def priority(self, key):
+        """
+        Returns the priority of a key in the heap, or None if it isn't in it.
+        """
+        i = self.index.get(key)
+        return self.entries[i][0] if i is not None else None
+
+    def sift_up(self, i, entry):
+        entries = self.entries
+        index = self.index
+        arity = self.arity
+        while i > 0:
+            parent = (i - 1) // arity
+            if entries[parent] <= entry:
+                break
+            entries[i] = entries[parent]
+            index[entries[parent][2]] = i
+            i = parent
+        entries[i] = entry
+        index[entry[2]] = i
+
+    def sift_down(self, i, entry):
+        entries = self.entries
+        index = self.index
+        arity = self.arity
+        size = len(entries)
+        while True:
+            child = i * arity + 1
+            if child >= size:
+                break
+            smallest = entries[child]
+            for other in range(child + 1, min(child + arity, size)):
+                if entries[other] < smallest:
+                    child, smallest = other, entries[other]
+            if smallest >= entry:
+                break
+            entries[i] = smallest
+            index[smallest[2]] = i
+            i = child
+        entries[i] = entry
+        index[entry[2]] = i
+
+class LazyHeap:
+    """
+    A binary min-heap of keys by priority, with lazy deletion instead of decrease-key.
+
+    Pushing a key already in the heap at a lower priority adds another entry and marks the old one
+    stale; stale entries are skipped when popped. The heap may hold more entries than keys, but
+    each push and pop is a single heapq call in C, which is faster in CPython than sifting the
+    entries of an IndexedHeap in Python (see bin/benchmark-heap). Entries of equal priority are popped
+    in the order they were last pushed, as in IndexedHeap. It has the same interface as IndexedHeap.
+
+    Attributes:
+        entries (list): The (priority, order, key) entries, stale ones included, in heapq order.
+        live (dict): The entry of each key in the heap; any other entry of the key is stale.
+        order (int): The order given to the next entry pushed.
+    """
+    def __init__(self):
+        self.entries = []
+        self.live = {}
+        self.order = 0
+
+    def __len__(self):
+        return len(self.live)
+
+    def __contains__(self, key):
+        return key in self.live
+
+    def push(self, key, priority):
+        """
+        Adds a key, or lowers its priority if it is already in the heap.
+
+        Returns:
+            bool: Whether the key was added or its priority lowered.
+        """
+        old = self.live.get(key)
+        if old is not None and priority >= old[0]:
+            return False
+        self.order += 1
+        entry = self.live[key] = (priority, self.order, key)
+        heapq.heappush(self.entries, entry)
+        return True
+
+    def pop(self):
+        """
+        Removes the key of lowest priority.
+
+        Returns:
+            tuple: The key and its priority.
+        """
+        live = self.live
+        while True:
+            entry = heapq.heappop(self.entries)
+            if live.get(entry[2]) is entry:
+                del live[entry[2]]
+                return entry[2], entry[0]
+
+    def priority(self, key):
+        entry = self.live.get(key)
+        return entry[0] if entry is not None else None
+
+class BucketQueue:
+    """
+    A monotone bucket queue (Dial's algorithm) of keys by priority quantized to a bucket width.
+
+    Pushing and popping are O(1) plus the empty buckets skipped, instead of O(log n). Keys in the
+    same bucket are popped first in, first out, so costs closer than the bucket width are treated as
+    equal: a search finds routes within the bucket width per edge of the cheapest. Priorities must
+    never be pushed below the bucket of the last key popped, which holds for Dijkstra's algorithm
+    with non-negative costs. It has the same interface as IndexedHeap.
+
+    Attributes:
+        width (float): The range of priorities of each bucket.
+        buckets (dict): Bucket number -> deque of (key, priority) entries.
+        current (int): The bucket number popped from last.
+        priorities (dict): The priority of each key in the queue; entries with another priority are stale.
+    """
+    def __init__(self, width):
+        self.width = width
+        self.buckets = {}
+        self.current = 0
+        self.priorities = {}
+
+    def __len__(self):
+        return len(self.priorities)
+
+    def __contains__(self, key):
+        return key in self.priorities
+
+    def push(self, key, priority):
+        """
+        Adds a key, or lowers its priority if it is already in the queue.
+
+        Returns:
+            bool: Whether the key was added or its priority lowered.
+        """
+        old = self.priorities.get(key)
+        if old is not None and priority >= old:
+            return False
+        self.priorities[key] = priority
+        bucket = max(int(priority / self.width), self.current)
+        queue = self.buckets.get(bucket)
+        if queue is None:
+            queue = self.buckets[bucket] = deque()
+        queue.append((key, priority))
+        return True
+
+    def pop(self):
+        """
+        Removes a key of the lowest bucket.
+
+        Returns:
+            tuple: The key and its priority.
+        """
+        while True:
+            queue = self.buckets.get(self.current)
+            while queue:
+                key, priority = queue.popleft()
+                if self.priorities.get(key) == priority:
+                    del self.priorities[key]
+                    return key, priority
+            self.buckets.pop(self.current, None)
+            # Jump over empty buckets to the next one in use
+            self.current = min(self.buckets)
+
+    def priority(self, key):
+        return self.priorities.get(key)
+
+# The frontier the best-first searches make for each search. The lazy heap is the fastest of the exact
+# frontiers in CPython; set it to IndexedHeap to search with decrease-key instead.
+frontier_type = LazyHeap
@@ -0,0 +1,158 @@
+"""
+Benchmark of the frontiers of the best-first searches: Dijkstra's algorithm over a synthetic grid
+with each frontier, then the delivery searches themselves.
+
+The lazy frontiers (heapq, queue.PriorityQueue and LazyHeap, the default of the searches) push a new
+entry every time a node is reached more cheaply and skip the stale ones when popped. The indexed heaps
+lower the entry of the node instead, and the bucket queue quantizes the costs. The delivery searches
+are run with each exact frontier of algorithms.heap.
+
+Run from the root of the repository with bin/benchmark-heap.
+"""
+
+import argparse
+import heapq
+import random
+import time
+from queue import PriorityQueue
+
+from algorithms.depots_benchmark import grid_graph
+from algorithms import heap
+from algorithms.heap import BucketQueue, IndexedHeap, LazyHeap
+from algorithms.informed import heuristics
+from algorithms.informed.a_star import a_star_route
+from algorithms.informed.greedy import greedy_route
+from algorithms.informed.time_dependent import td_a_star_route
+from algorithms.uninformed.uniform_cost import ucs_route
+from end_point import EndPoint
+from load_dataset import State
+from start_point import StartPoint
+from supply import Inventory
+from vehicle import VehicleType
+from weather import Weather, WeatherCondition
+
+def lazy_heapq(adjacency, source, target):
+    costs = {source: 0}
+    visited = set()
+    pq = [(0, source)]
+    pushes = peak = 1
+    while pq:
+        cost, node = heapq.heappop(pq)
+        if node in visited:
+            continue
+        visited.add(node)
+        if node == target:
+            return cost, pushes, peak
+        for neighbour, weight in adjacency[node]:
+            new_cost = cost + weight
+            if neighbour not in visited and new_cost < costs.get(neighbour, float('inf')):
+                costs[neighbour] = new_cost
+                heapq.heappush(pq, (new_cost, neighbour))
+                pushes += 1
+        peak = max(peak, len(pq))
+    return None, pushes, peak
+
+def lazy_priority_queue(adjacency, source, target):
+    costs = {source: 0}
+    visited = set()
+    pq = PriorityQueue()
+    pq.put((0, source))
+    pushes = peak = 1
+    while not pq.empty():
+        cost, node = pq.get()
+        if node in visited:
+            continue
+        visited.add(node)
+        if node == target:
+            return cost, pushes, peak
+        for neighbour, weight in adjacency[node]:
+            new_cost = cost + weight
+            if neighbour not in visited and new_cost < costs.get(neighbour, float('inf')):
+                costs[neighbour] = new_cost
+                pq.put((new_cost, neighbour))
+                pushes += 1
+        peak = max(peak, pq.qsize())
+    return None, pushes, peak
+
+def indexed(frontier, adjacency, source, target):
+    visited = set()
+    frontier.push(source, 0)
+    pushes = peak = 1
+    while frontier:
+        node, cost = frontier.pop()
+        visited.add(node)
+        if node == target:
+            return cost, pushes, peak
+        for neighbour, weight in adjacency[node]:
+            if neighbour not in visited and frontier.push(neighbour, cost + weight):
+                pushes += 1
+        peak = max(peak, len(frontier))
+    return None, pushes, peak
+
+def run(size, queries, seed):
+    rng = random.Random(seed)
+    graph, positions = grid_graph(size)
+    # Random weights make nodes reached more cheaply later, as on real roads
+    adjacency = {node.id: [(neighbour.id, rng.uniform(0.05, 0.15)) for neighbour, _ in node.neighbours]
+                 for node in graph.nodes.values()}
+    pairs = [(rng.randrange(len(adjacency)), rng.randrange(len(adjacency))) for _ in range(queries)]
+    print(f"{len(graph.nodes)} nodes, {queries} queries")
+
+    frontiers = [
+        ("heapq, lazy", lazy_heapq),
+        ("PriorityQueue, lazy", lazy_priority_queue),
+        ("LazyHeap", lambda *args: indexed(LazyHeap(), *args)),
+        ("indexed binary heap", lambda *args: indexed(IndexedHeap(2), *args)),
+        ("indexed 4-ary heap", lambda *args: indexed(IndexedHeap(4), *args)),
+        ("indexed 8-ary heap", lambda *args: indexed(IndexedHeap(8), *args)),
+        ("bucket queue (0.01)", lambda *args: indexed(BucketQueue(0.01), *args)),
+    ]
+    reference = [lazy_heapq(adjacency, source, target)[0] for source, target in pairs]
+    print(f"{'frontier':22s} {'time':>10s} {'pushes':>10s} {'peak size':>10s} {'max error':>10s}")
+    for name, search in frontiers:
+        start = time.perf_counter()
+        results = [search(adjacency, source, target) for source, target in pairs]
+        elapsed = time.perf_counter() - start
+        error = max(abs(cost - expected) for (cost, _, _), expected in zip(results, reference))
+        print(f"{name:22s} {elapsed * 1000 / queries:8.1f}ms {sum(r[1] for r in results) // queries:10d} "
+              f"{max(r[2] for r in results):10d} {error:10.4f}")
+
+    state = State(0, [], StartPoint(positions[0], Inventory()), [], graph, Weather(WeatherCondition.SUNNY))
+    vehicle_type = VehicleType("Camião", 0, 100, 100, 100, 60)
+    searches = [
+        ("ucs", lambda start, end: ucs_route(state, start, end, 0, state.weather, set())),
+        ("ucs, buckets of 10 m", lambda start, end: ucs_route(state, start, end, 0, state.weather, set(), 0.01)),
+        ("a_star", lambda start, end: a_star_route(state, start, end, heuristics.haversine_heuristic, 0,
+                                                   state.weather, set())),
+        ("greedy", lambda start, end: greedy_route(state, start, end, heuristics.haversine_heuristic, 0,
+                                                   state.weather, set())),
+        ("td_a_star", lambda start, end: td_a_star_route(state, start, end, vehicle_type, 0, state.weather, set())),
+    ]
+    nodes = list(graph.nodes.values())
+    points = [(StartPoint(nodes[source].position, Inventory()), EndPoint(nodes[target].position, Inventory(), 0))
+              for source, target in pairs]
+    print(f"{'search':22s} {'frontier':>12s} {'time':>10s}")
+    default = heap.frontier_type
+    try:
+        for frontier_type in (LazyHeap, IndexedHeap):
+            heap.frontier_type = frontier_type
+            for name, search in searches:
+                search(*points[0])  # Builds the layer and cost tables
+                start = time.perf_counter()
+                for start_point, end_point in points:
+                    search(start_point, end_point)
+                print(f"{name:22s} {frontier_type.__name__:>12s} "
+                      f"{(time.perf_counter() - start) * 1000 / queries:8.1f}ms")
+    finally:
+        heap.frontier_type = default
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the frontiers of the best-first searches.")
+    parser.add_argument("--size", type=int, default=100, help="Nodes on each side of the grid")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.size, args.queries, args.seed)
+
+if __name__ == '__main__':
+    main()
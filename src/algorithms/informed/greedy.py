@@ -1,11 +1,74 @@
-from queue import PriorityQueue
-from algorithms.utils import manhattan_distance
-from supply import Supply, SupplyType
-from vehicle import VehicleStatus
-from algorithms.supplies_per_vehicles import split_supplies_per_vehicle
-from weather import WeatherCondition
+import time
+
+from algorithms import heap, trace
+from algorithms.delivery import DeliveryPlan, commit_plan, plan_delivery
+from algorithms.informed.heuristics import STATELESS_HEURISTICS
+from algorithms.route_cache import cached_route
+from algorithms.utils import trace_path
+from graph.edge_costs import edge_cost_table
+from graph.layers import terrain_layer
+from metrics import record_search
+
+def greedy_route(state, start_point, end_point, heuristic, terrain, weather, blocked_routes):
+    """
+    Finds a path from the start point to the end point with a Greedy Best-First Search.
 
-def greedy_supply_delivery(state, start_point, end_point, heuristic, terrain, weather, blocked_routes):
+    The frontier is a heap keyed by node id (see heap.frontier_type). A node's priority is its heuristic alone, so
+    it keeps the node it was first reached from, and ties go to the node reached first.
+
+    Returns:
+        tuple: The path as a list of positions and its cost, or (None, 0) if no path is found.
+    """
+    layer = terrain_layer(state.graph, terrain, blocked_routes)
+    edge_costs = edge_cost_table(layer.graph, weather)
+    if start_point.position == end_point.position:
+        return [start_point.position], 0
+    start = layer.graph.nodes.get(start_point.position)
+    if start is None:
+        return None, 0
+
+    tracer = trace.recorder
+    if tracer is not None:
+        tracer.begin(layer.graph)
+    started = time.perf_counter()
+
+    # Greedy Algorithm
+    frontier = heap.frontier_type()
+    frontier.push(start.id, 0)
+    reached = {start.id: start}
+    parents = {start.id: None}
+    distances = {start.id: 0}
+    visited = set()
+
+    while frontier:
+        current_id, frontier_priority = frontier.pop()
+        visited.add(current_id)
+        current_node = reached[current_id]
+        total_distance = distances[current_id]
+        if tracer is not None:
+            tracer.expand(current_id, total_distance, frontier_priority)
+
+        if current_node.position == end_point.position:
+            record_search("greedy", started, len(visited))
+            return trace_path(reached, parents, current_id), total_distance
+
+        edge_costs.prepare(current_node)
+        for neighbor, edge in layer.neighbours(current_node):
+            if neighbor.id not in visited and neighbor.id not in frontier and not edge_costs.blocked[edge]:
+                heuristic_cost = heuristic(neighbor.position, end_point.position, state, end_point,
+                                           start_point)
+                frontier.push(neighbor.id, heuristic_cost)
+                reached[neighbor.id] = neighbor
+                parents[neighbor.id] = current_id
+                # Weather-adjusted cost of the edge, kept up to date by the cost table
+                distances[neighbor.id] = total_distance + edge_costs.costs[edge]
+                if tracer is not None:
+                    tracer.frontier(neighbor.id, distances[neighbor.id], heuristic_cost)
+
+    record_search("greedy", started, len(visited))
+    return None, 0
+
+def greedy_supply_plan(state, start_point, end_point, heuristic, terrain, weather, blocked_routes):
     """
     Implements the Greedy Best-First Search algorithm for supply delivery.
 
@@ -19,99 +82,25 @@ def greedy_supply_delivery(state, start_point, end_point, heuristic, terrain, we
         blocked_routes (set): A set of blocked routes that vehicles cannot traverse.
 
     Returns:
-        tuple: A tuple containing the path as a list of positions, total distance covered, total time taken,
-               and a dictionary mapping vehicle IDs to the supplies they delivered.
-               If no path is found, returns (None, 0, 0, "No path found").
+        DeliveryPlan: The delivery, or a plan with a message if no path is found or no vehicle is available.
     """
-    # Check needed supplies
-    needed_supplies = end_point.supplies_needed
-    available_supplies = start_point.supplies
-
-    # Separate the available and required supplies
-    supplies_to_send = []
-    supplies_consumed = {supply_type: 0 for supply_type in SupplyType}
-    for needed_type, needed_quantity in needed_supplies.items():
-        total_available = sum(s.quantity for s in available_supplies if s.type == SupplyType[needed_type])
-        if total_available >= needed_quantity:
-            supplies_to_send.append(Supply(needed_quantity, SupplyType[needed_type]))
-            supplies_consumed[SupplyType[needed_type]] = needed_quantity
-        else:
-            supplies_to_send.append(Supply(total_available, SupplyType[needed_type]))
-            supplies_consumed[SupplyType[needed_type]] = total_available
-
-    # Greedy Algorithm
-    visited = set()
-    pq = PriorityQueue()
-    pq.put((0, start_point.position, [], 0))  # (heuristic, current_position, path)
+    layer = terrain_layer(state.graph, terrain, blocked_routes)
+    # Heuristics reading the vehicles or supplies can lead to another path once those change
+    name = ("greedy", heuristic.__name__) if heuristic.__name__ in STATELESS_HEURISTICS else None
+    path, total_distance, _ = cached_route(
+        name,
+        lambda state, start_point, end_point, terrain, weather, blocked_routes: greedy_route(
+            state, start_point, end_point, heuristic, terrain, weather, blocked_routes
+        ),
+        layer.graph, state, start_point, end_point, terrain, weather, blocked_routes
+    )
+    if path is None:
+        return DeliveryPlan(start_point, end_point, None, message="No path found.")
+    return plan_delivery(state, start_point, end_point, path, total_distance, terrain, weather)
 
-    while not pq.empty():
-        priority, current_position, path, total_distance = pq.get()
-
-        if current_position in visited:
-            continue
-        visited.add(current_position)
-
-        if current_position == end_point.position:
-            # Assign supplies to vehicles
-            vehicles = [v for v in state.vehicles if v.position == start_point.position
-                        and v.vehicle_status == VehicleStatus.IDLE and v.type.can_access_terrain(terrain)
-                        and v.current_fuel >= total_distance]
-            supplies_per_vehicle = split_supplies_per_vehicle(vehicles, supplies_to_send)
-
-            total_time = 0
-            for vehicle, supplies in zip(vehicles, supplies_per_vehicle):
-                if supplies:
-                    vehicle.position = end_point.position
-                    vehicle.vehicle_status = VehicleStatus.BUSY
-                    vehicle.current_fuel -= total_distance
-
-                    for i in range(len(path) - 1):
-                        start_pos = path[i]
-                        end_pos = path[i + 1]
-                        
-                        weather_condition = weather.get_condition(start_pos)
-                        velocity = vehicle.type.adjust_velocity(weather_condition)
-                        distance = manhattan_distance(start_pos, end_pos)
-                        
-                        time_for_vehicle = distance / velocity if velocity > 0 else float('inf')
-                        
-                        total_time += time_for_vehicle
-
-            if supplies_per_vehicle:
-                for supply_type, quantity_used in supplies_consumed.items():
-                    if quantity_used > 0:
-                        for supply in available_supplies:
-                            if supply.type == supply_type:
-                                if supply.quantity >= quantity_used:
-                                    supply.quantity -= quantity_used
-                                    end_point.satisfy_supplies([Supply(quantity_used, supply_type)])
-                                    break
-                                else:
-                                    quantity_used -= supply.quantity
-                                    end_point.satisfy_supplies([Supply(supply.quantity, supply_type)])
-                                    supply.quantity = 0
-            else:
-                return None, 0, 0, "There aren't any available vehicles."
-
-            return ([start_point.position] + path, total_distance, total_time,
-                {vehicle.id: [s.type.name for s in supplies] for vehicle, supplies in zip(vehicles, supplies_per_vehicle)})
-
-        current_node = state.graph.nodes.get(current_position)
-        if current_node:
-            for neighbor, is_open in current_node.neighbours:
-                route1, route2 = f'{current_node.id},{neighbor.id}', f'{neighbor.id},{current_node.id}'
-                if is_open and neighbor.position not in visited and neighbor.can_access_terrain(terrain, weather) and route1 not in blocked_routes and route2 not in blocked_routes:
-                        weather_condition = weather.get_condition(neighbor.position)
-                        distance = manhattan_distance(current_position, neighbor.position)
-
-                        # We adjust the distance based on the weather conditions
-                        if weather_condition == WeatherCondition.SNOWY:
-                            distance *= 1.25
-                        elif weather_condition == WeatherCondition.RAINY:
-                            distance *= 1.1
-
-                        new_distance = total_distance + distance
-                        heuristic_cost = heuristic(neighbor.position, end_point.position, state, end_point)
-                        pq.put((heuristic_cost, neighbor.position, path + [neighbor.position], new_distance))
-
-    return None, 0, 0, "No path found."
+def greedy_supply_delivery(state, start_point, end_point, heuristic, terrain, weather, blocked_routes):
+    """
+    Plans a delivery with greedy_supply_plan and applies it to the state (see commit_plan).
+    """
+    return commit_plan(state, greedy_supply_plan(state, start_point, end_point, heuristic, terrain, weather,
+                                                 blocked_routes))
@@ -1,25 +1,50 @@
-from algorithms.utils import manhattan_distance
-from supply import SupplyType, get_weight_volume_per_supply
-from vehicle import VehicleStatus
+from algorithms.utils import haversine_distance
+from graph.position import Position
+
+# Heuristics that only depend on the positions and the graph, so the routes they lead to can be cached
+STATELESS_HEURISTICS = {"haversine_heuristic", "manhattan_heuristic", "blocked_route_heuristic"}
+
+# Heuristic based on the great-circle distance
+def haversine_heuristic(p1, p2, state, end_point, start_point=None):
+    """
+    Estimates the cost between two points using the great-circle distance.
+
+    Edge costs are road lengths in kilometres, never shorter than the great-circle distance, so
+    this heuristic is admissible and consistent and A* still finds the shortest path.
+
+    Args:
+        p1 (Point): The starting point.
+        p2 (Point): The destination point.
+        state (object): The current state of the simulation.
+        end_point (object): The end node representing the delivery destination.
+        start_point (object, optional): The depot the search starts from. Defaults to the first depot.
+
+    Returns:
+        float: The great-circle distance between the two points, in kilometres.
+    """
+    return haversine_distance(p1, p2)
 
 # Heuristic based on Manhattan distance
-def manhattan_heuristic(p1, p2, state, end_point):
+def manhattan_heuristic(p1, p2, state, end_point, start_point=None):
     """
-    Estimates the cost between two points using Manhattan distance.
+    Estimates the cost between two points using Manhattan distance, moving first along the
+    parallel of p1 and then along the meridian of p2.
 
     Args:
         p1 (Point): The starting point.
         p2 (Point): The destination point.
         state (object): The current state of the simulation.
         end_point (object): The end node representing the delivery destination.
+        start_point (object, optional): The depot the search starts from. Defaults to the first depot.
 
     Returns:
-        float: The Manhattan distance between the two points.
+        float: The Manhattan distance between the two points, in kilometres.
     """
-    return abs(p1.x - p2.x) + abs(p1.y - p2.y)
+    corner = Position(p2.x, p1.y)
+    return haversine_distance(p1, corner) + haversine_distance(corner, p2)
 
 # Heuristic to estimate the minimum time to traverse between points
-def time_estimation_heuristic(p1, p2, state, end_point):
+def time_estimation_heuristic(p1, p2, state, end_point, start_point=None):
     """
     Estimates the minimum time required to travel between two points.
 
@@ -28,20 +53,18 @@ def time_estimation_heuristic(p1, p2, state, end_point):
         p2 (Point): The destination point.
         state (object): The current state of the simulation, including available vehicles.
         end_point (object): The end node representing the delivery destination.
+        start_point (object, optional): The depot the search starts from. Defaults to the first depot.
 
     Returns:
         float: The estimated time based on vehicle speed or infinity if no vehicles are available.
     """
-    min_time = float('inf')
-    for vehicle in state.vehicles:
-        if vehicle.vehicle_status == VehicleStatus.IDLE:
-            distance = manhattan_distance(p1, p2)
-            time = distance / vehicle.type.average_velocity
-            min_time = min(min_time, time)
-    return min_time if min_time != float('inf') else float('inf')
+    fastest = state.vehicles.fastest_idle()
+    if fastest is None:
+        return float('inf')
+    return haversine_distance(p1, p2) / fastest.type.average_velocity
 
 # Heuristic to account for blocked routes
-def blocked_route_heuristic(p1, p2, state, end_point):
+def blocked_route_heuristic(p1, p2, state, end_point, start_point=None):
     """
     Adds a penalty to the heuristic for routes that are blocked.
 
@@ -50,6 +73,7 @@ def blocked_route_heuristic(p1, p2, state, end_point):
         p2 (Point): The destination point.
         state (object): The current state of the simulation.
         end_point (object): The end node representing the delivery destination.
+        start_point (object, optional): The depot the search starts from. Defaults to the first depot.
 
     Returns:
         float: The heuristic value including penalties for blocked routes.
@@ -60,10 +84,10 @@ def blocked_route_heuristic(p1, p2, state, end_point):
         for _, is_open in current_node.neighbours:
             if not is_open:
                 penalty += 10  # Arbitrary penalty value for blocked routes
-    return manhattan_distance(p1, p2) + penalty
+    return haversine_distance(p1, p2) + penalty
 
 # Heuristic to prioritize addressing supply deficits dynamically
-def dynamic_supply_priority_heuristic(p1, p2, state, end_point):
+def dynamic_supply_priority_heuristic(p1, p2, state, end_point, start_point=None):
     """
     Adjusts the heuristic dynamically based on the supply deficits at the destination.
 
@@ -72,20 +96,19 @@ def dynamic_supply_priority_heuristic(p1, p2, state, end_point):
         p2 (Point): The destination point.
         state (object): The current state of the simulation.
         end_point (object): The end node representing the delivery destination.
+        start_point (object, optional): The depot the search starts from. Defaults to the first depot.
 
     Returns:
         float: The heuristic value adjusted for supply deficits.
     """
-    supplies_needed = end_point.get_supplies_needed()
-    critical_penalty = 0
-    for supply_type, quantity in supplies_needed.items():
-        for supply in state.start_point.supplies:
-            if supply.type.name == supply_type and supply.quantity < quantity:
-                critical_penalty += (quantity - supply.quantity) * 5  # Arbitrary penalty multiplier
-    return manhattan_distance(p1, p2) + critical_penalty
+    # With several depots, the deficit is against the stock of the one the search starts from
+    depot = start_point if start_point is not None else state.start_point
+    deficit = end_point.supplies_needed.deficit(depot.supplies)
+    critical_penalty = deficit.total() * 5  # Arbitrary penalty multiplier
+    return haversine_distance(p1, p2) + critical_penalty
 
 # Heuristic to estimate the probability of delivery success
-def delivery_success_probability_heuristic(p1, p2, state, end_point):
+def delivery_success_probability_heuristic(p1, p2, state, end_point, start_point=None):
     """
     Penalizes the heuristic based on the probability of successful delivery.
 
@@ -94,36 +117,22 @@ def delivery_success_probability_heuristic(p1, p2, state, end_point):
         p2 (Point): The destination point.
         state (object): The current state of the simulation, including vehicles and supplies.
         end_point (object): The end node representing the delivery destination.
+        start_point (object, optional): The depot the search starts from. Defaults to the first depot.
 
     Returns:
         float: A penalty inversely proportional to the estimated delivery success probability.
     """
-    supplies_needed = end_point.get_supplies_needed()
-    total_weight_needed = sum(
-        quantity * get_weight_volume_per_supply(SupplyType[supply_type])[0]
-        for supply_type, quantity in supplies_needed.items()
-    )
-    total_volume_needed = sum(
-        quantity * get_weight_volume_per_supply(SupplyType[supply_type])[1]
-        for supply_type, quantity in supplies_needed.items()
-    )
-
-    total_distance = manhattan_distance(p1, p2)
-    success_probability = 0
-
-    for vehicle in state.vehicles:
-        if vehicle.vehicle_status == VehicleStatus.IDLE and vehicle.current_fuel >= total_distance:
-            weight_available = vehicle.type.weight_capacity - vehicle.current_weight
-            volume_available = vehicle.type.volume_capacity - vehicle.current_volume
-
-            weight_factor = min(1, weight_available / total_weight_needed)
-            volume_factor = min(1, volume_available / total_volume_needed)
-            success_probability = max(success_probability, weight_factor * volume_factor)
+    total_weight_needed = end_point.supplies_needed.weight()
+    total_volume_needed = end_point.supplies_needed.volume()
+
+    total_distance = haversine_distance(p1, p2)
+    # Best share of the load an idle vehicle with enough fuel can carry
+    success_probability = state.vehicles.best_capacity_fit(total_distance, total_weight_needed, total_volume_needed)
 
     return (1 - success_probability) * 100  # Penalty inversely proportional to success probability
 
 # Final combined heuristic combining various factors
-def final_combined_heuristic(p1, p2, state, end_point):
+def final_combined_heuristic(p1, p2, state, end_point, start_point=None):
     """
     Combines multiple heuristics to estimate the cost between two points.
 
@@ -132,6 +141,7 @@ def final_combined_heuristic(p1, p2, state, end_point):
         p2 (Point): The destination point.
         state (object): The current state of the simulation.
         end_point (object): The end node representing the delivery destination.
+        start_point (object, optional): The depot the search starts from. Defaults to the first depot.
 
     Returns:
         float: The combined heuristic value considering distance, time, blockages, supply deficits, and delivery success probability.
@@ -140,7 +150,7 @@ def final_combined_heuristic(p1, p2, state, end_point):
     manhattan_cost = manhattan_heuristic(p1, p2, state, end_point)
     time_cost = time_estimation_heuristic(p1, p2, state, end_point)
     block_cost = blocked_route_heuristic(p1, p2, state, end_point)
-    supply_cost = dynamic_supply_priority_heuristic(p1, p2, state, end_point)
+    supply_cost = dynamic_supply_priority_heuristic(p1, p2, state, end_point, start_point)
     success_cost = delivery_success_probability_heuristic(p1, p2, state, end_point)
 
     return manhattan_cost + time_cost + block_cost + supply_cost + success_cost
@@ -0,0 +1,122 @@
+import time
+
+from algorithms import heap, trace
+from algorithms.delivery import DeliveryPlan, commit_plan, plan_delivery
+from algorithms.route_cache import cached_route
+from algorithms.utils import haversine_distance, trace_path
+from graph.layers import terrain_layer
+from graph.td_costs import td_cost_table
+from metrics import record_search
+
+def td_a_star_route(state, start_point, end_point, vehicle_type, terrain, weather, blocked_routes):
+    """
+    Finds the path arriving first at the end point with time-dependent A*, for a vehicle type
+    departing at the time of the state.
+
+    Returns:
+        tuple: The path as a list of positions, its length and its duration, or (None, 0, 0) if no path is found.
+    """
+    layer = terrain_layer(state.graph, terrain, blocked_routes)
+    departure = state.time
+    costs = td_cost_table(layer.graph, weather, vehicle_type, departure)
+    if start_point.position == end_point.position:
+        return [start_point.position], 0, 0
+    start = layer.graph.nodes.get(start_point.position)
+    if start is None:
+        return None, 0, 0
+
+    tracer = trace.recorder
+    if tracer is not None:
+        tracer.begin(layer.graph)
+    started = time.perf_counter()
+    top_velocity = vehicle_type.average_velocity
+
+    # TD-A* Algorithm
+    frontier = heap.frontier_type()
+    frontier.push(start.id, departure)
+    reached = {start.id: start}
+    parents = {start.id: None}
+    arrivals = {start.id: departure}
+    distances = {start.id: 0}
+    visited = set()
+
+    while frontier:
+        current_id, estimate = frontier.pop()
+        visited.add(current_id)
+        current_node = reached[current_id]
+        arrival = arrivals[current_id]
+        total_distance = distances[current_id]
+        if tracer is not None:
+            # In hours: the time since departure, and the estimate of the time left
+            tracer.expand(current_id, arrival - departure, estimate - arrival)
+
+        if current_node.position == end_point.position:
+            record_search("td_a_star", started, len(visited))
+            return trace_path(reached, parents, current_id), total_distance, arrival - departure
+
+        travel_times, _ = costs.edges_at(current_node, arrival)
+        for neighbor, edge in layer.neighbours(current_node):
+            if neighbor.id not in visited:
+                new_arrival = arrival + travel_times[edge]
+                # The storm only matters if it is there when the vehicles arrive
+                _, blocked_on_arrival = costs.edges_at(current_node, new_arrival)
+                if blocked_on_arrival[edge]:
+                    continue
+
+                remaining_time = haversine_distance(neighbor.position, end_point.position) / top_velocity
+                if frontier.push(neighbor.id, new_arrival + remaining_time):
+                    reached[neighbor.id] = neighbor
+                    parents[neighbor.id] = current_id
+                    arrivals[neighbor.id] = new_arrival
+                    distances[neighbor.id] = total_distance + layer.graph.edge_length[edge] / 1000
+                    if tracer is not None:
+                        tracer.frontier(neighbor.id, new_arrival - departure, remaining_time)
+
+    record_search("td_a_star", started, len(visited))
+    return None, 0, 0
+
+def td_a_star_supply_plan(state, start_point, end_point, terrain, weather, blocked_routes):
+    """
+    Implements time-dependent A* (TD-A*) for supply delivery under a weather forecast.
+
+    The cost of a path is the time the vehicles arrive at its end. The time to travel an edge depends
+    on the forecast weather at the moment it is travelled, and an edge can't be taken if the node it
+    leads to is under a storm at the moment the vehicles would arrive there. Travel times are read
+    from time-bucketed cost tables (see graph.td_costs). The vehicles travel together, so the route
+    is timed for the slowest of them. The heuristic is the great-circle distance to the destination
+    at the top velocity of that vehicle, which never overestimates the remaining time.
+
+    Args:
+        state (object): The current state of the simulation. Its time (in hours) is the departure time.
+        start_point (object): The starting node containing the supplies to be delivered.
+        end_point (object): The destination node where supplies are needed.
+        terrain (object): The type of terrain for the delivery route.
+        weather (Weather): The current and forecast weather conditions.
+        blocked_routes (set): A set of blocked routes that vehicles cannot traverse.
+
+    Returns:
+        DeliveryPlan: The delivery, or a plan with a message if no path is found or no vehicle is available.
+    """
+    candidates = state.vehicles.available(start_point.position, terrain)
+    if not candidates:
+        return DeliveryPlan(start_point, end_point, None, message="There aren't any available vehicles.")
+
+    vehicle_type = min((v.type for v in candidates), key=lambda vehicle_type: vehicle_type.average_velocity)
+    layer = terrain_layer(state.graph, terrain, blocked_routes)
+    path, total_distance, total_time = cached_route(
+        ("td_a_star", vehicle_type, state.time),
+        lambda state, start_point, end_point, terrain, weather, blocked_routes: td_a_star_route(
+            state, start_point, end_point, vehicle_type, terrain, weather, blocked_routes
+        ),
+        layer.graph, state, start_point, end_point, terrain, weather, blocked_routes
+    )
+    if path is None:
+        return DeliveryPlan(start_point, end_point, None, message="No path found.")
+    return plan_delivery(state, start_point, end_point, path, total_distance, terrain, weather, total_time=total_time)
+
+def td_a_star_supply_delivery(state, start_point, end_point, terrain, weather, blocked_routes):
+    """
+    Plans a delivery with td_a_star_supply_plan and applies it to the state (see commit_plan).
+    """
+    return commit_plan(state, td_a_star_supply_plan(state, start_point, end_point, terrain, weather,
+                                                    blocked_routes))
@@ -0,0 +1,198 @@
+import heapq
+from itertools import count
+
+from algorithms.path_profile import CONDITIONS, PathProfile
+from graph.edge_costs import edge_cost_table
+from graph.layers import terrain_layer
+from weather import WeatherCondition
+
+def distances_to(layer, edge_costs, target):
+    """
+    Computes the cost of the cheapest route from every node to a target, with Dijkstra's algorithm
+    run backwards from the target.
+
+    Args:
+        layer (TerrainLayer): The layer searched.
+        edge_costs (EdgeCostTable): The weather-adjusted cost of each edge.
+        target (Position): The position of the last node.
+
+    Returns:
+        tuple: Position -> cost to the target, and position -> (next position, edge) towards the target.
+    """
+    nodes = layer.graph.nodes
+    distances = {target: 0}
+    next_hops = {target: None}
+    visited = set()
+    pq = [(0, target)]
+
+    while pq:
+        distance, position = heapq.heappop(pq)
+        if position in visited:
+            continue
+        visited.add(position)
+
+        node = nodes.get(position)
+        if node is None:
+            continue
+        for neighbor, edge in layer.neighbours(node):
+            # Edges are stored in pairs, so the edge from the neighbour to this node is edge ^ 1
+            forward_edge = edge ^ 1
+            edge_costs.prepare(neighbor)
+            if edge_costs.blocked[forward_edge]:
+                continue
+            new_distance = distance + edge_costs.costs[forward_edge]
+            if new_distance < distances.get(neighbor.position, float('inf')):
+                distances[neighbor.position] = new_distance
+                next_hops[neighbor.position] = (position, forward_edge)
+                heapq.heappush(pq, (new_distance, neighbor.position))
+
+    return distances, next_hops
+
+def tree_route(next_hops, source, removed_nodes, removed_edges):
+    """
+    Follows the shortest-path tree from a node to the target.
+
+    Returns:
+        tuple: The positions and edges of the route, or None if it uses a removed node or edge.
+    """
+    positions = [source]
+    edges = []
+    position = source
+    while next_hops[position] is not None:
+        position, edge = next_hops[position]
+        if position in removed_nodes or edge in removed_edges:
+            return None
+        positions.append(position)
+        edges.append(edge)
+    return positions, edges
+
+def spur_route(layer, edge_costs, distances, source, target, removed_nodes, removed_edges):
+    """
+    Finds the cheapest route from a node to the target avoiding some nodes and edges, with A*.
+
+    The costs to the target in the full graph never overestimate the costs once nodes and edges
+    are removed, so they are an exact-when-possible heuristic that keeps the search close to the
+    shortest-path tree.
+
+    Returns:
+        tuple: The positions and edges of the route and its cost, or (None, None, inf) if there is none.
+    """
+    nodes = layer.graph.nodes
+    costs = {source: 0}
+    parents = {source: None}
+    visited = set()
+    pq = [(distances.get(source, float('inf')), 0, source)]
+
+    while pq:
+        _, cost, position = heapq.heappop(pq)
+        if position in visited:
+            continue
+        visited.add(position)
+
+        if position == target:
+            positions, edges = [], []
+            while parents[position] is not None:
+                positions.append(position)
+                position, edge = parents[position]
+                edges.append(edge)
+            positions.append(source)
+            return positions[::-1], edges[::-1], cost
+
+        node = nodes.get(position)
+        if node is None:
+            continue
+        edge_costs.prepare(node)
+        for neighbor, edge in layer.neighbours(node):
+            if neighbor.position in removed_nodes or edge in removed_edges or edge_costs.blocked[edge]:
+                continue
+            # Nodes that can't reach the target in the full graph can't reach it with less of it
+            remaining = distances.get(neighbor.position)
+            if remaining is None:
+                continue
+            new_cost = cost + edge_costs.costs[edge]
+            if new_cost < costs.get(neighbor.position, float('inf')):
+                costs[neighbor.position] = new_cost
+                parents[neighbor.position] = (position, edge)
+                heapq.heappush(pq, (new_cost + remaining, new_cost, neighbor.position))
+
+    return None, None, float('inf')
+
+def route_time(graph, weather, vehicle_type, positions, edges):
+    """
+    Computes the time a vehicle type takes to travel a route, its velocity adjusted for the weather
+    at the start of each edge.
+    """
+    conditions = [CONDITIONS.index(weather.get_condition(position) or WeatherCondition.SUNNY)
+                  for position in positions[:-1]]
+    return PathProfile(positions, [graph.edge_length[edge] / 1000 for edge in edges], conditions).time(vehicle_type)
+
+def k_shortest_routes(graph, weather, terrain, blocked_routes, source, target, k=5, vehicle_type=None):
+    """
+    Finds the k cheapest loopless routes between two nodes with Yen's algorithm, as ready alternatives
+    for when a route closes.
+
+    The cheapest route to the target from every node is computed once, backwards from the target.
+    The first route follows that tree. Every later route branches off an earlier one at a spur node:
+    when the tree route from the spur node avoids the nodes and edges removed for it, it is taken as
+    is, otherwise an A* search guided by the tree costs finds the spur route.
+
+    Args:
+        graph (Graph or TiledGraph): The road network.
+        weather (Weather): Current weather conditions affecting the cost of edges.
+        terrain (int): The terrain (Transportation value) of the vehicles.
+        blocked_routes (set): A set of blocked routes that vehicles cannot use.
+        source (Position): The position of the first node.
+        target (Position): The position of the last node.
+        k (int, optional): The number of routes. Defaults to 5.
+        vehicle_type (VehicleType, optional): The vehicle type the routes are timed for. Defaults to none.
+
+    Returns:
+        list: Up to k (positions, cost in kilometres, time in hours) triples, cheapest first. The time
+              is None without a vehicle type.
+    """
+    layer = terrain_layer(graph, terrain, blocked_routes)
+    edge_costs = edge_cost_table(layer.graph, weather)
+    distances, next_hops = distances_to(layer, edge_costs, target)
+    if source not in distances:
+        return []
+
+    first_positions, first_edges = tree_route(next_hops, source, set(), set())
+    routes = [(first_positions, first_edges, distances[source])]
+    candidates = []
+    order = count()  # Breaks ties between candidates of the same cost
+    seen = {tuple(first_edges)}
+
+    while len(routes) < k:
+        positions, edges, _ = routes[-1]
+        root_cost = 0
+        for i in range(len(edges)):
+            spur = positions[i]
+            root_edges = edges[:i]
+            # The edges leaving the spur node along the routes found so far that share this root
+            removed_edges = {route_edges[i] for _, route_edges, _ in routes
+                             if len(route_edges) > i and route_edges[:i] == root_edges}
+            removed_nodes = set(positions[:i])
+
+            tree = tree_route(next_hops, spur, removed_nodes, removed_edges)
+            if tree is not None:
+                spur_positions, spur_edges = tree
+                spur_cost = distances[spur]
+            else:
+                spur_positions, spur_edges, spur_cost = spur_route(layer, edge_costs, distances, spur, target,
+                                                                   removed_nodes, removed_edges)
+            if spur_positions is not None:
+                candidate_edges = tuple(root_edges + spur_edges)
+                if candidate_edges not in seen:
+                    seen.add(candidate_edges)
+                    heapq.heappush(candidates, (root_cost + spur_cost, next(order), positions[:i] + spur_positions,
+                                                list(candidate_edges)))
+            root_cost += edge_costs.costs[edges[i]]
+
+        if not candidates:
+            break
+        cost, _, candidate_positions, candidate_edges = heapq.heappop(candidates)
+        routes.append((candidate_positions, candidate_edges, cost))
+
+    return [(positions, cost, None if vehicle_type is None else
+             route_time(layer.graph, weather, vehicle_type, positions, edges))
+            for positions, edges, cost in routes]
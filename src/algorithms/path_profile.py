@@ -0,0 +1,78 @@
+import numpy as np
+
+from algorithms.utils import edge_length
+from weather import WeatherCondition
+
+CONDITIONS = list(WeatherCondition)  # The weather class of each row of a profile
+
+class PathProfile:
+    """
+    Prefix sums of the distance along a path, split by the weather at the start of each segment.
+
+    A vehicle's velocity only depends on the weather of the segment it is on, so the time it takes
+    along any part of the path is the distance of that part under each condition divided by its
+    velocity under that condition: a few array reads, whatever the length of the path. The profile
+    is built once per path and times it for every vehicle type, as well as for the segments left
+    while the path is animated.
+
+    Attributes:
+        path (list): The positions of the path.
+        prefix (array): The distance in kilometres from the start of the path to each position, under
+                        each weather condition (conditions x positions).
+    """
+    def __init__(self, path, lengths, conditions):
+        """
+        Args:
+            path (list): The positions of the path.
+            lengths (list): The length of each segment, in kilometres.
+            conditions (list): The index in CONDITIONS of the weather at the start of each segment.
+        """
+        self.path = path
+        distances = np.zeros((len(CONDITIONS), len(path)))
+        distances[np.asarray(conditions, dtype=int), np.arange(1, len(path))] = lengths
+        self.prefix = np.cumsum(distances, axis=1)
+
+    def distances(self, start=0, end=None):
+        """
+        Returns the distance between two positions of the path under each weather condition.
+
+        Args:
+            start (int, optional): The index of the first position. Defaults to the start of the path.
+            end (int, optional): The index of the last position. Defaults to the end of the path.
+
+        Returns:
+            array: The distance in kilometres under each condition of CONDITIONS.
+        """
+        return self.prefix[:, len(self.path) - 1 if end is None else end] - self.prefix[:, start]
+
+    def distance(self, start=0, end=None):
+        return float(self.distances(start, end).sum())
+
+    def time(self, vehicle_type, start=0, end=None):
+        """
+        Returns the time a vehicle type takes between two positions of the path, in hours.
+        """
+        time = 0
+        for condition, distance in zip(CONDITIONS, self.distances(start, end)):
+            if distance > 0:
+                velocity = vehicle_type.adjust_velocity(condition)
+                time += distance / velocity if velocity > 0 else float('inf')
+        return time
+
+def path_profile(graph, weather, path):
+    """
+    Builds the profile of a path found by a search.
+
+    Args:
+        graph (Graph or TiledGraph): The graph the path was found in.
+        weather (Weather): The weather along the path.
+        path (list): The positions of the path.
+
+    Returns:
+        PathProfile: The profile of the path.
+    """
+    lengths = [edge_length(graph, start, end) for start, end in zip(path, path[1:])]
+    # Positions without a condition of their own are travelled at the average velocity, as under the sun
+    conditions = [CONDITIONS.index(weather.get_condition(position) or WeatherCondition.SUNNY)
+                  for position in path[:-1]]
+    return PathProfile(path, lengths, conditions)
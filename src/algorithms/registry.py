@@ -0,0 +1,44 @@
+import importlib
+
+# The delivery planning search of each algorithm, by name: (module, function, whether it takes a heuristic).
+# Modules are only imported when their search is first asked for.
+SEARCHES = {
+    "bfs": ("algorithms.uninformed.bfs", "bfs_supply_plan", False),
+    "dfs": ("algorithms.uninformed.dfs", "dfs_supply_plan", False),
+    "ids": ("algorithms.uninformed.iterative_deepening", "ids_supply_plan", False),
+    "ucs": ("algorithms.uninformed.uniform_cost", "ucs_supply_plan", False),
+    "a_star": ("algorithms.informed.a_star", "a_star_supply_plan", True),
+    "greedy": ("algorithms.informed.greedy", "greedy_supply_plan", True),
+    "td_a_star": ("algorithms.informed.time_dependent", "td_a_star_supply_plan", False),
+}
+
+def supply_plan(algorithm, heuristic=None):
+    """
+    Returns the delivery planning search of an algorithm, importing it on first use.
+
+    Args:
+        algorithm (str): The name of the algorithm, a key of SEARCHES.
+        heuristic (str, optional): The name of the heuristic (a function of algorithms.informed.heuristics),
+                                   for the algorithms that take one.
+
+    Returns:
+        function: Called with (state, start_point, end_point, terrain, weather, blocked_routes), returns a
+                  DeliveryPlan.
+
+    Raises:
+        ValueError: If the algorithm or heuristic is unknown.
+    """
+    if algorithm not in SEARCHES:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    module, function, takes_heuristic = SEARCHES[algorithm]
+    search = getattr(importlib.import_module(module), function)
+    if not takes_heuristic:
+        return search
+
+    heuristics = importlib.import_module("algorithms.informed.heuristics")
+    heuristic_function = getattr(heuristics, heuristic or "", None)
+    if heuristic_function is None or not heuristic.endswith("_heuristic"):
+        raise ValueError(f"Unknown heuristic: {heuristic}")
+    return lambda state, start, end, terrain, weather, blocked_routes: search(
+        state, start, end, heuristic_function, terrain, weather, blocked_routes
+    )
@@ -0,0 +1,280 @@
+"""
+Monte Carlo evaluation of how robust a delivery route is to changes of the weather and of the closed
+routes.
+
+Each sample shifts the weather of every node one step towards or away from a storm with some
+probability, and closes every road with some probability. The route is re-costed in all the samples
+of a chunk at once with array arithmetic; the samples where it is blocked are re-routed with a search
+in the sampled conditions, or count as failures when no route is left. Chunks of samples are spread
+over a pool of processes forked after the evaluation is set up, so they share the pages of the graph
+instead of each loading or unpickling a copy.
+
+Run from the root of the repository with bin/robustness.
+"""
+
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from algorithms.path_profile import path_profile
+from algorithms.shortest_path import shortest_route
+from algorithms.utils import edge_length
+from graph.graph import Graph
+from graph.layers import terrain_layer
+from weather import Weather, WeatherCondition
+
+CONDITIONS = list(WeatherCondition)  # Weather conditions by value, from the mildest to a storm
+STORM = WeatherCondition.STORM.value
+CHUNK_SIZE = 64  # Samples evaluated by a task of the pool
+
+evaluation = None  # The evaluation run by the processes of the pool, set before they are forked
+
+class RouteEvaluation:
+    """
+    A route and the conditions its samples are drawn around.
+
+    Attributes:
+        graph (Graph): The road network.
+        weather (Weather): The current weather.
+        terrain (int): The terrain (Transportation value) of the vehicles.
+        blocked_routes (set): The routes closed now, as "id1,id2" strings.
+        path (list): The positions of the route.
+        vehicle_type (VehicleType): The vehicle type the route is timed for.
+        shift_probability (float): The probability that the weather of a node shifts by one step.
+        closure_probability (float): The probability that a road closes.
+        reroute (bool): Whether blocked samples are re-routed or count as failures.
+        positions (list): The position of each node of the layer, by node index.
+        base (array): The current condition of each node, by node index.
+        path_nodes (array): The node index of each position of the route.
+        path_roads (array): The road (edge id // 2) of each edge of the route.
+        path_lengths (array): The length of each edge of the route, in kilometres.
+        velocities (array): The velocity of the vehicle type under each condition.
+        roads (list): The "id1,id2" route string of each road, by edge id // 2.
+        sample_weather (Weather): A copy of the weather the samples are applied to when re-routing.
+        sample_costs (EdgeCostTable): The cost table of the sampled weather, refreshed with the nodes
+                                      each sample changes.
+    """
+    def __init__(self, graph, weather, terrain, blocked_routes, path, vehicle_type,
+                 shift_probability, closure_probability, reroute):
+        if not isinstance(graph, Graph):
+            raise ValueError("Only graphs held in memory can be sampled")
+        self.graph = graph
+        self.weather = weather
+        self.terrain = terrain
+        self.blocked_routes = set(blocked_routes)
+        self.path = path
+        self.vehicle_type = vehicle_type
+        self.shift_probability = shift_probability
+        self.closure_probability = closure_probability
+        self.reroute = reroute
+
+        layer = terrain_layer(graph, terrain, self.blocked_routes)
+        nodes = list(layer.graph.nodes.values())
+        index_of = {node.position: index for index, node in enumerate(nodes)}
+        self.positions = [node.position for node in nodes]
+        # Positions without a condition of their own cost the same as under the sun
+        self.base = np.array([(weather.get_condition(position) or WeatherCondition.SUNNY).value
+                              for position in self.positions], dtype=np.int8)
+
+        self.roads = [None] * (layer.graph.edge_count // 2)
+        for node in nodes:
+            for (neighbour, _), edge in zip(node.neighbours, node.edge_ids):
+                if edge % 2 == 0:
+                    self.roads[edge // 2] = f'{node.id},{neighbour.id}'
+
+        self.path_nodes = np.array([index_of[position] for position in path], dtype=np.int64)
+        roads = []
+        for start, end in zip(path, path[1:]):
+            node = layer.graph.nodes[start]
+            roads.append(next(edge // 2 for (neighbour, _), edge in zip(node.neighbours, node.edge_ids)
+                              if neighbour.position == end))
+        self.path_roads = np.array(roads, dtype=np.int64)
+        self.path_lengths = np.array([edge_length(layer.graph, start, end) for start, end in zip(path, path[1:])])
+        self.velocities = np.array([vehicle_type.adjust_velocity(condition) for condition in CONDITIONS])
+        self.sample_weather = None
+        self.sample_costs = None
+
+    def sample(self, rng, samples):
+        """
+        Draws the conditions of a chunk of samples.
+
+        Returns:
+            tuple: The condition of each node (samples x nodes) and whether each road is closed
+                   (samples x roads).
+        """
+        nodes = len(self.base)
+        shifts = rng.choice(np.array([-1, 1], dtype=np.int8), size=(samples, nodes))
+        shifts *= rng.random((samples, nodes)) < self.shift_probability
+        conditions = np.clip(self.base + shifts, 0, STORM)
+        closed = rng.random((samples, len(self.roads))) < self.closure_probability
+        return conditions, closed
+
+    def recost(self, conditions, closed):
+        """
+        Times the route in every sample of a chunk at once.
+
+        The velocity along an edge depends on the weather at its start, and an edge leading into a
+        storm or along a closed road is blocked, as in the searches.
+
+        Returns:
+            tuple: The time of the route in hours, and whether it is blocked, for each sample.
+        """
+        path_conditions = conditions[:, self.path_nodes]
+        velocities = self.velocities[path_conditions[:, :-1]]
+        with np.errstate(divide='ignore'):
+            times = (self.path_lengths / velocities).sum(axis=1)
+        blocked = (path_conditions[:, 1:] == STORM).any(axis=1) | closed[:, self.path_roads].any(axis=1)
+        return times, blocked
+
+    def reroute_sample(self, conditions, closed):
+        """
+        Searches the cheapest route in the conditions of a sample and times it.
+
+        Returns:
+            float: The time of the new route in hours, or inf if there is none.
+        """
+        weather = self.sample_weather
+        changed = np.flatnonzero(conditions != self.base)
+        originals = [(self.positions[index], weather.get_condition(self.positions[index])) for index in changed]
+        for index in changed:
+            weather.set_condition(self.positions[index], CONDITIONS[conditions[index]])
+        blocked_routes = self.blocked_routes | {self.roads[road] for road in np.flatnonzero(closed)}
+        try:
+            path, _ = shortest_route(self.graph, weather, self.terrain, blocked_routes, self.path[0], self.path[-1])
+            if path is None:
+                return float('inf')
+            graph = terrain_layer(self.graph, self.terrain, blocked_routes).graph
+            return path_profile(graph, weather, path).time(self.vehicle_type)
+        finally:
+            for position, condition in originals:
+                weather.set_condition(position, condition)
+
+    def run(self, seed, samples):
+        """
+        Evaluates a chunk of samples.
+
+        Args:
+            seed (SeedSequence): The seed of the chunk's random numbers.
+            samples (int): The number of samples.
+
+        Returns:
+            tuple: The delivery time of each sample in hours (inf for failures), and whether it was re-routed.
+        """
+        conditions, closed = self.sample(np.random.default_rng(seed), samples)
+        times, blocked = self.recost(conditions, closed)
+        rerouted = blocked.copy()
+        if not self.reroute or not blocked.any():
+            times[blocked] = float('inf')
+            return times, rerouted
+
+        layer = terrain_layer(self.graph, self.terrain, self.blocked_routes)
+        cost_table = layer.graph.cost_table
+        if self.sample_weather is None:
+            self.sample_weather = Weather(self.weather.default)
+            self.sample_weather.conditions = dict(self.weather.conditions)
+        # The searches use the graph's cost table, so the sampled weather's is swapped in for them
+        layer.graph.cost_table = self.sample_costs
+        try:
+            for sample in np.flatnonzero(blocked):
+                times[sample] = self.reroute_sample(conditions[sample], closed[sample])
+        finally:
+            self.sample_costs = layer.graph.cost_table
+            layer.graph.cost_table = cost_table
+            # Reopens on the layer the routes closed by the samples
+            terrain_layer(self.graph, self.terrain, self.blocked_routes)
+        return times, rerouted
+
+def run_chunk(seed, samples):
+    return evaluation.run(seed, samples)
+
+def evaluate_route(graph, weather, terrain, blocked_routes, path, vehicle_type, samples=1000,
+                   shift_probability=0.1, closure_probability=0.01, reroute=True, workers=None, seed=0):
+    """
+    Estimates the distribution of the delivery time along a route, and the probability that the
+    delivery fails, when the weather and the closed routes change.
+
+    Args:
+        graph (Graph): The road network.
+        weather (Weather): The current weather.
+        terrain (int): The terrain (Transportation value) of the vehicles.
+        blocked_routes (set): The routes closed now, as "id1,id2" strings.
+        path (list): The positions of the route, as found by a search.
+        vehicle_type (VehicleType): The vehicle type the route is timed for (e.g. the slowest of the plan).
+        samples (int, optional): The number of samples. Defaults to 1000.
+        shift_probability (float, optional): The probability that the weather of a node shifts one step
+                                             towards or away from a storm. Defaults to 0.1.
+        closure_probability (float, optional): The probability that a road closes. Defaults to 0.01.
+        reroute (bool, optional): Whether samples where the route is blocked are re-routed, or count as
+                                  failures. Defaults to True.
+        workers (int, optional): The number of processes. Defaults to one per CPU; 1 runs in this process.
+        seed (int, optional): The seed of the samples. Defaults to 0.
+
+    Returns:
+        dict: The number of samples, the failure and re-route probabilities, and the mean and
+              percentiles of the delivery time in hours of the samples that didn't fail.
+    """
+    global evaluation
+    evaluation = RouteEvaluation(graph, weather, terrain, blocked_routes, path, vehicle_type,
+                                 shift_probability, closure_probability, reroute)
+    sizes = [min(CHUNK_SIZE, samples - start) for start in range(0, samples, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = workers or os.cpu_count()
+
+    if workers == 1 or len(sizes) == 1:
+        results = [evaluation.run(chunk_seed, size) for chunk_seed, size in zip(seeds, sizes)]
+    else:
+        # Forked after the evaluation is set up, so the processes share it with this one
+        with ProcessPoolExecutor(min(workers, len(sizes)), mp_context=multiprocessing.get_context("fork")) as pool:
+            results = list(pool.map(run_chunk, seeds, sizes))
+
+    times = np.concatenate([chunk_times for chunk_times, _ in results])
+    rerouted = np.concatenate([chunk_rerouted for _, chunk_rerouted in results])
+    delivered = times[np.isfinite(times)]
+    report = {
+        "samples": samples,
+        "failure_probability": 1 - len(delivered) / samples,
+        "reroute_probability": float(rerouted.mean()),
+    }
+    if len(delivered):
+        report["mean_time"] = float(delivered.mean())
+        for percentile in (50, 90, 99):
+            report[f"p{percentile}_time"] = float(np.percentile(delivered, percentile))
+    return report
+
+def main():
+    from algorithms.depots import nearest_depot
+    from load_dataset import load_dataset
+
+    parser = argparse.ArgumentParser(description="Evaluates how robust the cheapest route to an end point is "
+                                                 "to changes of the weather and closed routes.")
+    parser.add_argument("dataset", help="Path to the dataset")
+    parser.add_argument("--end-point", type=int, default=0)
+    parser.add_argument("--terrain", type=int, default=0)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--shift-probability", type=float, default=0.1)
+    parser.add_argument("--closure-probability", type=float, default=0.01)
+    parser.add_argument("--no-reroute", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    state = load_dataset(args.dataset)
+    end_point = state.end_points[args.end_point]
+    start_point = nearest_depot(state, end_point, args.terrain, set())
+    path, _ = shortest_route(state.graph, state.weather, args.terrain, set(), start_point.position, end_point.position)
+    vehicle_type = min((v.type for v in state.vehicles if v.type.can_access_terrain(args.terrain)),
+                       key=lambda vehicle_type: vehicle_type.average_velocity, default=None)
+    if path is None or vehicle_type is None:
+        print("No route to evaluate.")
+        return
+    report = evaluate_route(state.graph, state.weather, args.terrain, set(), path, vehicle_type, args.samples,
+                            args.shift_probability, args.closure_probability, not args.no_reroute,
+                            args.workers, args.seed)
+    for name, value in report.items():
+        print(f"{name}: {value:g}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+from array import array
+from collections import OrderedDict
+from algorithms import trace
+from graph.layers import routes_key
+from metrics import ROUTE_CACHE_LOOKUPS
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024  # Estimated memory the cached routes of a graph may take
+ENTRY_BYTES = 400  # Rough footprint of an entry besides its node ids (key, tuple, dictionary slot)
+POSITION_BYTES = 200  # Rough footprint of an entry of the node id -> position table
+
+class RouteCache:
+    """
+    A least-recently-used cache of search results, in front of the delivery searches.
+
+    Only the route found by a search is cached, never the delivery planned along it, so a cache hit
+    doesn't touch any vehicle or supply. Keys include the version of the weather (and of its forecast)
+    and of the closed routes, so any change to them makes the routes found before it unreachable;
+    those entries are then evicted in least-recently-used order. Routes are stored as arrays of node
+    ids, and each node's position is stored once for all the routes going through it.
+
+    Attributes:
+        weather (Weather): The weather the cached routes were found under.
+        max_bytes (int): The estimated memory the entries may take before the oldest are evicted.
+        entries (OrderedDict): (node ids, cost, extra) of each route, from least to most recently used.
+        positions (dict): The position of each node id found in a cached route.
+        used_bytes (int): The estimated memory of the entries.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to search.
+        evictions (int): The number of entries evicted so far.
+    """
+    def __init__(self, weather, max_bytes=DEFAULT_MAX_BYTES):
+        self.weather = weather
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.positions = {}
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate, "entries": len(self.entries),
+                "evictions": self.evictions, "used_bytes": self.used_bytes + POSITION_BYTES * len(self.positions)}
+
+    def get(self, key):
+        """
+        Looks a route up.
+
+        Returns:
+            tuple: A new list with the positions of the route (None if the search found none), its cost
+                   and the extra value stored with it, or None if the route isn't cached.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            ROUTE_CACHE_LOOKUPS.inc(labels=("miss",))
+            return None
+        self.hits += 1
+        ROUTE_CACHE_LOOKUPS.inc(labels=("hit",))
+        self.entries.move_to_end(key)
+        ids, cost, extra = entry
+        return (None if ids is None else [self.positions[id] for id in ids]), cost, extra
+
+    def put(self, key, path, cost, extra=None, graph=None):
+        """
+        Stores a route, evicting the least recently used ones if over budget.
+
+        Args:
+            key (tuple): The key of the search.
+            path (list): The positions of the route, or None if the search found none.
+            cost (float): The cost of the route.
+            extra (optional): Any other immutable result of the search.
+            graph (Graph or TiledGraph): The graph the route goes through, to map positions to node ids.
+        """
+        ids = None
+        if path is not None:
+            ids = array('l')
+            for position in path:
+                node = graph.nodes[position]
+                self.positions.setdefault(node.id, position)
+                ids.append(node.id)
+        size = ENTRY_BYTES + (ids.itemsize * len(ids) if ids is not None else 0)
+
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.used_bytes -= ENTRY_BYTES + (previous[0].itemsize * len(previous[0]) if previous[0] is not None else 0)
+        self.entries[key] = (ids, cost, extra)
+        self.used_bytes += size
+        while self.entries and self.used_bytes > self.max_bytes:
+            _, (evicted_ids, _, _) = self.entries.popitem(last=False)
+            self.used_bytes -= ENTRY_BYTES + (evicted_ids.itemsize * len(evicted_ids) if evicted_ids is not None else 0)
+            self.evictions += 1
+
+def route_cache(graph, weather):
+    """
+    Returns the route cache of a graph, starting a new one if the weather object was replaced.
+    """
+    cache = graph.route_cache
+    if cache is None or cache.weather is not weather:
+        cache = graph.route_cache = RouteCache(weather)
+    return cache
+
+def with_extra(result):
+    return result if len(result) == 3 else (result[0], result[1], None)
+
+def cached_route(name, search, graph, state, start_point, end_point, terrain, weather, blocked_routes):
+    """
+    Runs a search through the route cache of the graph.
+
+    Args:
+        name (tuple): Identifies the search and every parameter it depends on besides the ones below,
+                      or None if its result can't be cached (e.g. it depends on the vehicles).
+        search (function): Called with (state, start_point, end_point, terrain, weather, blocked_routes) on
+                           a cache miss. Returns (path, cost) or (path, cost, extra), path None when no route.
+        graph (Graph or TiledGraph): The graph the search goes through.
+
+    Returns:
+        tuple: The path as a list of positions (None if there is no route), its cost and the extra value.
+    """
+    # A traced search is run even when its route is cached, so that its trace is recorded
+    if name is None or trace.recorder is not None:
+        return with_extra(search(state, start_point, end_point, terrain, weather, blocked_routes))
+    cache = route_cache(graph, weather)
+    key = name + (start_point.position, end_point.position, terrain, weather.version, weather.forecast_version,
+                  routes_key(blocked_routes))
+    result = cache.get(key)
+    if result is None:
+        result = with_extra(search(state, start_point, end_point, terrain, weather, blocked_routes))
+        cache.put(key, *result, graph=graph)
+    return result
@@ -0,0 +1,141 @@
+import heapq
+
+from algorithms import heap
+from algorithms.utils import trace_path
+from graph.contraction import contracted_search
+from graph.edge_costs import edge_cost_table
+from graph.layers import terrain_layer
+from graph.partition import overlay
+
+def shortest_route(graph, weather, terrain, blocked_routes, source, target):
+    """
+    Finds the cheapest route between two nodes with Dijkstra's algorithm, without planning any delivery.
+
+    It searches the same terrain layer, weather-adjusted edge costs and heap frontier as the
+    delivery searches.
+
+    Args:
+        graph (Graph or TiledGraph): The road network.
+        weather (Weather): Current weather conditions affecting the cost of edges.
+        terrain (int): The terrain (Transportation value) of the vehicles.
+        blocked_routes (set): A set of blocked routes that vehicles cannot use.
+        source (Position): The position of the first node.
+        target (Position): The position of the last node.
+
+    Returns:
+        tuple: The route as a list of positions and its cost in kilometres, or (None, inf) if there is no route.
+    """
+    # Between kept nodes, the search goes through the contracted road network if it was enabled
+    contracted = contracted_search(graph, terrain, weather, blocked_routes, source, target)
+    if contracted is not None:
+        layer, edge_costs = contracted
+    else:
+        layer = terrain_layer(graph, terrain, blocked_routes)
+        edge_costs = edge_cost_table(layer.graph, weather)
+    if source == target:
+        return [source], 0
+    start = layer.graph.nodes.get(source)
+    if start is None:
+        return None, float('inf')
+
+    frontier = heap.frontier_type()
+    frontier.push(start.id, 0)
+    reached = {start.id: start}
+    parents = {start.id: None}
+    visited = set()
+
+    while frontier:
+        node_id, cost = frontier.pop()
+        visited.add(node_id)
+        node = reached[node_id]
+        if node.position == target:
+            path = trace_path(reached, parents, node_id)
+            if contracted is not None:
+                path = layer.graph.expand_path(path)
+            return path, cost
+
+        edge_costs.prepare(node)
+        for neighbor, edge in layer.neighbours(node):
+            if neighbor.id not in visited and not edge_costs.blocked[edge]:
+                if frontier.push(neighbor.id, cost + edge_costs.costs[edge]):
+                    reached[neighbor.id] = neighbor
+                    parents[neighbor.id] = node_id
+
+    return None, float('inf')
+
+def hierarchical_route(graph, weather, terrain, blocked_routes, source, target):
+    """
+    Finds the cheapest route between two nodes over the routing overlay of the graph (see graph.partition).
+
+    Dijkstra's algorithm searches the original edges inside the cells of the source and target. In any
+    other cell it only visits boundary nodes, crossing the cell along its precomputed clique, so most
+    nodes of the graph are never touched. Clique arcs of the route found are expanded back to the
+    nodes they go through by a search inside their cell.
+
+    Args:
+        graph (Graph): The road network.
+        weather (Weather): Current weather conditions affecting the cost of edges.
+        terrain (int): The terrain (Transportation value) of the vehicles.
+        blocked_routes (set): A set of blocked routes that vehicles cannot use.
+        source (Position): The position of the first node.
+        target (Position): The position of the last node.
+
+    Returns:
+        tuple: The route as a list of positions and its cost in kilometres, or (None, inf) if there is no route.
+    """
+    routing, edge_costs = overlay(graph, terrain, weather, blocked_routes)
+    layer = routing.layer
+    nodes = routing.nodes
+    cell_of = routing.cell_of
+    source_node = layer.graph.nodes.get(source)
+    target_node = layer.graph.nodes.get(target)
+    if source_node is None or target_node is None:
+        return None, float('inf')
+    source_id, target_id = source_node.id, target_node.id
+    searched_cells = {cell_of[source_id], cell_of[target_id]}
+
+    costs = {source_id: 0}
+    parents = {source_id: None}  # Previous node id, and the cell crossed along its clique (None for an edge)
+    visited = set()
+    pq = [(0, source_id)]
+
+    while pq:
+        cost, node_id = heapq.heappop(pq)
+        if node_id in visited:
+            continue
+        visited.add(node_id)
+        if node_id == target_id:
+            break
+
+        cell = cell_of[node_id]
+        if cell in searched_cells:
+            arcs = [(neighbor.id, edge_costs.costs[edge], None)
+                    for neighbor, edge in layer.neighbours(nodes[node_id]) if not edge_costs.blocked[edge]]
+        else:
+            arcs = [(other, clique_cost, cell) for other, clique_cost in routing.cliques[cell].get(node_id, ())]
+            arcs.extend((neighbor.id, edge_costs.costs[edge], None)
+                        for neighbor, edge in layer.neighbours(nodes[node_id])
+                        if cell_of[neighbor.id] != cell and not edge_costs.blocked[edge])
+        for neighbor_id, arc_cost, crossed_cell in arcs:
+            new_cost = cost + arc_cost
+            if new_cost < costs.get(neighbor_id, float('inf')):
+                costs[neighbor_id] = new_cost
+                parents[neighbor_id] = (node_id, crossed_cell)
+                heapq.heappush(pq, (new_cost, neighbor_id))
+    else:
+        return None, float('inf')
+
+    route = [target_id]
+    node_id = target_id
+    while parents[node_id] is not None:
+        previous, crossed_cell = parents[node_id]
+        if crossed_cell is not None:
+            # Expand the clique arc into the nodes it goes through inside the cell
+            _, cell_parents, _ = routing.cell_routes(edge_costs, crossed_cell, previous, {node_id})
+            inner = cell_parents[node_id]
+            while inner != previous:
+                route.append(inner)
+                inner = cell_parents[inner]
+        route.append(previous)
+        node_id = previous
+    return [nodes[node_id].position for node_id in reversed(route)], costs[target_id]
@@ -6,8 +6,9 @@ def split_supplies_per_vehicle(vehicles, supplies):
     """
     Distributes supplies among vehicles based on each vehicle's weight and volume capacity.
 
-    For each supply, the function checks if the vehicle can carry the supply's weight and volume.
-    If it can, the supply is assigned to that vehicle.
+    For each supply, the function checks if the vehicle can carry the supply's weight and volume
+    on top of its current load and of the supplies already assigned to it. If it can, the supply is
+    assigned to that vehicle. The vehicles themselves are left unchanged.
 
     Args:
         vehicles (list): List of available vehicles.
@@ -18,22 +19,24 @@ def split_supplies_per_vehicle(vehicles, supplies):
     """
     supply_type_data = defaultdict(lambda: None)
     supplies_per_vehicle = [[] for _ in range(len(vehicles))]
-    
+    weights = [vehicle.current_weight for vehicle in vehicles]
+    volumes = [vehicle.current_volume for vehicle in vehicles]
+
     for supply in supplies:
         if supply.type not in supply_type_data:
             supply_type_data[supply.type] = sp.get_weight_volume_per_supply(supply.type)
-        
+
         supply_weight, supply_volume = supply_type_data[supply.type]
         total_supply_weight = supply_weight * supply.quantity
         total_supply_volume = supply_volume * supply.quantity
-        
+
         for i, vehicle in enumerate(vehicles):
-            if (vehicle.current_weight + total_supply_weight <= vehicle.type.weight_capacity and
-                vehicle.current_volume + total_supply_volume <= vehicle.type.volume_capacity):
-                
-                vehicle.current_weight += total_supply_weight
-                vehicle.current_volume += total_supply_volume
+            if (weights[i] + total_supply_weight <= vehicle.type.weight_capacity and
+                volumes[i] + total_supply_volume <= vehicle.type.volume_capacity):
+
+                weights[i] += total_supply_weight
+                volumes[i] += total_supply_volume
                 supplies_per_vehicle[i].append(supply)
-                break 
+                break
 
     return supplies_per_vehicle
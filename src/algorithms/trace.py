@@ -0,0 +1,153 @@
+"""
+Opt-in recording of the nodes the searches expand and add to their frontier.
+
+A search reads the module's recorder once when it starts: without one, it records nothing and
+pays for nothing else. With one (see start_trace), each expansion and each node added to or
+lowered in the frontier is packed as a fixed-size binary record into a preallocated ring buffer,
+so recording never allocates and a long search keeps its most recent records. A recorder given
+a file writes the buffer to it every time it fills up instead, keeping the whole trace.
+"""
+
+import struct
+
+EXPAND = 0  # A node taken from the frontier and expanded
+FRONTIER = 1  # A node added to the frontier, or whose priority in it was lowered
+RECORD = struct.Struct("<IIBff")  # step, node id, kind, g (cost so far), h (heuristic)
+MAGIC = b"TRC1"  # First bytes of a trace file
+SIZE = RECORD.size
+pack_into = RECORD.pack_into
+
+recorder = None  # The TraceRecorder the searches record to, None when not tracing
+
+class TraceRecorder:
+    """
+    A ring buffer of search trace records.
+
+    Attributes:
+        capacity (int): The number of records the buffer holds.
+        buffer (bytearray): The packed records.
+        count (int): The number of records written so far.
+        step (int): The number of nodes expanded so far. Frontier records carry the step of the expansion
+                    that reached them.
+        graph (Graph): The graph of the last search recorded, whose node ids the records refer to.
+        file (file): The binary file full buffers are written to, None to keep the latest records only.
+        last_slot (int): The index of the last record of the buffer.
+    """
+    def __init__(self, capacity=1 << 16, file=None):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * RECORD.size)
+        self.count = 0
+        self.step = 0
+        self.graph = None
+        self.file = file
+        self.last_slot = capacity - 1
+        if file is not None:
+            file.write(MAGIC)
+
+    def __len__(self):
+        return self.count if self.file is not None else min(self.count, self.capacity)
+
+    def begin(self, graph):
+        """
+        Notes the graph a search is about to go through.
+        """
+        self.graph = graph
+
+    def expand(self, node_id, g, h=0):
+        self.step += 1
+        count = self.count
+        slot = count % self.capacity
+        pack_into(self.buffer, slot * SIZE, self.step, node_id, EXPAND, g, h)
+        self.count = count + 1
+        if slot == self.last_slot and self.file is not None:
+            self.file.write(self.buffer)
+
+    def frontier(self, node_id, g, h=0):
+        # The same as expand, without the step; the search loops call these for every node they touch
+        count = self.count
+        slot = count % self.capacity
+        pack_into(self.buffer, slot * SIZE, self.step, node_id, FRONTIER, g, h)
+        self.count = count + 1
+        if slot == self.last_slot and self.file is not None:
+            self.file.write(self.buffer)
+
+    def dropped(self):
+        """
+        Returns the number of records overwritten since the buffer last filled up.
+        """
+        return 0 if self.file is not None else max(self.count - self.capacity, 0)
+
+    def records(self):
+        """
+        Returns the records in the buffer, oldest first. With a file, those not written to it yet.
+
+        Returns:
+            list: (step, node id, kind, g, h) tuples.
+        """
+        size = RECORD.size
+        if self.file is not None:
+            data = self.buffer[:self.count % self.capacity * size]
+        elif self.count <= self.capacity:
+            data = self.buffer[:self.count * size]
+        else:
+            oldest = self.count % self.capacity * size
+            data = self.buffer[oldest:] + self.buffer[:oldest]
+        return list(RECORD.iter_unpack(data))
+
+    def save(self, path):
+        """
+        Writes the records in the buffer to a trace file (see load_trace).
+        """
+        with open(path, "wb") as file:
+            file.write(MAGIC)
+            for record in self.records():
+                file.write(RECORD.pack(*record))
+
+    def close(self):
+        """
+        Writes the records not yet written to the file of the recorder.
+        """
+        if self.file is not None:
+            filled = self.count % self.capacity
+            self.file.write(memoryview(self.buffer)[:filled * RECORD.size])
+            self.file.flush()
+
+def start_trace(trace_recorder=None):
+    """
+    Makes the searches record their trace.
+
+    Args:
+        trace_recorder (TraceRecorder, optional): The recorder. Defaults to a new ring buffer.
+
+    Returns:
+        TraceRecorder: The recorder.
+    """
+    global recorder
+    recorder = trace_recorder if trace_recorder is not None else TraceRecorder()
+    return recorder
+
+def stop_trace():
+    """
+    Stops recording, writing what is left to the file of the recorder if it has one.
+
+    Returns:
+        TraceRecorder: The recorder that was recording, or None.
+    """
+    global recorder
+    trace_recorder, recorder = recorder, None
+    if trace_recorder is not None:
+        trace_recorder.close()
+    return trace_recorder
+
+def load_trace(path):
+    """
+    Reads a trace file written by a recorder.
+
+    Returns:
+        list: (step, node id, kind, g, h) tuples, oldest first.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} isn't a search trace")
+        data = file.read()
+    return list(RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]))
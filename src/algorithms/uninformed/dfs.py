@@ -1,115 +1,84 @@
-from collections import deque
-from supply import SupplyType, Supply
-from vehicle import VehicleStatus
-from algorithms.supplies_per_vehicles import split_supplies_per_vehicle
-from algorithms.utils import manhattan_distance
-from weather import WeatherCondition
-
-def dfs_supply_delivery(state, start_point, end_point, terrain, weather, blocked_routes):
-    """
-    Implements a Depth-First Search (DFS) approach for supply delivery.
-
-    Args:
-        state (object): The current simulation state, including vehicles and graph information.
-        start_point (object): The starting node representing the origin of supplies.
-        end_point (object): The end node representing the delivery destination.
-        terrain (object): Terrain information to determine vehicle accessibility.
-        weather (object): Weather conditions impacting traversal.
-        blocked_routes (set): A set of blocked routes that vehicles cannot use.
-
-    Returns:
-        tuple: Contains the delivery path, total distance, total time, 
-               and a mapping of vehicle IDs to their assigned supplies, 
-               or an error message if no path is found.
-    """
-    # Check needed supplies
-    needed_supplies = end_point.supplies_needed
-    available_supplies = start_point.supplies
-
-    # Separate the available and required supplies
-    supplies_to_send = []
-    supplies_consumed = {supply_type: 0 for supply_type in SupplyType}
-    for needed_type, needed_quantity in needed_supplies.items():
-        total_available = sum(s.quantity for s in available_supplies if s.type == SupplyType[needed_type])
-        if total_available >= needed_quantity:
-            supplies_to_send.append(Supply(needed_quantity, SupplyType[needed_type]))
-            supplies_consumed[SupplyType[needed_type]] = needed_quantity
-        else:
-            supplies_to_send.append(Supply(total_available, SupplyType[needed_type]))
-            supplies_consumed[SupplyType[needed_type]] = total_available
-
-    # DFS
-    visited = set()
-    stack = [(start_point.position, [], 0)]
-
-    while stack:
-        current_position, path, total_distance = stack.pop()
-
-        if current_position in visited:
-            continue
-
-        visited.add(current_position)
-
-        if current_position == end_point.position:
-            # Split supplies per vehicle
-            vehicles = [v for v in state.vehicles
-                        if v.position == start_point.position and v.vehicle_status == VehicleStatus.IDLE
-                        and v.current_fuel >= total_distance and v.type.can_access_terrain(terrain)]
-            supplies_per_vehicle = split_supplies_per_vehicle(vehicles, supplies_to_send)
-
-            total_time = 0
-            for vehicle, supplies in zip(vehicles, supplies_per_vehicle):
-                if supplies:
-                    vehicle.position = end_point.position
-                    vehicle.vehicle_status = VehicleStatus.BUSY
-                    vehicle.current_fuel -= total_distance
-
-                    for i in range(len(path) - 1):
-                        start_pos = path[i]
-                        end_pos = path[i + 1]
-                        
-                        weather_condition = weather.get_condition(start_pos)
-                        velocity = vehicle.type.adjust_velocity(weather_condition)
-                        distance = manhattan_distance(start_pos, end_pos)
-                        
-                        time_for_vehicle = distance / velocity if velocity > 0 else float('inf')
-                        
-                        total_time += time_for_vehicle
-
-            if supplies_per_vehicle:
-                for supply_type, quantity_used in supplies_consumed.items():
-                    if quantity_used > 0:
-                        for supply in available_supplies:
-                            if supply.type == supply_type:
-                                if supply.quantity >= quantity_used:
-                                    supply.quantity -= quantity_used
-                                    end_point.satisfy_supplies([Supply(quantity_used, supply_type)])
-                                    break
-                                else:
-                                    quantity_used -= supply.quantity
-                                    end_point.satisfy_supplies([Supply(supply.quantity, supply_type)])
-                                    supply.quantity = 0
-            else:
-                return None, 0, 0, print("There aren't any available vehicles.")
-
-            return ([start_point.position] + path, total_distance, total_time,
-                {vehicle.id: [s.type.name for s in supplies] for vehicle, supplies in zip(vehicles, supplies_per_vehicle)})
-
-        current_node = state.graph.nodes.get(current_position)
-        if current_node:
-            for neighbor, is_open in reversed(current_node.neighbours):
-                route1, route2 = f'{current_node.id},{neighbor.id}', f'{neighbor.id},{current_node.id}'
-                if is_open and neighbor.position not in visited and neighbor.can_access_terrain(terrain, weather) and route1 not in blocked_routes and route2 not in blocked_routes:
-                    weather_condition = weather.get_condition(neighbor.position)
-                    distance = manhattan_distance(current_position, neighbor.position)
-
-                    # We adjust the distance based on the weather conditions
-                    if weather_condition == WeatherCondition.SNOWY:
-                        distance *= 1.25
-                    elif weather_condition == WeatherCondition.RAINY:
-                        distance *= 1.1
-
-                    new_distance = total_distance + distance
-                    stack.append((neighbor.position, path + [neighbor.position], new_distance))
-
-    return None, 0, 0, "No path found."
+import time
+
+from algorithms import trace
+from algorithms.delivery import DeliveryPlan, commit_plan, plan_delivery
+from algorithms.route_cache import cached_route
+from graph.edge_costs import edge_cost_table
+from graph.layers import terrain_layer
+from metrics import record_search
+
+def dfs_route(state, start_point, end_point, terrain, weather, blocked_routes):
+    """
+    Finds a path from the start point to the end point with a Depth-First Search (DFS).
+
+    Returns:
+        tuple: The path as a list of positions and its cost, or (None, 0) if no path is found.
+    """
+    layer = terrain_layer(state.graph, terrain, blocked_routes)
+    edge_costs = edge_cost_table(layer.graph, weather)
+    tracer = trace.recorder
+    if tracer is not None:
+        tracer.begin(layer.graph)
+    started = time.perf_counter()
+
+    # DFS
+    visited = set()
+    stack = [(start_point.position, [], 0)]
+
+    while stack:
+        current_position, path, total_distance = stack.pop()
+
+        if current_position in visited:
+            continue
+
+        visited.add(current_position)
+
+        if current_position == end_point.position:
+            record_search("dfs", started, len(visited))
+            return [start_point.position] + path, total_distance
+
+        current_node = layer.graph.nodes.get(current_position)
+        if current_node:
+            if tracer is not None:
+                tracer.expand(current_node.id, total_distance)
+            edge_costs.prepare(current_node)
+            for neighbor, edge in reversed(layer.neighbours(current_node)):
+                if neighbor.position not in visited and not edge_costs.blocked[edge]:
+                    # Weather-adjusted cost of the edge, kept up to date by the cost table
+                    distance = edge_costs.costs[edge]
+
+                    new_distance = total_distance + distance
+                    stack.append((neighbor.position, path + [neighbor.position], new_distance))
+                    if tracer is not None:
+                        tracer.frontier(neighbor.id, new_distance)
+
+    record_search("dfs", started, len(visited))
+    return None, 0
+
+def dfs_supply_plan(state, start_point, end_point, terrain, weather, blocked_routes):
+    """
+    Implements a Depth-First Search (DFS) approach for supply delivery.
+
+    Args:
+        state (object): The current simulation state, including vehicles and graph information.
+        start_point (object): The starting node representing the origin of supplies.
+        end_point (object): The end node representing the delivery destination.
+        terrain (object): Terrain information to determine vehicle accessibility.
+        weather (object): Weather conditions impacting traversal.
+        blocked_routes (set): A set of blocked routes that vehicles cannot use.
+
+    Returns:
+        DeliveryPlan: The delivery, or a plan with a message if no path is found or no vehicle is available.
+    """
+    layer = terrain_layer(state.graph, terrain, blocked_routes)
+    path, total_distance, _ = cached_route(("dfs",), dfs_route, layer.graph, state, start_point, end_point, terrain,
+                                           weather, blocked_routes)
+    if path is None:
+        return DeliveryPlan(start_point, end_point, None, message="No path found.")
+    return plan_delivery(state, start_point, end_point, path, total_distance, terrain, weather)
+
+def dfs_supply_delivery(state, start_point, end_point, terrain, weather, blocked_routes):
+    """
+    Plans a delivery with dfs_supply_plan and applies it to the state (see commit_plan).
+    """
+    return commit_plan(state, dfs_supply_plan(state, start_point, end_point, terrain, weather, blocked_routes))
@@ -1,18 +1,88 @@
-import heapq
-from collections import deque
-import vehicle as vh
-import supply as sp
-from graph.node import Node
-from algorithms.supplies_per_vehicles import split_supplies_per_vehicle
-from algorithms.utils import manhattan_distance
-from weather import WeatherCondition
+import time
+
+from algorithms import heap, trace
+from algorithms.delivery import DeliveryPlan, commit_plan, plan_delivery
+from algorithms.route_cache import cached_route
+from algorithms.utils import trace_path
+from graph.contraction import contracted_search
+from graph.edge_costs import edge_cost_table
+from graph.layers import terrain_layer
+from metrics import record_search
+
+def ucs_route(state, start_point, end_point, terrain, weather, blocked_routes, bucket_width=None):
+    """
+    Finds the cheapest path from the start point to the end point with a Uniform Cost Search (UCS).
 
-def ucs_supply_delivery(state, start_point, end_point, terrain, weather, blocked_routes):
+    The frontier is a heap keyed by node id (see heap.frontier_type): reaching a node again more
+    cheaply supersedes its entry, and each node only keeps the node it was reached from.
+
+    Args:
+        bucket_width (float, optional): With a width in kilometres, the frontier is a bucket queue
+                                        whose costs are quantized to it, which is faster on large graphs
+                                        but only finds a path within the width per edge of the cheapest.
+
+    Returns:
+        tuple: The path as a list of positions and its cost, or (None, 0) if no path is found.
+    """
+    # Between kept nodes, the search goes through the contracted road network if it was enabled
+    contracted = contracted_search(state.graph, terrain, weather, blocked_routes, start_point.position,
+                                   end_point.position)
+    if contracted is not None:
+        layer, edge_costs = contracted
+    else:
+        layer = terrain_layer(state.graph, terrain, blocked_routes)
+        edge_costs = edge_cost_table(layer.graph, weather)
+    if start_point.position == end_point.position:
+        return [start_point.position], 0
+    start = layer.graph.nodes.get(start_point.position)
+    if start is None:
+        return None, 0
+
+    tracer = trace.recorder
+    if tracer is not None:
+        tracer.begin(layer.graph)
+    started = time.perf_counter()
+
+    frontier = heap.frontier_type() if bucket_width is None else heap.BucketQueue(bucket_width)
+    frontier.push(start.id, 0)
+    reached = {start.id: start}
+    parents = {start.id: None}
+    visited = set()
+
+    while frontier:
+        current_id, total_distance = frontier.pop()
+        visited.add(current_id)
+        current_node = reached[current_id]
+        if tracer is not None:
+            tracer.expand(current_id, total_distance)
+
+        if current_node.position == end_point.position:
+            record_search("ucs", started, len(visited))
+            path = trace_path(reached, parents, current_id)
+            if contracted is not None:
+                path = layer.graph.expand_path(path)
+            return path, total_distance
+
+        edge_costs.prepare(current_node)
+        for neighbor, edge in layer.neighbours(current_node):
+            if neighbor.id not in visited and not edge_costs.blocked[edge]:
+                # Weather-adjusted cost of the edge, kept up to date by the cost table
+                new_distance = total_distance + edge_costs.costs[edge]
+                if frontier.push(neighbor.id, new_distance):
+                    reached[neighbor.id] = neighbor
+                    parents[neighbor.id] = current_id
+                    if tracer is not None:
+                        tracer.frontier(neighbor.id, new_distance)
+
+    record_search("ucs", started, len(visited))
+    return None, 0
+
+def ucs_supply_plan(state, start_point, end_point, terrain, weather, blocked_routes):
     """
     Implements the Uniform Cost Search (UCS) algorithm for supply delivery.
 
-    UCS is a graph search algorithm that explores paths in increasing order of their total travel cost. 
-    It ensures that the first time the algorithm reaches the destination, it has found the path with 
+    UCS is a graph search algorithm that explores paths in increasing order of their total travel cost.
+    It ensures that the first time the algorithm reaches the destination, it has found the path with
     the minimum possible cost (in this case, the total distance).
 
     This algorithm computes the optimal path from a start point to an end point while considering:
@@ -29,158 +99,17 @@ def ucs_supply_delivery(state, start_point, end_point, terrain, weather, blocked
         blocked_routes (set): A set of blocked routes that vehicles cannot use.
 
     Returns:
-        tuple: A tuple containing the path as a list of positions, total distance covered, total time taken,
-               and a dictionary mapping vehicle IDs to the supplies they delivered.
-               If no path is found, returns (None, 0, 0, "No path found").
+        DeliveryPlan: The delivery, or a plan with a message if no path is found or no vehicle is available.
     """
-    def get_supplies_to_send(needed_supplies, available_supplies):
-        supplies_to_send = []
-        supplies_consumed = {supply_type: 0 for supply_type in sp.SupplyType}
-        for needed_type, needed_quantity in needed_supplies.items():
-            total_available = sum(
-                s.quantity
-                for s in available_supplies
-                if s.type == sp.SupplyType[needed_type]
-            )
-            if total_available >= needed_quantity:
-                supplies_to_send.append(
-                    sp.Supply(needed_quantity, sp.SupplyType[needed_type])
-                )
-                supplies_consumed[sp.SupplyType[needed_type]] = needed_quantity
-            else:
-                supplies_to_send.append(
-                    sp.Supply(total_available, sp.SupplyType[needed_type])
-                )
-                supplies_consumed[sp.SupplyType[needed_type]] = total_available
-        return supplies_to_send, supplies_consumed
-
-    def update_vehicle_and_supplies(
-        vehicles,
-        supplies_per_vehicle,
-        total_distance,
-        supplies_consumed,
-        available_supplies,
-        end_point,
-    ):
-        total_time = 0
-        supplies_info = {}
-        for vehicle, supplies in zip(vehicles, supplies_per_vehicle):
-            if supplies:
-                vehicle.position = end_point.position
-                vehicle.vehicle_status = vh.VehicleStatus.BUSY
-                vehicle.current_fuel -= total_distance
-
-                for i in range(len(path) - 1):
-                        start_pos = path[i]
-                        end_pos = path[i + 1]
-                        
-                        weather_condition = weather.get_condition(start_pos)
-                        velocity = vehicle.type.adjust_velocity(weather_condition)
-                        distance = manhattan_distance(start_pos, end_pos)
-                        
-                        time_for_vehicle = distance / velocity if velocity > 0 else float('inf')
-                        
-                        total_time += time_for_vehicle
-
-                supplies_info[vehicle.id] = [s.type.name for s in supplies]
-
-        if supplies_per_vehicle:
-            for supply_type, quantity_used in supplies_consumed.items():
-                if quantity_used > 0:
-                    for supply in available_supplies:
-                        if supply.type == supply_type:
-                            if supply.quantity >= quantity_used:
-                                supply.quantity -= quantity_used
-                                end_point.satisfy_supplies(
-                                    [sp.Supply(quantity_used, supply_type)]
-                                )
-                                break
-                            else:
-                                quantity_used -= supply.quantity
-                                end_point.satisfy_supplies(
-                                    [sp.Supply(supply.quantity, supply_type)]
-                                )
-                                supply.quantity = 0
-        else:
-            return None, 0, 0, "There aren't any available vehicles."
-        
-        return [start_point.position] + path, total_distance, total_time, supplies_info
-
-
-    needed_supplies = end_point.supplies_needed
-    available_supplies = start_point.supplies
-
-    supplies_to_send, supplies_consumed = get_supplies_to_send(
-        needed_supplies, available_supplies
-    )
-
-    pq = []
-    heapq.heappush(pq, (0, start_point.position, []))
-    visited = set()
+    layer = terrain_layer(state.graph, terrain, blocked_routes)
+    path, total_distance, _ = cached_route(("ucs",), ucs_route, layer.graph, state, start_point, end_point, terrain,
+                                           weather, blocked_routes)
+    if path is None:
+        return DeliveryPlan(start_point, end_point, None, message="No path found.")
+    return plan_delivery(state, start_point, end_point, path, total_distance, terrain, weather)
 
-    while pq:
-        total_distance, current_position, path = heapq.heappop(pq)
-
-        if current_position in visited:
-            continue
-
-        visited.add(current_position)
-
-        if current_position == end_point.position:
-            vehicles = [
-                v
-                for v in state.vehicles
-                if v.position == start_point.position
-                and v.vehicle_status == vh.VehicleStatus.IDLE
-                and v.current_fuel >= total_distance
-                and v.type.can_access_terrain(terrain)
-            ]
-
-            supplies_per_vehicle = split_supplies_per_vehicle(
-                vehicles, supplies_to_send
-            )
-
-            result = update_vehicle_and_supplies(
-                vehicles,
-                supplies_per_vehicle,
-                total_distance,
-                supplies_consumed,
-                available_supplies,
-                end_point,
-            )
-            if result:
-                return result
-
-            return (
-                [start_point.position] + path,
-                total_distance,
-                {
-                    vehicle.id: [s.type.name for s in supplies]
-                    for vehicle, supplies in zip(vehicles, supplies_per_vehicle)
-                },
-            )
-
-        current_node = state.graph.nodes.get(current_position)
-        if current_node:
-            for neighbor, is_open in current_node.neighbours:
-                route1, route2 = f'{current_node.id},{neighbor.id}', f'{neighbor.id},{current_node.id}'
-                if is_open and neighbor.position not in visited and neighbor.can_access_terrain(terrain, weather) and route1 not in blocked_routes and route2 not in blocked_routes:
-                    weather_condition = weather.get_condition(neighbor.position)
-                    distance = manhattan_distance(current_position, neighbor.position)
-
-                    # We adjust the distance based on the weather conditions
-                    if weather_condition == WeatherCondition.SNOWY:
-                        distance *= 1.25
-                    elif weather_condition == WeatherCondition.RAINY:
-                        distance *= 1.1
-
-                    if isinstance(neighbor.position, Node):
-                        neighbor.position = neighbor.position
-
-                    new_distance = total_distance + distance
-                    heapq.heappush(
-                        pq,
-                        (new_distance, neighbor.position, path + [neighbor.position]),
-                    )
-
-    return None, 0, 0, "No path found."
+def ucs_supply_delivery(state, start_point, end_point, terrain, weather, blocked_routes):
+    """
+    Plans a delivery with ucs_supply_plan and applies it to the state (see commit_plan).
+    """
+    return commit_plan(state, ucs_supply_plan(state, start_point, end_point, terrain, weather, blocked_routes))
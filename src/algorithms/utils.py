@@ -1,5 +1,8 @@
+from math import asin, cos, radians, sin, sqrt
 from graph.node import Node
 
+EARTH_RADIUS_KM = 6371.0088  # Mean radius of the Earth
+
 def manhattan_distance(p1, p2):
     """
     Calculates the Manhattan distance between two points (p1 and p2).
@@ -20,4 +23,66 @@ def manhattan_distance(p1, p2):
     if isinstance(p2, Node):
         p2 = p2.position
 
-    return abs(p1.x - p2.x) + abs(p1.y - p2.y)
\ No newline at end of file
+    return abs(p1.x - p2.x) + abs(p1.y - p2.y)
+
+def haversine_distance(p1, p2):
+    """
+    Calculates the great-circle distance between two points (p1 and p2), in kilometres.
+
+    Positions hold a longitude (x) and a latitude (y) in degrees. No road between two points is
+    shorter than the great-circle distance between them, so this never overestimates the length
+    of a route.
+
+    Args:
+        p1 (Node or Position): The first point, either a Node object or a position object.
+        p2 (Node or Position): The second point, either a Node object or a position object.
+
+    Returns:
+        float: The distance between the two points, in kilometres.
+    """
+    if isinstance(p1, Node):
+        p1 = p1.position
+    if isinstance(p2, Node):
+        p2 = p2.position
+
+    lat1, lat2 = radians(p1.y), radians(p2.y)
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin(radians(p2.x - p1.x) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+def edge_length(graph, p1, p2):
+    """
+    Returns the length of the road between two adjacent points of a path, in kilometres.
+
+    When several roads join the two points the shortest one is used, and when there is no edge
+    between them the great-circle distance is used instead.
+
+    Args:
+        graph (Graph or TiledGraph): The graph the path was found in.
+        p1 (Position): The position of the first node.
+        p2 (Position): The position of the second node.
+
+    Returns:
+        float: The length of the road, in kilometres.
+    """
+    node = graph.nodes.get(p1)
+    lengths = [graph.edge_length[edge] for (neighbour, _), edge in zip(node.neighbours, node.edge_ids)
+               if neighbour.position == p2] if node else []
+    return min(lengths) / 1000 if lengths else haversine_distance(p1, p2)
+
+def trace_path(reached, parents, node_id):
+    """
+    Follows the parents of a best-first search back from a node to where the search started.
+
+    Args:
+        reached (dict): The node of each node id reached by the search.
+        parents (dict): The node id each node was reached from, None for the first node.
+        node_id (int): The id of the last node.
+
+    Returns:
+        list: The positions of the path, from the first node to the last.
+    """
+    path = []
+    while node_id is not None:
+        path.append(reached[node_id].position)
+        node_id = parents[node_id]
+    return path[::-1]
@@ -8,7 +8,7 @@ class EndPoint:
         Initializes the endpoint with its position, required supplies, and priority level.
         
         :param position: Position object representing the endpoint's location
-        :param supplies_needed: Dictionary of supplies needed (key: supply type, value: quantity)
+        :param supplies_needed: Inventory of the quantity needed of each supply type
         :param priority: Priority level of the endpoint
         """
         self.position = position
@@ -19,17 +19,15 @@ class EndPoint:
         """
         Returns the supplies that are still needed at the endpoint (quantity > 0).
         
-        :return: Dictionary of required supplies
+        :return: Dictionary of required supplies (key: supply type name, value: quantity)
         """
-        return {supply_type: quantity for supply_type, quantity in self.supplies_needed.items() if quantity > 0}
+        return {supply_type.name: quantity for supply_type, quantity in self.supplies_needed.items()}
     
     def satisfy_supplies(self, supplies):
         """
         Satisfies the supply needs of the endpoint based on the provided supplies.
         
-        :param supplies: List of supply objects (each having a type and quantity)
+        :param supplies: Inventory of the supplies delivered
         """
-        for supply in supplies:
-            if supply.type.name in self.supplies_needed:
-                self.supplies_needed[supply.type.name] = max(0, self.supplies_needed[supply.type.name] - supply.quantity)
+        self.supplies_needed.consume(supplies)
 
@@ -1,6 +1,7 @@
+from os import path
+from geography.tiles import DEFAULT_MEMORY_BUDGET, DEFAULT_TILE_SIZE, TiledGraph, tile_folder, write_tiles
 from graph.graph import Graph
 from graph.position import Position
-import osmnx as ox
 
 def load_map_data_to_graph(geography):
     """
@@ -12,7 +13,12 @@ def load_map_data_to_graph(geography):
     Returns:
         Graph: A graph object containing nodes and edges representing the road network of the given geography.
     """
+    # osmnx pulls in geopandas, shapely and networkx, so it is only imported once a map is downloaded
+    import osmnx as ox
+
     G = ox.graph_from_place(geography, network_type="drive")
+    # Fill in the speed limits and travel times missing from OSM, edges already carry their length
+    G = ox.add_edge_travel_times(ox.add_edge_speeds(G))
 
     graph = Graph()
     id = 0
@@ -20,9 +26,34 @@ def load_map_data_to_graph(geography):
         position = Position(data['x'], data['y'])
         graph.add_node(position, id)
         id += 1
-    for u, v in G.edges():
+    for u, v, data in G.edges(data=True):
         pos1 = Position(G.nodes[u]['x'], G.nodes[u]['y'])
         pos2 = Position(G.nodes[v]['x'], G.nodes[v]['y'])
-        graph.add_edge(pos1, pos2)
+        graph.add_edge(pos1, pos2, length=data['length'], speed=data['speed_kph'], travel_time=data['travel_time'])
+
+    return graph
+
+def load_tiled_graph(places, tile_size=DEFAULT_TILE_SIZE, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """
+    Loads the road network of several places as a tiled graph, whose tiles are paged in on demand.
+
+    The first time a set of places is requested, each place is downloaded and the union of their
+    networks is split into tiles stored in the local cache. Later calls only open the cached tiles.
+
+    Args:
+        places (list): The names of the places to load, e.g. the municipalities of a disaster area.
+        tile_size (float, optional): The width and height of each tile, in degrees.
+        memory_budget (int, optional): The estimated number of bytes of tiles kept in memory.
+
+    Returns:
+        TiledGraph: A graph that pages in the tiles that are searched.
+    """
+    folder = tile_folder(places, tile_size)
+    if not path.exists(path.join(folder, "manifest.json")):
+        import osmnx as ox
 
-    return graph
\ No newline at end of file
+        # Keep the edges that cross the border of each place, so the tiles connect across places
+        graphs = (ox.add_edge_travel_times(ox.add_edge_speeds(
+            ox.graph_from_place(place, network_type="drive", truncate_by_edge=True))) for place in places)
+        write_tiles(graphs, folder, tile_size)
+    return TiledGraph(folder, memory_budget)
@@ -0,0 +1,241 @@
+import hashlib
+from array import array
+import json
+from collections import OrderedDict
+from collections.abc import Mapping
+from math import floor
+from os import makedirs, path
+from graph.node import Node
+from graph.position import Position
+
+TILE_CACHE_FOLDER = path.join("cache", "tiles")  # Next to the osmnx download cache
+TILE_FORMAT = 3  # Bumped whenever the layout of the tile files changes
+DEFAULT_TILE_SIZE = 0.01  # Degrees of longitude and latitude, roughly 1 km
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024  # Bytes of tiles kept in memory
+NODE_BYTES = 600  # Rough in-memory footprint of a node, used to account tiles against the budget
+EDGE_BYTES = 150  # Rough in-memory footprint of an edge
+
+def tile_key(x, y, tile_size):
+    return floor(x / tile_size), floor(y / tile_size)
+
+def tile_folder(places, tile_size):
+    """
+    Returns the cache folder of the tiles of a set of places.
+
+    Args:
+        places (list): The names of the places covered by the tiles.
+        tile_size (float): The width and height of each tile, in degrees.
+
+    Returns:
+        str: The path of the folder holding the manifest and the tile files.
+    """
+    digest = hashlib.sha1(json.dumps([TILE_FORMAT, sorted(places), tile_size]).encode()).hexdigest()[:16]
+    return path.join(TILE_CACHE_FOLDER, digest)
+
+def write_tiles(graphs, folder, tile_size=DEFAULT_TILE_SIZE):
+    """
+    Splits road networks into spatial tiles and stores them in a folder.
+
+    Nodes shared by several networks (e.g. on the border of two municipalities) are stored once. Node
+    ids are handed out tile by tile. Each tile file lists its nodes with their neighbours, which may
+    belong to another tile, and the id, length, speed limit and travel time of the edge to each of
+    them. Edge ids are paired like in Graph.
+
+    Args:
+        graphs (iterable): osmnx graphs of the regions to tile, with edge speeds and travel times added.
+        folder (str): The folder to write the manifest and the tile files to.
+        tile_size (float, optional): The width and height of each tile, in degrees. Defaults to DEFAULT_TILE_SIZE.
+    """
+    # osmid -> [x, y, [(neighbour osmid, edge id, length, speed, travel time)]]
+    nodes = {}
+    edge_count = 0
+    for G in graphs:
+        for osmid, data in G.nodes(data=True):
+            nodes.setdefault(osmid, [data['x'], data['y'], []])
+        for u, v, data in G.edges(data=True):
+            # Same as Graph.add_edge, every edge is stored in both directions
+            attributes = (data['length'], data.get('speed_kph', 0), data.get('travel_time', 0))
+            nodes[u][2].append((v, edge_count) + attributes)
+            nodes[v][2].append((u, edge_count + 1) + attributes)
+            edge_count += 2
+
+    tiles = {}
+    for osmid, (x, y, _) in nodes.items():
+        tiles.setdefault(tile_key(x, y, tile_size), []).append(osmid)
+
+    makedirs(folder, exist_ok=True)
+    manifest = {"tile_size": tile_size, "edge_count": edge_count, "tiles": {}}
+    ids = {}
+    for key in sorted(tiles):
+        for osmid in tiles[key]:
+            ids[osmid] = len(ids)
+
+    for key in sorted(tiles):
+        rows = []
+        tile_edges = 0
+        for osmid in tiles[key]:
+            x, y, neighbours = nodes[osmid]
+            rows.append([ids[osmid], x, y, [[nodes[n][0], nodes[n][1], True, edge, length, speed, travel_time]
+                                            for n, edge, length, speed, travel_time in neighbours]])
+            tile_edges += len(neighbours)
+        name = f"{key[0]}_{key[1]}"
+        with open(path.join(folder, f"{name}.json"), 'w') as file:
+            json.dump({"nodes": rows}, file)
+        manifest["tiles"][name] = {"nodes": len(rows), "edges": tile_edges}
+
+    # The manifest is written last, so an interrupted build is not mistaken for a complete one
+    with open(path.join(folder, "manifest.json"), 'w') as file:
+        json.dump(manifest, file)
+
+class TiledNode(Node):
+    """
+    A node of a TiledGraph.
+
+    Its neighbours are stored as positions and resolved through the graph on access, so following an
+    edge into another tile pages that tile in.
+    """
+    def __init__(self, graph, position, id, neighbour_refs, edge_ids):
+        self.graph = graph
+        self.id = id
+        self.position = position
+        self.neighbour_refs = neighbour_refs  # List of tuples (Position, open: bool)
+        self.edge_ids = edge_ids
+        self.accessible_terrains = [0,1,2]
+        self.resolved_neighbours = None
+        self.resolved_epoch = -1
+
+    @property
+    def neighbours(self):
+        # Resolved neighbours are reused until a tile is evicted, so evicted nodes are not kept alive
+        if self.resolved_epoch != self.graph.epoch:
+            self.resolved_neighbours = [(self.graph.nodes[position], open) for position, open in self.neighbour_refs]
+            self.resolved_epoch = self.graph.epoch
+        return self.resolved_neighbours
+
+class TileNodes(Mapping):
+    """
+    The nodes of a TiledGraph, keyed by position like Graph.nodes.
+
+    Looking a position up pages its tile in. Iterating (and len, values, items) only covers the tiles
+    currently in memory.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, position):
+        tile = self.graph.tile(tile_key(position.x, position.y, self.graph.tile_size))
+        if tile is None:
+            raise KeyError(position)
+        return tile[position]
+
+    def __iter__(self):
+        for tile in list(self.graph.tiles.values()):
+            yield from tile
+
+    def __len__(self):
+        return sum(len(tile) for tile in self.graph.tiles.values())
+
+class TiledGraph:
+    """
+    A road network split into spatial tiles stored on disk, paged in on demand.
+
+    It can be used wherever a Graph is searched: nodes are looked up by position through `nodes`, and
+    a tile is only read from disk when a node inside it is first looked up, e.g. when a search crosses
+    into it. Tiles are kept in least-recently-used order and evicted once the estimated memory of the
+    tiles in memory exceeds the budget.
+
+    Attributes:
+        folder (str): The folder holding the manifest and the tile files.
+        tile_size (float): The width and height of each tile, in degrees.
+        edge_count (int): The number of directed edges, over all tiles.
+        edge_length (array): The length of each edge in metres, indexed by edge id. Filled in as tiles are read.
+        edge_speed (array): The speed limit of each edge in km/h, indexed by edge id. Filled in as tiles are read.
+        edge_travel_time (array): The travel time of each edge in seconds, indexed by edge id. Filled in as tiles are read.
+        cost_table (EdgeCostTable): The cached cost table of the graph (see graph.edge_costs).
+        td_cost_tables (dict): The cached time-dependent cost table of each vehicle type (see graph.td_costs).
+        terrain_layers (dict): The cached layer of each terrain (see graph.layers).
+        route_cache (RouteCache): The cached routes found in the graph (see algorithms.route_cache).
+        no_fly_zones (list): The bounds of the areas air vehicles can't fly over.
+        memory_budget (int): The estimated number of bytes of tiles kept in memory.
+        tiles (OrderedDict): The tiles in memory, from least to most recently used. Each tile is a dictionary
+                             where keys are positions and values are TiledNode objects.
+        nodes (TileNodes): The nodes of the graph, keyed by position.
+        memory_used (int): The estimated number of bytes of the tiles in memory.
+        loads (int): The number of tiles read from disk so far.
+        evictions (int): The number of tiles evicted so far.
+        epoch (int): Increased on every eviction, so nodes know to resolve their neighbours again.
+    """
+    def __init__(self, folder, memory_budget=DEFAULT_MEMORY_BUDGET):
+        """
+        Opens the tiles stored in a folder. No tile is read until it is needed.
+
+        Args:
+            folder (str): The folder holding the manifest and the tile files.
+            memory_budget (int, optional): The estimated number of bytes of tiles kept in memory. Defaults to DEFAULT_MEMORY_BUDGET.
+        """
+        with open(path.join(folder, "manifest.json"), 'r') as file:
+            manifest = json.load(file)
+        self.folder = folder
+        self.tile_size = manifest["tile_size"]
+        self.edge_count = manifest["edge_count"]
+        # The attributes of an edge stay known after its tile is evicted, they only take 24 bytes per edge
+        self.edge_length = array('d', bytes(8 * self.edge_count))
+        self.edge_speed = array('d', bytes(8 * self.edge_count))
+        self.edge_travel_time = array('d', bytes(8 * self.edge_count))
+        self.cost_table = None
+        self.td_cost_tables = {}
+        self.terrain_layers = {}
+        self.route_cache = None
+        self.no_fly_zones = []
+        self.tile_sizes = {}
+        for name, info in manifest["tiles"].items():
+            x, y = name.split("_")
+            self.tile_sizes[(int(x), int(y))] = info["nodes"] * NODE_BYTES + info["edges"] * EDGE_BYTES
+        self.memory_budget = memory_budget
+        self.tiles = OrderedDict()
+        self.nodes = TileNodes(self)
+        self.memory_used = 0
+        self.loads = 0
+        self.evictions = 0
+        self.epoch = 0
+
+    def tile(self, key):
+        """
+        Returns a tile, reading it from disk (and evicting the least recently used tiles) if needed.
+
+        Args:
+            key (tuple): The (column, row) key of the tile.
+
+        Returns:
+            dict: The nodes of the tile keyed by position, or None if there is no tile with that key.
+        """
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            return tile
+        if key not in self.tile_sizes:
+            return None
+
+        with open(path.join(self.folder, f"{key[0]}_{key[1]}.json"), 'r') as file:
+            rows = json.load(file)["nodes"]
+        tile = {}
+        for id, x, y, neighbours in rows:
+            position = Position(x, y)
+            tile[position] = TiledNode(self, position, id, [(Position(nx, ny), open) for nx, ny, open, *_ in neighbours],
+                                       [edge for _, _, _, edge, *_ in neighbours])
+            for _, _, _, edge, length, speed, travel_time in neighbours:
+                self.edge_length[edge] = length
+                self.edge_speed[edge] = speed
+                self.edge_travel_time[edge] = travel_time
+        self.loads += 1
+
+        # Make room, but never evict the tile being loaded
+        while self.tiles and self.memory_used + self.tile_sizes[key] > self.memory_budget:
+            evicted_key, _ = self.tiles.popitem(last=False)
+            self.memory_used -= self.tile_sizes[evicted_key]
+            self.evictions += 1
+            self.epoch += 1
+
+        self.tiles[key] = tile
+        self.memory_used += self.tile_sizes[key]
+        return tile
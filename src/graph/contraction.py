@@ -0,0 +1,340 @@
+"""
+Contraction of the chains of degree-2 nodes of a road network into single edges.
+
+Roads are drawn with many nodes along their curves, each linked to the node before and after it,
+so most nodes of a map are only passed through. A contracted graph keeps the other nodes (junctions,
+dead ends, depots and end points) and links them by one edge per chain, with the summed length and
+cost of its edges, so the cost-exact searches expand a fraction of the nodes. The interior positions
+of each chain are kept to expand the routes found back to every node of the road network, for the
+delivery plans and for drawing.
+
+Contraction is opt-in (see enable_contraction): routes are only searched on the contracted graph
+between nodes it kept, and on the road network otherwise.
+"""
+
+from graph.edge_costs import EdgeCostTable, WEATHER_MULTIPLIERS
+from graph.graph import Graph
+from graph.layers import TerrainLayer
+from vehicle import Transportation
+from weather import WeatherCondition
+
+TERRAINS = {terrain.value for terrain in Transportation}
+
+class ContractedGraph(Graph):
+    """
+    A road network with its chains of degree-2 nodes contracted into single edges.
+
+    Kept nodes have the position, id and accessible terrains of their node in the road network. An
+    edge between two nodes that were already linked keeps the attributes of the edge, and an edge
+    replacing a chain has its summed length and travel time.
+
+    Attributes:
+        graph (Graph): The road network that was contracted.
+        segments (list): The (length in metres, position reached) of each edge of the road network an
+                         edge goes through, in order, indexed by edge id.
+        chain_routes (list): The routes ("id1,id2", both ways) of the road network each pair of edges goes
+                             through, indexed by edge id >> 1, to tell whether a closed route cuts it.
+        chains (dict): The interior positions of the chain between two kept positions, in order from the first.
+        through (dict): The even id of the edge going through each interior position of a chain.
+        interior_ends (dict): The ids of the kept nodes at both ends of the chain of each interior node id.
+    """
+    def __init__(self, graph, keep=()):
+        """
+        Contracts a road network.
+
+        Args:
+            graph (Graph): The road network.
+            keep (iterable, optional): Positions to keep even if they are in a chain, such as depots and end points.
+        """
+        super().__init__()
+        self.graph = graph
+        self.segments = []
+        self.chain_routes = []
+        self.chains = {}
+        self.through = {}
+        self.interior_ends = {}
+
+        interior = {position for position, node in graph.nodes.items() if position not in keep and contractible(node)}
+        while True:
+            found, promoted = find_chains(graph, interior)
+            if not promoted:
+                break
+            interior -= promoted
+
+        for position, node in graph.nodes.items():
+            if position not in interior:
+                self.add_node(position, node.id)
+                self.nodes[position].accessible_terrains = node.accessible_terrains
+        for position, node in graph.nodes.items():
+            if position in interior:
+                continue
+            for (neighbour, is_open), edge in zip(node.neighbours, node.edge_ids):
+                # Each edge between kept nodes is added once, from the node it was added from
+                if neighbour.position not in interior and edge % 2 == 0:
+                    self.add_edge(position, neighbour.position, is_open, graph.edge_length[edge],
+                                  graph.edge_speed[edge], graph.edge_travel_time[edge])
+                    # An edge may have been closed one way only
+                    reverse = self.nodes[neighbour.position]
+                    reverse.neighbours[-1] = (self.nodes[position], edge_open(neighbour, edge ^ 1))
+                    self.add_segments(node, [edge], [neighbour])
+        for start, edges, hops in found:
+            self.add_chain(start, edges, hops)
+
+    def add_segments(self, start, edges, hops):
+        """
+        Notes the edges of the road network going from start through hops, for the edge just added and its reverse.
+        """
+        lengths = [self.graph.edge_length[edge] for edge in edges]
+        self.segments.append([(length, hop.position) for length, hop in zip(lengths, hops)])
+        starts = [start] + hops[:-1]
+        self.segments.append([(length, hop.position) for length, hop in zip(reversed(lengths), reversed(starts))])
+        routes = set()
+        for a, b in zip(starts, hops):
+            routes.add(f'{a.id},{b.id}')
+            routes.add(f'{b.id},{a.id}')
+        self.chain_routes.append(frozenset(routes))
+
+    def add_chain(self, start, edges, hops):
+        end = hops[-1]
+        length = sum(self.graph.edge_length[edge] for edge in edges)
+        travel_time = sum(self.graph.edge_travel_time[edge] for edge in edges)
+        edge = self.edge_count
+        self.add_edge(start.position, end.position, True, length, length / travel_time * 3.6 if travel_time else 0,
+                      travel_time)
+        self.add_segments(start, edges, hops)
+
+        positions = [hop.position for hop in hops[:-1]]
+        self.chains[(start.position, end.position)] = positions
+        self.chains[(end.position, start.position)] = positions[::-1]
+        for hop in hops[:-1]:
+            self.through[hop.position] = edge
+            self.interior_ends[hop.id] = (start.id, end.id)
+
+    def expand_path(self, path):
+        """
+        Inserts the interior positions of the chains a route of the contracted graph goes through.
+
+        Args:
+            path (list): The positions of the route, all kept by the contraction.
+
+        Returns:
+            list: The positions of the same route in the road network.
+        """
+        if path is None or len(path) < 2:
+            return path
+        expanded = [path[0]]
+        for previous, position in zip(path, path[1:]):
+            expanded.extend(self.chains.get((previous, position), ()))
+            expanded.append(position)
+        return expanded
+
+def contractible(node):
+    """
+    Checks whether a node only links two other nodes, by open edges, for vehicles of every terrain.
+
+    Maps add a street as one edge per direction of travel, and each of them can be taken both ways,
+    so a node may have several edges to the same neighbour.
+    """
+    if not TERRAINS.issubset(node.accessible_terrains):
+        return False
+    neighbours = linked_nodes(node)
+    return len(neighbours) == 2 and node not in neighbours and all(
+        edge_open(node, edge) and edge_open(neighbour, edge ^ 1)
+        for (neighbour, _), edge in zip(node.neighbours, node.edge_ids))
+
+def edge_open(node, edge):
+    return node.neighbours[node.edge_ids.index(edge)][1]
+
+def linked_nodes(node):
+    """
+    Returns the distinct nodes a node has edges to, in the order of its first edge to each.
+    """
+    return list(dict.fromkeys(neighbour for neighbour, _ in node.neighbours))
+
+def next_node(node, previous):
+    """
+    Returns the node a chain goes on to from an interior node, reached from previous.
+    """
+    first, second = linked_nodes(node)
+    return second if first is previous else first
+
+def cheapest_edge(graph, node, neighbour):
+    """
+    Returns the shortest of the edges from a node to a neighbour. Edges to the same node lead into the
+    same weather, so the shortest is also the cheapest whatever the weather.
+    """
+    return min((edge for (other, _), edge in zip(node.neighbours, node.edge_ids) if other is neighbour),
+               key=lambda edge: graph.edge_length[edge])
+
+def find_chains(graph, interior):
+    """
+    Walks the chains of interior nodes between kept nodes.
+
+    A chain can't be contracted into an edge if it loops back to the node it starts from, or if its
+    ends are already linked by an edge or another chain: a route between them wouldn't tell which one
+    it goes through. Neither can a ring of interior nodes without any kept node. The first interior
+    node of each such chain must be kept instead.
+
+    Args:
+        graph (Graph): The road network.
+        interior (set): The positions of the nodes that may be contracted.
+
+    Returns:
+        tuple: The chains as (start node, cheapest edge id of each hop, nodes reached) tuples, and the set of positions to keep
+               instead of contracting, empty if every chain can be contracted.
+    """
+    chains = []
+    promoted = set()
+    linked = set()
+    walked = set()
+    for position, node in graph.nodes.items():
+        if position in interior:
+            continue
+        for neighbour, _ in node.neighbours:
+            if neighbour.position not in interior:
+                linked.add((position, neighbour.position) if position < neighbour.position
+                           else (neighbour.position, position))
+
+    for position, node in graph.nodes.items():
+        if position in interior:
+            continue
+        for neighbour in linked_nodes(node):
+            if neighbour.position not in interior or neighbour.position in walked:
+                continue
+            # Of the edges between two nodes, the chain goes along the cheapest
+            edges, hops = [cheapest_edge(graph, node, neighbour)], [neighbour]
+            previous, current = node, neighbour
+            while current.position in interior:
+                walked.add(current.position)
+                previous, current = current, next_node(current, previous)
+                edges.append(cheapest_edge(graph, previous, current))
+                hops.append(current)
+            pair = (position, current.position) if position < current.position else (current.position, position)
+            if current is node or pair in linked:
+                promoted.add(neighbour.position)
+            else:
+                linked.add(pair)
+                chains.append((node, edges, hops))
+
+    for position in interior - walked:
+        if position in walked:
+            continue
+        # A ring of interior nodes, contracted once one of them is kept
+        promoted.add(position)
+        previous, current = None, graph.nodes[position]
+        while current.position in interior and current.position not in walked:
+            walked.add(current.position)
+            previous, current = current, next_node(current, previous)
+    return chains, promoted
+
+class ContractedCostTable(EdgeCostTable):
+    """
+    The weather-adjusted cost of every edge of a contracted graph: the sum of the costs of the edges of
+    the road network it goes through, blocked if any of them leads into a storm.
+
+    When the weather of an interior position of a chain changes, the edges of its chain are recomputed.
+    """
+    def edge_cost(self, edge, neighbour):
+        cost = 0
+        blocked = False
+        for length, position in self.graph.segments[edge]:
+            condition = self.weather.get_condition(position)
+            cost += length / 1000 * WEATHER_MULTIPLIERS.get(condition, 1)
+            blocked = blocked or condition == WeatherCondition.STORM
+        return cost, blocked
+
+    def refresh(self):
+        for position in self.weather.changes_since(self.version):
+            edge = self.graph.through.get(position)
+            if edge is not None:
+                edges = [edge]
+            else:
+                node = self.graph.nodes.get(position)
+                edges = node.edge_ids if node is not None else []
+            for edge in edges:
+                for directed_edge in (edge, edge ^ 1):
+                    self.costs[directed_edge], self.blocked[directed_edge] = self.edge_cost(directed_edge, None)
+        self.version = self.weather.version
+
+class ContractedLayer(TerrainLayer):
+    """
+    The adjacency of a contracted graph as seen by the vehicles of one terrain.
+
+    An edge is left out of the rows if any route of the road network it goes through is closed. Closing
+    a route inside a chain filters the rows of the kept nodes at its ends again.
+    """
+    def sync(self, blocked_routes):
+        if blocked_routes != self.closed_routes:
+            for route in blocked_routes ^ self.closed_routes:
+                for node_id in route.split(','):
+                    for end_id in self.graph.interior_ends.get(int(node_id), (int(node_id),)):
+                        self.rows.pop(end_id, None)
+            self.closed_routes = frozenset(blocked_routes)
+
+    def neighbours(self, node):
+        row = self.rows.get(node.id)
+        if row is None:
+            closed_routes = self.closed_routes
+            chain_routes = self.graph.chain_routes
+            row = self.rows[node.id] = [
+                (neighbour, edge) for (neighbour, is_open), edge in zip(node.neighbours, node.edge_ids)
+                if is_open and self.terrain in neighbour.accessible_terrains
+                and closed_routes.isdisjoint(chain_routes[edge >> 1])
+            ]
+        return row
+
+def enable_contraction(graph, keep=()):
+    """
+    Makes the cost-exact searches of a road network go through its contracted graph, built the first
+    time it is searched.
+
+    Args:
+        graph (Graph): The road network.
+        keep (iterable, optional): Positions that must stay nodes of the contracted graph. Only routes between
+                                   such positions or junctions are searched on it.
+    """
+    graph.contraction_keep = frozenset(keep)
+    graph.contracted = None
+
+def contracted_graph(graph):
+    """
+    Returns the contracted graph of a road network, or None if contraction isn't enabled for it.
+    """
+    if not isinstance(graph, Graph) or graph.contraction_keep is None:
+        return None
+    if graph.contracted is None:
+        graph.contracted = ContractedGraph(graph, graph.contraction_keep)
+    return graph.contracted
+
+def contracted_search(graph, terrain, weather, blocked_routes, source, target):
+    """
+    Returns what a search between two positions goes through on the contracted graph of a road network.
+
+    Air vehicles fly over their own graph, which isn't contracted.
+
+    Args:
+        graph (Graph or TiledGraph): The road network.
+        terrain (int): The terrain (Transportation value).
+        weather (Weather): The weather the costs are adjusted for.
+        blocked_routes (set): The closed routes, as "id1,id2" strings.
+        source (Position): The position the search starts from.
+        target (Position): The position the search ends at.
+
+    Returns:
+        tuple: The ContractedLayer and ContractedCostTable to search, up to date, or None if the search
+               must go through the road network instead.
+    """
+    if terrain == Transportation.AIR.value:
+        return None
+    contracted = contracted_graph(graph)
+    if contracted is None or source not in contracted.nodes or target not in contracted.nodes:
+        return None
+    layer = contracted.terrain_layers.get(terrain)
+    if layer is None:
+        layer = contracted.terrain_layers[terrain] = ContractedLayer(contracted, terrain)
+    layer.sync(blocked_routes)
+    table = contracted.cost_table
+    if table is None or table.weather is not weather:
+        table = contracted.cost_table = ContractedCostTable(contracted, weather)
+    table.refresh()
+    return layer, table
@@ -0,0 +1,106 @@
+from array import array
+from weather import WeatherCondition
+
+# Distance multipliers of the weather at the end of an edge, conditions not listed cost the plain distance
+WEATHER_MULTIPLIERS = {
+    WeatherCondition.SNOWY: 1.25,
+    WeatherCondition.RAINY: 1.1,
+}
+
+class EdgeCostTable:
+    """
+    The weather-adjusted cost of every edge of a graph, kept in flat arrays indexed by edge id.
+
+    The cost of an edge is its length in kilometres multiplied by the weather multiplier of the node it leads to,
+    and an edge is blocked when that node is under a storm. Costs are computed once; afterwards only
+    the edges leading into nodes whose weather changed are recomputed, so the inner loop of a search
+    reads a single array entry per edge.
+
+    For graphs paged in from tiles, the costs of the edges leaving a node are only computed the first
+    time the node is prepared.
+
+    Attributes:
+        graph (Graph or TiledGraph): The graph whose edges are costed.
+        weather (Weather): The weather the costs are adjusted for.
+        costs (array): The cost of each edge, indexed by edge id.
+        blocked (bytearray): 1 for each edge leading into a storm, indexed by edge id.
+        version (int): The weather version the table is up to date with.
+    """
+    def __init__(self, graph, weather):
+        """
+        Builds the cost table of a graph.
+
+        Args:
+            graph (Graph or TiledGraph): The graph whose edges are costed.
+            weather (Weather): The weather the costs are adjusted for.
+        """
+        self.graph = graph
+        self.weather = weather
+        self.version = weather.version
+        self.costs = array('d', bytes(8 * graph.edge_count))
+        self.blocked = bytearray(graph.edge_count)
+
+        self.lazy = not isinstance(graph.nodes, dict)
+        self.prepared = set()
+        if not self.lazy:
+            for node in graph.nodes.values():
+                self.fill_node(node)
+
+    def edge_cost(self, edge, neighbour):
+        """
+        Computes the cost of an edge leading to neighbour.
+
+        Returns:
+            tuple: The weather-adjusted cost and whether the edge is blocked.
+        """
+        condition = self.weather.get_condition(neighbour.position)
+        cost = self.graph.edge_length[edge] / 1000 * WEATHER_MULTIPLIERS.get(condition, 1)
+        return cost, condition == WeatherCondition.STORM
+
+    def fill_node(self, node):
+        for (neighbour, _), edge in zip(node.neighbours, node.edge_ids):
+            self.costs[edge], self.blocked[edge] = self.edge_cost(edge, neighbour)
+        self.prepared.add(node.id)
+
+    def prepare(self, node):
+        """
+        Makes sure the costs of the edges leaving a node are computed, which only matters for tiled graphs.
+
+        Args:
+            node (Node): The node about to be expanded.
+        """
+        if self.lazy and node.id not in self.prepared:
+            self.fill_node(node)
+
+    def refresh(self):
+        """
+        Recomputes the edges leading into the nodes whose weather changed since the table was last refreshed.
+        """
+        for position in self.weather.changes_since(self.version):
+            node = self.graph.nodes.get(position)
+            if node is None:
+                continue
+            # Edges are stored in pairs, the edge back from each neighbour has the id next to its own
+            # and the same length
+            for edge in node.edge_ids:
+                reverse_edge = edge ^ 1
+                self.costs[reverse_edge], self.blocked[reverse_edge] = self.edge_cost(edge, node)
+        self.version = self.weather.version
+
+def edge_cost_table(graph, weather):
+    """
+    Returns the cost table of a graph for some weather, building it the first time and refreshing it
+    with the weather changes made since it was last used.
+
+    Args:
+        graph (Graph or TiledGraph): The graph whose edges are costed.
+        weather (Weather): The weather the costs are adjusted for.
+
+    Returns:
+        EdgeCostTable: The up to date cost table.
+    """
+    table = graph.cost_table
+    if table is None or table.weather is not weather:
+        table = graph.cost_table = EdgeCostTable(graph, weather)
+    table.refresh()
+    return table
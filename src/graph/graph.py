@@ -1,3 +1,5 @@
+from array import array
+from algorithms.utils import haversine_distance
 from graph.node import Node
 from graph.position import Position
 
@@ -10,12 +12,46 @@ class Graph:
 
     Attributes:
         nodes: A dictionary where keys are positions, and values are Node objects representing the nodes.
+        edge_count: The number of directed edges. Edges are numbered in pairs, so the edge back of
+                    edge e has the id e ^ 1.
+        edge_length: The length of each edge in metres, indexed by edge id.
+        edge_speed: The speed limit of each edge in km/h (0 if unknown), indexed by edge id.
+        edge_travel_time: The time to travel each edge at its speed limit in seconds (0 if unknown), indexed by edge id.
+        cost_table: The cached EdgeCostTable of the graph (see graph.edge_costs), reset when the graph changes.
+        td_cost_tables: The cached TimeDependentCostTable of each vehicle type (see graph.td_costs), reset when the graph changes.
+        terrain_layers: The cached TerrainLayer of each terrain (see graph.layers), reset when the graph changes.
+        no_fly_zones: The (min_x, min_y, max_x, max_y) bounds of the areas air vehicles can't fly over.
+        air_graph: The cached straight-line graph flown by air vehicles (see graph.layers), reset when the graph changes.
+        overlays: The cached routing Overlay of each terrain (see graph.partition), reset when the graph changes.
+        route_cache: The cached RouteCache of routes found in the graph (see algorithms.route_cache), reset when the graph changes.
+        contraction_keep: The positions kept when contracting the graph, or None if its searches don't go through
+                          a contracted graph (see graph.contraction).
+        contracted: The cached ContractedGraph of the graph (see graph.contraction), reset when the graph changes.
     """
     def __init__(self):
         """
         Initializes a new empty graph.
         """
         self.nodes = {}
+        self.edge_count = 0
+        self.edge_length = array('d')
+        self.edge_speed = array('d')
+        self.edge_travel_time = array('d')
+        self.no_fly_zones = []
+        self.contraction_keep = None
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Drops everything cached from the nodes and edges of the graph, after they changed.
+        """
+        self.cost_table = None
+        self.td_cost_tables = {}
+        self.terrain_layers = {}
+        self.air_graph = None
+        self.overlays = {}
+        self.route_cache = None
+        self.contracted = None
         
     def add_node(self, position, id = 0):
         """
@@ -27,8 +63,9 @@ class Graph:
         """
         if position not in self.nodes:
             self.nodes[position] = Node(position, id)
+            self.invalidate()
 
-    def add_edge(self, pos1, pos2, open=True):
+    def add_edge(self, pos1, pos2, open=True, length=None, speed=None, travel_time=None):
         """
         Adds an edge between two nodes in the graph.
 
@@ -36,7 +73,23 @@ class Graph:
             pos1 (Position): The position of the first node.
             pos2 (Position): The position of the second node.
             open (bool, optional): Whether the edge is open or closed. Defaults to True.
+            length (float, optional): The length of the road in metres. Defaults to the great-circle distance.
+            speed (float, optional): The speed limit of the road in km/h. Defaults to unknown.
+            travel_time (float, optional): The time to travel the road in seconds. Defaults to the time at the speed limit.
         """
         if pos1 in self.nodes and pos2 in self.nodes:
+            if length is None:
+                length = haversine_distance(pos1, pos2) * 1000
+            if travel_time is None:
+                travel_time = length / (speed / 3.6) if speed else 0
+            for edge_array, value in ((self.edge_length, length), (self.edge_speed, speed or 0),
+                                      (self.edge_travel_time, travel_time)):
+                # Both directions of the edge share its attributes
+                edge_array.append(value)
+                edge_array.append(value)
             self.nodes[pos1].neighbours.append((self.nodes[pos2], open))
-            self.nodes[pos2].neighbours.append((self.nodes[pos1], open))
\ No newline at end of file
+            self.nodes[pos1].edge_ids.append(self.edge_count)
+            self.nodes[pos2].neighbours.append((self.nodes[pos1], open))
+            self.nodes[pos2].edge_ids.append(self.edge_count + 1)
+            self.edge_count += 2
+            self.invalidate()
\ No newline at end of file
@@ -0,0 +1,293 @@
+from itertools import count
+from math import cos, floor, radians
+from algorithms.utils import haversine_distance
+from graph.graph import Graph
+from vehicle import Transportation
+
+AIR_NEIGHBOURS = 8  # Number of nearest nodes each node of the air graph is linked to
+KM_PER_DEGREE = 111.32  # Length of a degree of latitude, and of longitude at the equator
+
+class BlockedRoutes(set):
+    """
+    The set of routes ("id1,id2") closed by the user, with a version increased on every change.
+
+    Caches built from the closed routes key their entries on (token, version), which is cheaper
+    than hashing the whole set and never mistakes two different sets for one another.
+
+    Attributes:
+        token (int): A number unique to this set.
+        version (int): Increased every time routes are closed or reopened.
+    """
+    tokens = count()
+
+    def __init__(self, routes=()):
+        super().__init__(routes)
+        self.token = next(BlockedRoutes.tokens)
+        self.version = 0
+
+    def changed(self):
+        self.version += 1
+
+    def add(self, route):
+        if route not in self:
+            super().add(route)
+            self.changed()
+
+    def discard(self, route):
+        if route in self:
+            super().discard(route)
+            self.changed()
+
+    def remove(self, route):
+        super().remove(route)
+        self.changed()
+
+    def pop(self):
+        route = super().pop()
+        self.changed()
+        return route
+
+    def clear(self):
+        if self:
+            super().clear()
+            self.changed()
+
+    def update(self, *others):
+        super().update(*others)
+        self.changed()
+
+    def difference_update(self, *others):
+        super().difference_update(*others)
+        self.changed()
+
+    def intersection_update(self, *others):
+        super().intersection_update(*others)
+        self.changed()
+
+    def symmetric_difference_update(self, other):
+        super().symmetric_difference_update(other)
+        self.changed()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
+
+def routes_key(blocked_routes):
+    """
+    Returns a hashable key identifying the current contents of a set of closed routes.
+    """
+    if isinstance(blocked_routes, BlockedRoutes):
+        return blocked_routes.token, blocked_routes.version
+    return frozenset(blocked_routes)
+
+class TerrainLayer:
+    """
+    The adjacency of a graph as seen by the vehicles of one terrain.
+
+    Each node's row only holds the edges a vehicle of the terrain may take: open edges, leading to a
+    node that accepts the terrain, and not closed by the user. Rows are filtered the first time a
+    node is expanded and then reused by every search, so the inner loop of a search does not test
+    terrains, open flags or closed routes. When routes are closed or reopened, only the rows of the
+    nodes at their ends are filtered again.
+
+    Attributes:
+        graph (Graph or TiledGraph): The graph searched for this terrain.
+        terrain (int): The terrain (Transportation value) of the layer.
+        rows (dict): The (neighbour, edge id) pairs of each expanded node, keyed by node id.
+        closed_routes (frozenset): The closed routes ("id1,id2") the rows were filtered with.
+        epoch (int): The tile epoch of the graph the rows were filtered at (tiled graphs only).
+    """
+    def __init__(self, graph, terrain):
+        """
+        Creates an empty layer.
+
+        Args:
+            graph (Graph or TiledGraph): The graph searched for this terrain.
+            terrain (int): The terrain (Transportation value) of the layer.
+        """
+        self.graph = graph
+        self.terrain = terrain
+        self.rows = {}
+        self.closed_routes = frozenset()
+        self.epoch = getattr(graph, 'epoch', 0)
+
+    def sync(self, blocked_routes):
+        """
+        Brings the rows up to date with the routes currently closed.
+
+        Args:
+            blocked_routes (set): The closed routes, as "id1,id2" strings.
+        """
+        epoch = getattr(self.graph, 'epoch', 0)
+        if epoch != self.epoch:
+            # Evicted tiles must not be kept alive by the rows
+            self.rows = {}
+            self.epoch = epoch
+        if blocked_routes != self.closed_routes:
+            for route in blocked_routes ^ self.closed_routes:
+                for node_id in route.split(','):
+                    self.rows.pop(int(node_id), None)
+            self.closed_routes = frozenset(blocked_routes)
+
+    def neighbours(self, node):
+        """
+        Returns the edges a vehicle of the layer's terrain may take from a node.
+
+        Args:
+            node (Node): The node being expanded.
+
+        Returns:
+            list: (neighbour, edge id) pairs.
+        """
+        row = self.rows.get(node.id)
+        if row is None:
+            closed_routes = self.closed_routes
+            row = self.rows[node.id] = [
+                (neighbour, edge) for (neighbour, is_open), edge in zip(node.neighbours, node.edge_ids)
+                if is_open and self.terrain in neighbour.accessible_terrains
+                and f'{node.id},{neighbour.id}' not in closed_routes and f'{neighbour.id},{node.id}' not in closed_routes
+            ]
+        return row
+
+def segment_crosses(bounds, p1, p2):
+    """
+    Checks whether the straight segment between two positions crosses a rectangle (Liang-Barsky clipping).
+
+    Args:
+        bounds (tuple): The (min_x, min_y, max_x, max_y) bounds of the rectangle.
+        p1 (Position): The start of the segment.
+        p2 (Position): The end of the segment.
+
+    Returns:
+        bool: True if any part of the segment is inside the rectangle.
+    """
+    min_x, min_y, max_x, max_y = bounds
+    dx, dy = p2.x - p1.x, p2.y - p1.y
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, p1.x - min_x), (dx, max_x - p1.x), (-dy, p1.y - min_y), (dy, max_y - p1.y)):
+        if p == 0:
+            if q < 0:
+                return False
+        else:
+            t = q / p
+            if p < 0:
+                t0 = max(t0, t)
+            else:
+                t1 = min(t1, t)
+            if t0 > t1:
+                return False
+    return True
+
+def build_air_graph(graph, no_fly_zones=(), k=AIR_NEIGHBOURS):
+    """
+    Builds the straight-line graph flown by air vehicles over the nodes of a road network.
+
+    Every node is linked to its k nearest nodes by a straight edge as long as the great-circle
+    distance between them, unless the edge crosses a no-fly zone. Nearest nodes are found with a
+    uniform grid over the positions, sized so that each cell holds about k nodes.
+
+    Args:
+        graph (Graph): The road network whose nodes are flown between.
+        no_fly_zones (iterable, optional): The (min_x, min_y, max_x, max_y) bounds of each no-fly zone.
+        k (int, optional): The number of nearest nodes each node is linked to. Defaults to AIR_NEIGHBOURS.
+
+    Returns:
+        Graph: A graph with the same node positions and ids, and straight edges.
+    """
+    air_graph = Graph()
+    for position, node in graph.nodes.items():
+        air_graph.add_node(position, node.id)
+        air_graph.nodes[position].accessible_terrains = node.accessible_terrains
+    if len(graph.nodes) < 2:
+        return air_graph
+
+    # Grid over an equirectangular projection in km, so cells are about square
+    positions = list(graph.nodes)
+    x_scale = KM_PER_DEGREE * cos(radians(sum(p.y for p in positions) / len(positions)))
+    min_x = min(p.x for p in positions) * x_scale
+    min_y = min(p.y for p in positions) * KM_PER_DEGREE
+    width = max(p.x for p in positions) * x_scale - min_x
+    height = max(p.y for p in positions) * KM_PER_DEGREE - min_y
+    cell_size = max((width * height * k / len(positions)) ** 0.5, 1e-3)
+
+    def cell_of(position):
+        return floor((position.x * x_scale - min_x) / cell_size), floor((position.y * KM_PER_DEGREE - min_y) / cell_size)
+
+    cells = {}
+    for position in positions:
+        cells.setdefault(cell_of(position), []).append(position)
+    grid_radius = max(floor(width / cell_size), floor(height / cell_size)) + 1
+
+    no_fly_zones = [tuple(bounds) for bounds in no_fly_zones]
+    linked = set()
+    for position in positions:
+        column, row = cell_of(position)
+        candidates = []
+        # Widen the search ring by ring, until the next ring can't hold anything nearer than the k-th candidate
+        for ring in range(grid_radius + 1):
+            if len(candidates) >= k and (ring - 1) * cell_size > candidates[k - 1][0]:
+                break
+            for c in range(column - ring, column + ring + 1):
+                for r in range(row - ring, row + ring + 1):
+                    if max(abs(c - column), abs(r - row)) == ring:
+                        for other in cells.get((c, r), ()):
+                            if other != position:
+                                candidates.append((haversine_distance(position, other), other))
+            candidates.sort(key=lambda candidate: candidate[0])
+
+        for distance, other in candidates[:k]:
+            pair = (position, other) if position < other else (other, position)
+            if pair in linked or any(segment_crosses(bounds, position, other) for bounds in no_fly_zones):
+                continue
+            linked.add(pair)
+            air_graph.add_edge(position, other, length=distance * 1000)
+    return air_graph
+
+def terrain_graph(graph, terrain):
+    """
+    Returns the graph searched by vehicles of a terrain: the air graph for air vehicles (built the
+    first time it is needed) and the road network otherwise. Tiled graphs are always flown over
+    their road network, as the air graph would need every tile in memory.
+
+    Args:
+        graph (Graph or TiledGraph): The road network.
+        terrain (int): The terrain (Transportation value).
+
+    Returns:
+        Graph or TiledGraph: The graph to search.
+    """
+    if terrain != Transportation.AIR.value or not isinstance(graph, Graph):
+        return graph
+    if graph.air_graph is None:
+        graph.air_graph = build_air_graph(graph, graph.no_fly_zones)
+    return graph.air_graph
+
+def terrain_layer(graph, terrain, blocked_routes):
+    """
+    Returns the layer of a terrain, in sync with the routes currently closed.
+
+    Args:
+        graph (Graph or TiledGraph): The road network.
+        terrain (int): The terrain (Transportation value).
+        blocked_routes (set): The closed routes, as "id1,id2" strings.
+
+    Returns:
+        TerrainLayer: The layer to search. Its graph is the one returned by terrain_graph.
+    """
+    layer = graph.terrain_layers.get(terrain)
+    if layer is None:
+        layer = graph.terrain_layers[terrain] = TerrainLayer(terrain_graph(graph, terrain), terrain)
+    layer.sync(blocked_routes)
+    return layer
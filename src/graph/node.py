@@ -12,6 +12,7 @@ class Node:
         id (int): The unique identifier for the node.
         position (Position): The position of the node in the graph.
         neighbours (list): A list of tuples representing neighbouring nodes and their open status.
+        edge_ids (list): The id of the edge to each neighbour, in the same order as neighbours.
         accessible_terrains (list): A list of terrain types that the node can access (0, 1, 2).
     """
     def __init__(self, position, id):
@@ -25,6 +26,7 @@ class Node:
         self.id = id
         self.position = position
         self.neighbours = []  # List of tuples (Node, open: bool)
+        self.edge_ids = []
         self.accessible_terrains = [0,1,2] # List of Terrain
 
     def can_access_terrain(self, terrain, weather):
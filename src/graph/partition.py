@@ -0,0 +1,223 @@
+import heapq
+from math import cos, radians
+
+from graph.edge_costs import edge_cost_table
+from graph.graph import Graph
+from graph.layers import terrain_layer
+
+DEFAULT_CELL_SIZE = 256  # Most nodes in a cell of the overlay
+
+# Directions a set of nodes may be split along: east, north and both diagonals
+SPLIT_DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1)]
+
+def partition_graph(graph, max_cell_size=DEFAULT_CELL_SIZE):
+    """
+    Splits the nodes of a graph into balanced cells with few edges between them.
+
+    Nodes are split in halves recursively until every cell holds at most max_cell_size nodes. Each
+    split sorts the nodes along a direction (east, north or a diagonal) and cuts at the median, keeping
+    the direction that cuts the fewest edges. Road networks are nearly planar, so such cuts stay small.
+
+    Args:
+        graph (Graph): The graph to split.
+        max_cell_size (int, optional): The most nodes in a cell. Defaults to DEFAULT_CELL_SIZE.
+
+    Returns:
+        list: The cells, each a list of node positions.
+    """
+    nodes = list(graph.nodes.values())
+    if not nodes:
+        return []
+    # Degrees of longitude are shorter than degrees of latitude away from the equator
+    scale = cos(radians(sum(node.position.y for node in nodes) / len(nodes)))
+
+    cells = []
+    stack = [nodes]
+    while stack:
+        nodes = stack.pop()
+        if len(nodes) <= max_cell_size:
+            cells.append([node.position for node in nodes])
+            continue
+
+        half = len(nodes) // 2
+        best = None
+        for dx, dy in SPLIT_DIRECTIONS:
+            ordered = sorted(nodes, key=lambda node: dx * node.position.x * scale + dy * node.position.y)
+            first = {node.id for node in ordered[:half]}
+            cut = sum(1 for node in ordered[:half] for neighbour, _ in node.neighbours
+                      if neighbour.id not in first)
+            if best is None or cut < best[0]:
+                best = (cut, ordered)
+        stack.append(best[1][half:])
+        stack.append(best[1][:half])
+
+    return cells
+
+class Overlay:
+    """
+    A two-level routing overlay of the graph searched by one terrain.
+
+    The graph is partitioned into cells once. A node is a boundary node of its cell when one of its
+    edges leads to another cell. Customizing a cell computes the cheapest route inside the cell
+    between each pair of its boundary nodes (its clique) with the current weather and closed routes.
+    Arcs whose cheapest route goes through another boundary node of the cell are left out, as the
+    arcs to and from that node already cover them. Weather changes and closed or reopened routes only
+    make the cells they touch customized again.
+
+    A query searches the original edges of the cells of its source and target, and elsewhere only the
+    boundary nodes: the cliques take it across a cell, the edges between cells from one to the next.
+    Nodes are referred to by id throughout, as ids hash faster than positions.
+
+    Attributes:
+        layer (TerrainLayer): The layer the overlay routes over.
+        cells (list): The positions of the nodes of each cell.
+        nodes (dict): The node of each node id.
+        cell_of (dict): The cell of each node id.
+        boundary (list): The boundary node ids of each cell.
+        cliques (list): For each cell, boundary node id -> list of (boundary node id, cost) pairs.
+        weather (Weather): The weather the cliques were customized with.
+        version (int): The weather version the cliques are up to date with.
+        closed_routes (frozenset): The closed routes the cliques were customized with.
+        customized (int): The number of cells customized so far.
+    """
+    def __init__(self, layer, max_cell_size=DEFAULT_CELL_SIZE):
+        """
+        Partitions the graph of a layer. Its cells are customized the first time it is updated.
+
+        Args:
+            layer (TerrainLayer): The layer to route over.
+            max_cell_size (int, optional): The most nodes in a cell. Defaults to DEFAULT_CELL_SIZE.
+        """
+        self.layer = layer
+        self.cells = partition_graph(layer.graph, max_cell_size)
+        self.nodes = {node.id: node for node in layer.graph.nodes.values()}
+        self.cell_of = {}
+        for cell, positions in enumerate(self.cells):
+            for position in positions:
+                self.cell_of[layer.graph.nodes[position].id] = cell
+
+        self.boundary = []
+        for cell, positions in enumerate(self.cells):
+            self.boundary.append([node.id for node in map(layer.graph.nodes.get, positions)
+                                  if any(self.cell_of[neighbour.id] != cell for neighbour, _ in node.neighbours)])
+        self.cliques = [{} for _ in self.cells]
+        self.weather = None
+        self.version = 0
+        self.closed_routes = frozenset()
+        self.customized = 0
+
+    def cell_routes(self, edge_costs, cell, source, targets=None):
+        """
+        Runs Dijkstra's algorithm from a node without leaving its cell.
+
+        Args:
+            edge_costs (EdgeCostTable): The weather-adjusted cost of each edge.
+            cell (int): The cell searched.
+            source (int): The id of the node the search starts at.
+            targets (set, optional): Ids of nodes whose costs are wanted; the search stops once all are settled.
+
+        Returns:
+            tuple: Node id -> cost, node id -> previous node id, and node id -> whether the route to it
+                   goes through one of the targets, for the nodes settled.
+        """
+        nodes = self.nodes
+        cell_of = self.cell_of
+        costs = {source: 0}
+        parents = {source: None}
+        through = {source: False}
+        settled = {}
+        remaining = len(targets) if targets is not None else -1
+        pq = [(0, source)]
+
+        while pq and remaining != 0:
+            cost, node_id = heapq.heappop(pq)
+            if node_id in settled:
+                continue
+            settled[node_id] = cost
+            if targets is not None and node_id in targets:
+                remaining -= 1
+            passes_target = through[node_id] or (node_id != source and targets is not None and node_id in targets)
+
+            for neighbour, edge in self.layer.neighbours(nodes[node_id]):
+                if cell_of[neighbour.id] != cell or edge_costs.blocked[edge]:
+                    continue
+                new_cost = cost + edge_costs.costs[edge]
+                if new_cost < costs.get(neighbour.id, float('inf')):
+                    costs[neighbour.id] = new_cost
+                    parents[neighbour.id] = node_id
+                    through[neighbour.id] = passes_target
+                    heapq.heappush(pq, (new_cost, neighbour.id))
+
+        return settled, parents, through
+
+    def customize(self, edge_costs, cell):
+        """
+        Computes the clique of a cell.
+        """
+        boundary = self.boundary[cell]
+        targets = set(boundary)
+        clique = {}
+        for source in boundary:
+            settled, _, through = self.cell_routes(edge_costs, cell, source, targets)
+            clique[source] = [(target, cost) for target, cost in settled.items()
+                              if target in targets and target != source and not through[target]]
+        self.cliques[cell] = clique
+        self.customized += 1
+
+    def update(self, weather, blocked_routes):
+        """
+        Customizes again the cells whose routes changed since the overlay was last updated.
+
+        Args:
+            weather (Weather): The current weather.
+            blocked_routes (set): The closed routes, as "id1,id2" strings.
+
+        Returns:
+            EdgeCostTable: The up to date cost table of the layer's graph.
+        """
+        edge_costs = edge_cost_table(self.layer.graph, weather)
+        if weather is not self.weather:
+            cells = range(len(self.cells))
+        else:
+            cells = set()
+            nodes = self.layer.graph.nodes
+            # The cost of an edge depends on the weather of the node it leads to
+            for position in weather.changes_since(self.version):
+                node = nodes.get(position)
+                if node is not None:
+                    cells.add(self.cell_of[node.id])
+            if blocked_routes != self.closed_routes:
+                for route in blocked_routes ^ self.closed_routes:
+                    for node_id in route.split(','):
+                        if int(node_id) in self.cell_of:
+                            cells.add(self.cell_of[int(node_id)])
+
+        for cell in cells:
+            self.customize(edge_costs, cell)
+        self.weather = weather
+        self.version = weather.version
+        self.closed_routes = frozenset(blocked_routes)
+        return edge_costs
+
+def overlay(graph, terrain, weather, blocked_routes, max_cell_size=DEFAULT_CELL_SIZE):
+    """
+    Returns the overlay of a terrain, partitioned the first time it is needed and customized for the
+    current weather and closed routes.
+
+    Args:
+        graph (Graph): The road network. Tiled graphs aren't partitioned, as it would need every tile in memory.
+        terrain (int): The terrain (Transportation value).
+        weather (Weather): The current weather.
+        blocked_routes (set): The closed routes, as "id1,id2" strings.
+        max_cell_size (int, optional): The most nodes in a cell. Defaults to DEFAULT_CELL_SIZE.
+
+    Returns:
+        tuple: The Overlay and the up to date EdgeCostTable of the graph it routes over.
+    """
+    if not isinstance(graph, Graph):
+        raise ValueError("Only graphs held in memory can be partitioned")
+    layer = terrain_layer(graph, terrain, blocked_routes)
+    result = graph.overlays.get(terrain)
+    if result is None or result.layer is not layer:
+        result = graph.overlays[terrain] = Overlay(layer, max_cell_size)
+    return result, result.update(weather, blocked_routes)
@@ -0,0 +1,106 @@
+from array import array
+from weather import WeatherCondition
+
+DEFAULT_BUCKET_HOURS = 0.25  # Forecast conditions are looked up once per bucket of this many hours
+
+class TimeDependentCostTable:
+    """
+    The travel time of every edge of a graph for one vehicle type, as it changes with the forecast weather.
+
+    Time is split in buckets of a fixed length, and the forecast is assumed to hold for the whole of
+    a bucket. For each bucket the table keeps flat arrays indexed by edge id, like EdgeCostTable:
+    the time to travel each edge when leaving in that bucket, at the velocity the vehicle type has
+    under the weather of the node being left (see VehicleType.adjust_velocity), and whether the node
+    the edge leads to is under a storm. Buckets, and the edges leaving a node within a bucket, are
+    only filled in the first time a search needs them, and buckets ending before the departure of a
+    search are dropped, as the time of the simulation only moves forward.
+
+    Attributes:
+        graph (Graph or TiledGraph): The graph whose edges are timed.
+        weather (Weather): The weather and forecast the times are computed from.
+        vehicle_type (VehicleType): The vehicle type whose velocity is used.
+        bucket_hours (float): The length of a bucket, in hours.
+        buckets (dict): (travel times, blocked, prepared node ids) of each bucket filled so far, keyed by bucket index.
+        versions (tuple): The weather and forecast versions the buckets were filled for.
+    """
+    def __init__(self, graph, weather, vehicle_type, bucket_hours=DEFAULT_BUCKET_HOURS):
+        """
+        Creates an empty table.
+
+        Args:
+            graph (Graph or TiledGraph): The graph whose edges are timed.
+            weather (Weather): The weather and forecast the times are computed from.
+            vehicle_type (VehicleType): The vehicle type whose velocity is used.
+            bucket_hours (float, optional): The length of a bucket, in hours. Defaults to DEFAULT_BUCKET_HOURS.
+        """
+        self.graph = graph
+        self.weather = weather
+        self.vehicle_type = vehicle_type
+        self.bucket_hours = bucket_hours
+        self.buckets = {}
+        self.versions = (weather.version, weather.forecast_version)
+
+    def refresh(self, departure=0):
+        """
+        Forgets every bucket if the weather or the forecast changed since they were filled, and the
+        buckets ending before a departure otherwise.
+
+        Args:
+            departure (float, optional): The time a search departs at, in hours. Defaults to 0.
+        """
+        versions = (self.weather.version, self.weather.forecast_version)
+        if versions != self.versions:
+            self.buckets = {}
+            self.versions = versions
+            return
+        first = int(departure // self.bucket_hours)
+        for index in [index for index in self.buckets if index < first]:
+            del self.buckets[index]
+
+    def edges_at(self, node, time):
+        """
+        Returns the arrays of the bucket a time falls in, with the edges leaving a node filled in.
+
+        Args:
+            node (Node): The node about to be expanded.
+            time (float): The time the node is left at, in hours.
+
+        Returns:
+            tuple: The travel time (hours) and the blocked flag of each edge, indexed by edge id.
+        """
+        index = int(time // self.bucket_hours)
+        bucket = self.buckets.get(index)
+        if bucket is None:
+            edge_count = self.graph.edge_count
+            bucket = self.buckets[index] = (array('d', bytes(8 * edge_count)), bytearray(edge_count), set())
+        times, blocked, prepared = bucket
+        if node.id not in prepared:
+            start = index * self.bucket_hours
+            condition_at = self.weather.condition_at
+            velocity = self.vehicle_type.adjust_velocity(condition_at(node.position, start))
+            for (neighbour, _), edge in zip(node.neighbours, node.edge_ids):
+                length = self.graph.edge_length[edge] / 1000
+                times[edge] = length / velocity if velocity > 0 else float('inf')
+                blocked[edge] = condition_at(neighbour.position, start) == WeatherCondition.STORM
+            prepared.add(node.id)
+        return times, blocked
+
+def td_cost_table(graph, weather, vehicle_type, departure=0):
+    """
+    Returns the time-dependent cost table of a graph for a vehicle type, building it the first time
+    and emptying it when the weather changed since it was last used.
+
+    Args:
+        graph (Graph or TiledGraph): The graph whose edges are timed.
+        weather (Weather): The weather and forecast the times are computed from.
+        vehicle_type (VehicleType): The vehicle type whose velocity is used.
+        departure (float, optional): The time the search departs at, in hours, before which buckets are dropped.
+
+    Returns:
+        TimeDependentCostTable: The up to date table.
+    """
+    table = graph.td_cost_tables.get(vehicle_type)
+    if table is None or table.weather is not weather:
+        table = graph.td_cost_tables[vehicle_type] = TimeDependentCostTable(graph, weather, vehicle_type)
+    table.refresh(departure)
+    return table
@@ -1,64 +1,61 @@
-import json
-from end_point import EndPoint
-from geography.geography import load_map_data_to_graph
-from graph.position import Position
-from start_point import StartPoint
-from supply import Supply, SupplyType
-from vehicle import Vehicle, VehicleStatus, VehicleType
+import time
+
+from geography.geography import load_map_data_to_graph, load_tiled_graph
+from graph.contraction import enable_contraction
+from metrics import DATASET_LOADS
+from scenario import read_dataset
+from vehicle_registry import VehicleRegistry
 from weather import Weather, WeatherCondition
 
 class State:
     """
     Represents the current state of the simulation, including time, vehicles, start point, end points, 
     geographical graph, and weather conditions.
+    The vehicles are kept in a VehicleRegistry, indexed for the queries of the searches.
+    There may be several start points (depots), each with its own supplies and the vehicles whose
+    depot is its index; start_point is the first of them.
     """
-    def __init__(self, time, vehicles, start_point, end_points, graph, weather):
+    def __init__(self, time, vehicles, start_points, end_points, graph, weather):
         self.time = time
-        self.vehicles = vehicles
-        self.start_point = start_point
+        self.vehicles = vehicles if isinstance(vehicles, VehicleRegistry) else VehicleRegistry(vehicles)
+        # A single start point is the only depot
+        self.start_points = start_points if isinstance(start_points, list) else [start_points]
+        self.start_point = self.start_points[0]
         self.end_points = end_points
         self.graph = graph
         self.weather = weather
 
-def load_dataset(dataset_path):
+def load_dataset(dataset_path, contract=False):
     """
     Loads and processes the dataset to initialize the state of the simulation.
     
-    :param dataset_path: Path to the JSON dataset file
+    :param dataset_path: Path to the JSON dataset file, or to a streaming scenario file (see scenario.py).
+                         Its geography is either the name of a single place or a list of places.
+    :param contract: Whether routes between the start and end points are searched on the road network with its
+                     chains of degree-2 nodes contracted (see graph.contraction). Tiled maps aren't contracted.
     :return: An instance of the State class representing the simulation state
     """
-    with open(dataset_path, 'r') as file:
-        dataset = json.load(file)
-
-    geography = dataset['geography']
-    graph = load_map_data_to_graph(geography)
-    weather = Weather()
-
-    for node in graph.nodes.values():    
-        weather.set_condition(Position(node.position.x, node.position.y), WeatherCondition.SUNNY)
-
-    start_position = Position(*dataset['start_point']['position'])
-    supplies = [Supply(s['quantity'], SupplyType[s['type']]) for s in dataset['start_point']['supplies']]
-    start_point = StartPoint(start_position, supplies)
-
-    end_points = [EndPoint(Position(*ep['position']), ep['needs_supplies'], ep['priority']) for ep in dataset['end_points']]
-
-    vehicles = []
-    for vehicle in dataset['vehicles']:
-        vehicle_position = Position(*vehicle['position'])
-        vehicle_type = VehicleType(
-            vehicle['type']['name'],
-            vehicle['type']['transportation'],
-            vehicle['type']['fuel_capacity'],
-            vehicle['type']['weight_capacity'],
-            vehicle['type']['volume_capacity'],
-            vehicle['type']['average_velocity']
-        )
-        vehicle = Vehicle(
-            vehicle['id'], vehicle_position, vehicle_type, vehicle['current_fuel'],
-            vehicle['current_weight'], vehicle['current_volume'], VehicleStatus[vehicle['status']]
-        )
-        vehicles.append(vehicle)
-
-    return State(0, vehicles, start_point, end_points, graph, weather)
-
+    started = time.perf_counter()
+    scenario = read_dataset(dataset_path)
+
+    if isinstance(scenario.geography, list):
+        # A region spanning several places is loaded as tiles, paged in as they are searched.
+        # The tiles around the start and end points are paged in now, so there is something to display.
+        graph = load_tiled_graph(scenario.geography)
+        for point in scenario.start_points + scenario.end_points:
+            graph.nodes.get(point.position)
+    else:
+        graph = load_map_data_to_graph(scenario.geography)
+        if contract:
+            enable_contraction(graph, [point.position for point in scenario.start_points + scenario.end_points])
+    # Air vehicles fly straight between nodes, around the no-fly zones of the dataset
+    graph.no_fly_zones = scenario.no_fly_zones
+
+    # Every node starts out sunny, then follows the forecast of the dataset if it has one
+    weather = Weather(WeatherCondition.SUNNY)
+    if scenario.forecast:
+        weather.load_forecast(scenario.forecast)
+
+    state = State(0, scenario.vehicles, scenario.start_points, scenario.end_points, graph, weather)
+    DATASET_LOADS.observe(time.perf_counter() - started, ("tiles" if isinstance(scenario.geography, list) else "map",))
+    return state
@@ -1,23 +1,25 @@
-from algorithms.informed import heuristics
 from graph.position import Position
-from ui.viewer import Viewer
-import tkinter as tk
-from algorithms.uninformed.bfs import bfs_supply_delivery
-from algorithms.uninformed.dfs import dfs_supply_delivery
-from algorithms.uninformed.iterative_deepening import ids_supply_delivery
-from algorithms.uninformed.uniform_cost import ucs_supply_delivery
-from algorithms.informed.greedy import greedy_supply_delivery
-from algorithms.informed.a_star import a_star_supply_delivery
+from algorithms.delivery import commit_plan
+from algorithms.depots import nearest_depot
+from algorithms.k_shortest import k_shortest_routes
+from algorithms.registry import supply_plan
+from algorithms.route_cache import route_cache
+from algorithms.trace import TraceRecorder, start_trace, stop_trace
+from graph.layers import terrain_graph
 from load_dataset import load_dataset
+from metrics import DEFAULT_METRICS_PORT, serve_metrics
 
+from supply import Inventory
 from vehicle import VehicleStatus
 from weather import Weather, WeatherCondition
 
 algorithm = "bfs"  # Default algorithm
 app = None
 state = None
-heuristic = "manhattan_heuristic"  # Default heuristic
+heuristic = "haversine_heuristic"  # Default heuristic
 terrain = 0  # Default terrain
+last_trace = None  # The TraceRecorder of the last search run while recording
+ALTERNATIVE_ROUTES = 5  # Number of routes shown as alternatives
 
 def main():
     """
@@ -27,8 +29,16 @@ def main():
     global algorithm, heuristic, terrain
     global app
     global state
+    # The user interface is only imported by the simulator, not by headless runs importing this module
+    import tkinter as tk
+    from ui.viewer import Viewer
 
     state = load_dataset("data/dataset1.json")
+    try:
+        serve_metrics()
+        print(f"Metrics at http://127.0.0.1:{DEFAULT_METRICS_PORT}/metrics")
+    except OSError as error:
+        print(f"Metrics aren't served: {error}")
 
     root = tk.Tk()
     app = Viewer(
@@ -38,9 +48,11 @@ def main():
         restart_simulation_callback=lambda: restart_simulation(),
         endpoints_callback=lambda: get_endpoints(),
         reposition_vehicles_callback=lambda: reposition_vehicles_to_start(),
-        change_weather_callback=lambda node_id, weather_id: change_weather(node_id, weather_id)
+        change_weather_callback=lambda node_id, weather_id: change_weather(node_id, weather_id),
+        alternatives_callback=lambda: show_alternatives(),
+        replay_callback=lambda: replay_search()
     )
-    app.display_graph(state.graph, state.start_point, state.end_points, state.vehicles, state.weather)
+    app.display_graph(state.graph, state.start_points, state.end_points, state.vehicles, state.weather)
     app.run()
 
 def set_algorithm(selected_algorithm, blocked_routes, selected_heuristic, selected_terrain):
@@ -63,68 +75,101 @@ def get_endpoints():
     return state.end_points
 
 def run_algorithm(state):
-    global algorithm, heuristic, terrain
-    algorithm_functions = {
-        "bfs": bfs_supply_delivery,
-        "dfs": dfs_supply_delivery,
-        "ids": ids_supply_delivery,
-        "ucs": ucs_supply_delivery,
-        "a_star": lambda state, start, end, terrain, weather, blocked_routes: a_star_supply_delivery(
-            state, start, end, getattr(heuristics, heuristic), terrain, weather, blocked_routes
-        ),
-        "greedy": lambda state, start, end, terrain, weather, blocked_routes: greedy_supply_delivery(
-            state, start, end, getattr(heuristics, heuristic), terrain, weather, blocked_routes
-        ),
-    }
-    selected_function = algorithm_functions.get(algorithm)
+    global algorithm, heuristic, terrain, last_trace
+    # The search is imported the first time its algorithm is run
+    try:
+        selected_function = supply_plan(algorithm, heuristic)
+    except ValueError as error:
+        print(error)
+        return
 
     if selected_function:
 
         selected_end_point = state.end_points[app.selected_end_point_index]
-
-        # Pass blocked_routes as an additional argument
-        path, total_distance, total_time, supplies_info = selected_function(
-            state, 
-            state.start_point, 
-            selected_end_point, 
-            terrain, 
-            state.weather,
-            app.blocked_routes  # Pass blocked routes here
-        )
+        start_point = nearest_depot(state, selected_end_point, terrain, app.blocked_routes)
+
+        recording = app.record_trace
+        if recording:
+            start_trace(TraceRecorder())
+        try:
+            # Pass blocked_routes as an additional argument
+            plan = selected_function(
+                state, 
+                start_point, 
+                selected_end_point, 
+                terrain, 
+                state.weather,
+                app.blocked_routes  # Pass blocked routes here
+            )
+        finally:
+            # A search that failed must not leave every later search recording
+            if recording:
+                last_trace = stop_trace()
+        if recording:
+            print(f"Search trace: {last_trace.step} nodes expanded, {len(last_trace)} records kept")
+        path, total_distance, total_time, supplies_info = commit_plan(state, plan)
+        # The path is animated at the pace of the slowest vehicle carrying supplies
+        vehicle_type = min((vehicle.type for vehicle, vehicle_supplies in plan.loads if vehicle_supplies),
+                           key=lambda vehicle_type: vehicle_type.average_velocity, default=None)
         if path:
             print("Path found.")
         else:
             print("No available path.")
+        cache = route_cache(terrain_graph(state.graph, terrain), state.weather)
+        print(f"Route cache: {cache.hits} hits, {cache.misses} misses ({cache.hit_rate:.0%} hit rate)")
+
+        app.show_info_box(total_distance, total_time)
+    app.draw_path(state.graph, path, profile=plan.profile, vehicle_type=vehicle_type, on_complete=lambda: app.display_graph(state.graph, state.start_points, state.end_points, state.vehicles, state.weather))
 
-        app.show_info_box(total_distance*100, total_time*60)
-    app.draw_path(state.graph, path, on_complete=lambda: app.display_graph(state.graph, state.start_point, state.end_points, state.vehicles, state.weather))
 
+def replay_search():
+    """
+    Replays the trace of the last search run while recording, without running it again.
+    """
+    if last_trace is None:
+        print("No search trace was recorded. Turn recording on in the Trace menu and start the simulation.")
+        return
+    app.replay_trace(last_trace.graph, last_trace.records())
+
+def show_alternatives():
+    """
+    Shows the cheapest alternative routes from the nearest start point to the selected end point, timed
+    for the slowest idle vehicle of the terrain at the start point (or of the fleet if none is idle there).
+    """
+    end_point = state.end_points[app.selected_end_point_index]
+    start_point = nearest_depot(state, end_point, terrain, app.blocked_routes)
+    vehicles = state.vehicles.available(start_point.position, terrain) or \
+        [v for v in state.vehicles if v.type.can_access_terrain(terrain)]
+    vehicle_type = min((v.type for v in vehicles), key=lambda vehicle_type: vehicle_type.average_velocity, default=None)
+    routes = k_shortest_routes(state.graph, state.weather, terrain, app.blocked_routes, start_point.position,
+                               end_point.position, ALTERNATIVE_ROUTES, vehicle_type)
+    print(f"{len(routes)} alternative routes found.")
+    app.draw_routes(state.graph, routes)
 
 def restart_simulation():
     global state
     state = load_dataset("data/dataset1.json")
     print("Simulation restarted.")
-    app.display_graph(state.graph, state.start_point, state.end_points, state.vehicles, state.weather)
+    app.display_graph(state.graph, state.start_points, state.end_points, state.vehicles, state.weather)
 
 def change_weather(node_id, weather_id):
     global state
     for node in state.graph.nodes.values():
         if node.id == int(node_id):
             state.weather.set_condition(Position(node.position.x, node.position.y), list(WeatherCondition)[int(weather_id)])
-    app.display_graph(state.graph, state.start_point, state.end_points, state.vehicles, state.weather)
+    app.display_graph(state.graph, state.start_points, state.end_points, state.vehicles, state.weather)
 
 def reposition_vehicles_to_start():
     global state
-    start_position = state.start_point.position
-
     for vehicle in state.vehicles:
-        vehicle.position = start_position
+        vehicle.position = state.start_points[vehicle.depot].position
         vehicle.vehicle_status = VehicleStatus.IDLE
         vehicle.current_weight = 0
         vehicle.current_volume = 0
+        vehicle.cargo = Inventory()
 
-    print("All vehicles are on the start position.")
-    app.display_graph(state.graph, state.start_point, state.end_points, state.vehicles, state.weather)
+    print("All vehicles are on their start position.")
+    app.display_graph(state.graph, state.start_points, state.end_points, state.vehicles, state.weather)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,277 @@
+"""
+Counters and histograms of the routing and the simulation, exported in the Prometheus text format.
+
+Metrics are recorded into the process-wide registry: a counter increment is a dictionary update
+and a histogram observation a binary search over its bucket bounds, so they stay on under load.
+The registry can be scraped over HTTP (see serve_metrics), dumped as JSON lines (see dump_metrics),
+and merged from other processes (see Registry.drain and Registry.merge), as the workers of the
+routing service do.
+"""
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # Seconds
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)  # Nodes expanded, decisions made...
+DEFAULT_METRICS_PORT = 9464
+
+class Counter:
+    """
+    A value that only goes up, per combination of label values.
+
+    Attributes:
+        name (str): The name of the metric.
+        description (str): What the metric counts.
+        labels (tuple): The names of the labels.
+        values (dict): The value of each tuple of label values.
+    """
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, amount=1, labels=()):
+        """
+        Increases the counter.
+
+        Args:
+            amount (float, optional): How much to increase it by. Defaults to 1.
+            labels (tuple, optional): The label values, in the order of the label names.
+        """
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def state(self):
+        return {"values": [[list(labels), value] for labels, value in self.values.items()]}
+
+    def merge(self, state):
+        for labels, value in state["values"]:
+            self.inc(value, tuple(labels))
+
+    def reset(self):
+        self.values = {}
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(dict(self.values).items()):
+            lines.append(f"{self.name}{label_text(self.labels, labels)} {format_value(value)}")
+        return lines
+
+    def samples(self):
+        return [{"name": self.name, "labels": dict(zip(self.labels, labels)), "value": value}
+                for labels, value in self.values.items()]
+
+class Histogram:
+    """
+    Observations counted in buckets of upper bounds, with their count and sum, per combination of label values.
+
+    Attributes:
+        name (str): The name of the metric.
+        description (str): What the metric observes.
+        labels (tuple): The names of the labels.
+        buckets (tuple): The upper bounds of the buckets, increasing. A last bucket takes everything above.
+        values (dict): The [bucket counts, sum] of each tuple of label values. The counts aren't cumulative.
+    """
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, value, labels=()):
+        """
+        Records an observation.
+
+        Args:
+            value (float): The value observed.
+            labels (tuple, optional): The label values, in the order of the label names.
+        """
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def state(self):
+        return {"buckets": list(self.buckets),
+                "values": [[list(labels), counts, total] for labels, (counts, total) in self.values.items()]}
+
+    def merge(self, state):
+        if tuple(state["buckets"]) != self.buckets:
+            raise ValueError(f"The buckets of {self.name} differ")
+        for labels, counts, total in state["values"]:
+            entry = self.values.get(tuple(labels))
+            if entry is None:
+                entry = self.values[tuple(labels)] = [[0] * (len(self.buckets) + 1), 0]
+            entry[0] = [a + b for a, b in zip(entry[0], counts)]
+            entry[1] += total
+
+    def reset(self):
+        self.values = {}
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(dict(self.values).items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                bucket_labels = label_text(self.labels + ("le",), labels + (format_value(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{label_text(self.labels, labels)} {format_value(total)}")
+            lines.append(f"{self.name}_count{label_text(self.labels, labels)} {cumulative}")
+        return lines
+
+    def samples(self):
+        return [{"name": self.name, "labels": dict(zip(self.labels, labels)), "count": sum(counts), "sum": total,
+                 "buckets": dict(zip(map(format_value, self.buckets + (float('inf'),)), counts))}
+                for labels, (counts, total) in self.values.items()]
+
+class Registry:
+    """
+    The metrics of a process, by name.
+
+    Attributes:
+        metrics (dict): Name -> Counter or Histogram, in the order they were registered.
+    """
+    def __init__(self):
+        self.metrics = {}
+
+    def counter(self, name, description, labels=()):
+        return self.register(Counter(name, description, labels))
+
+    def histogram(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, description, labels, buckets))
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"A metric named {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def exposition(self):
+        """
+        Returns the metrics in the Prometheus text exposition format (version 0.0.4).
+        """
+        return "".join(line + "\n" for metric in self.metrics.values() for line in metric.exposition())
+
+    def samples(self):
+        """
+        Returns the value of every metric and combination of label values, as JSON-serializable dictionaries.
+        """
+        return [sample for metric in self.metrics.values() for sample in metric.samples()]
+
+    def drain(self):
+        """
+        Returns the state of every metric and resets them, so another process can merge it into its own.
+
+        Returns:
+            dict: Name -> state of the metrics recorded since the last drain.
+        """
+        states = {name: metric.state() for name, metric in self.metrics.items() if metric.values}
+        for metric in self.metrics.values():
+            metric.reset()
+        return states
+
+    def merge(self, states):
+        """
+        Adds the state of metrics drained from another process to them.
+        """
+        for name, state in states.items():
+            self.metrics[name].merge(state)
+
+def label_text(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+registry = Registry()
+
+SEARCHES = registry.histogram("routing_search_seconds", "Time taken by route searches.", ("algorithm",))
+EXPANSIONS = registry.histogram("routing_search_expansions", "Nodes expanded by route searches.", ("algorithm",),
+                                COUNT_BUCKETS)
+ROUTE_CACHE_LOOKUPS = registry.counter("routing_route_cache_lookups_total",
+                                       "Lookups in the route cache, by whether they were answered from it.",
+                                       ("result",))
+DATASET_LOADS = registry.histogram("simulation_dataset_load_seconds", "Time taken to load a dataset.", ("kind",),
+                                   (0.1, 0.5, 1, 5, 10, 30, 60, 300))
+DISPATCH_DECISIONS = registry.counter("simulation_dispatch_decisions_total",
+                                      "Deliveries dispatched to end points by the dispatch scheduler.")
+DISPATCH_BATCHES = registry.histogram("simulation_dispatch_batch_seconds",
+                                      "Time taken to dispatch a batch of deliveries.")
+SERVICE_REQUESTS = registry.histogram("service_request_seconds", "Time taken to answer requests to the service.",
+                                      ("endpoint", "status"))
+
+def record_search(algorithm, started, expansions):
+    """
+    Records a finished route search.
+
+    Args:
+        algorithm (str): The name of the search.
+        started (float): The time.perf_counter() value when it started.
+        expansions (int): The number of nodes it expanded.
+    """
+    SEARCHES.observe(time.perf_counter() - started, (algorithm,))
+    EXPANSIONS.observe(expansions, (algorithm,))
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.exposition().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_metrics(port=DEFAULT_METRICS_PORT, host="127.0.0.1"):
+    """
+    Serves the registry for scraping at http://host:port/metrics, from a background thread.
+
+    Returns:
+        ThreadingHTTPServer: The server, stopped with shutdown().
+    """
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def write_metrics(file):
+    """
+    Writes the current value of every metric to a file as one JSON line, with the time.
+    """
+    file.write(json.dumps({"time": time.time(), "metrics": registry.samples()}) + "\n")
+    file.flush()
+
+def dump_metrics(path, interval=10.0):
+    """
+    Appends the metrics to a JSON-lines file every interval seconds, from a background thread.
+
+    Returns:
+        threading.Event: Set it to stop dumping, after a last line is written.
+    """
+    stop = threading.Event()
+
+    def run():
+        with open(path, "a") as file:
+            while not stop.wait(interval):
+                write_metrics(file)
+            write_metrics(file)
+
+    threading.Thread(target=run, daemon=True).start()
+    return stop
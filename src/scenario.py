@@ -0,0 +1,244 @@
+"""
+Streaming, columnar scenario format.
+
+A scenario file holds one JSON record per line, so it can be read one line at a time instead of
+being parsed as a whole:
+
+    {"record": "scenario", "name": ..., "geography": ..., "no_fly_zones": [[min_x, min_y, max_x, max_y], ...]}
+    {"record": "vehicle_types", "name": [...], "transportation": [...], "fuel_capacity": [...], ...}
+    {"record": "start_point", "position": [x, y], "supplies": [{"quantity": ..., "type": ...}, ...]}
+    {"record": "vehicles", "id": [...], "x": [...], "y": [...], "type": [...], "current_fuel": [...], ..., "depot": [...]}
+    {"record": "end_points", "x": [...], "y": [...], "priority": [...], "needs": {"Water": [...], ...}}
+    {"record": "forecast", "regions": [...], "nodes": [...]}
+
+The forecast record is optional and holds the weather forecast of the dataset (see Weather.load_forecast).
+There is a start_point record per depot, in order. The depot column of the vehicles is optional and
+holds the index of the depot each vehicle belongs to; vehicles without one belong to the depot at
+their position, or to the first depot.
+
+Vehicles and end points are stored as columns, in chunks of a fixed number of rows, and vehicles
+refer to their type by its row in the vehicle_types table, so every vehicle type is stored and
+loaded only once however many vehicles share it.
+"""
+
+import json
+import numpy as np
+import sys
+from end_point import EndPoint
+from graph.position import Position
+from start_point import StartPoint
+from supply import SUPPLY_INDEX, SUPPLY_TYPES, Inventory, SupplyType, inventory_from_names, inventory_from_supplies
+from vehicle import Vehicle, VehicleStatus, VehicleType
+
+SCENARIO_EXTENSION = ".ndjson"
+VEHICLE_TYPE_FIELDS = ("name", "transportation", "fuel_capacity", "weight_capacity", "volume_capacity", "average_velocity")
+VEHICLE_FIELDS = ("id", "x", "y", "type", "current_fuel", "current_weight", "current_volume", "status")
+
+class Scenario:
+    """
+    The contents of a dataset, before the map of its geography is loaded.
+    """
+    def __init__(self, name, geography, start_points, end_points, vehicles, forecast=None, no_fly_zones=()):
+        self.name = name
+        self.geography = geography
+        self.start_points = start_points
+        self.end_points = end_points
+        self.vehicles = vehicles
+        self.forecast = forecast
+        self.no_fly_zones = no_fly_zones
+
+class Interner:
+    """
+    Hands out a single shared object per distinct key, so equal positions and vehicle types are only held once.
+    """
+    def __init__(self):
+        self.positions = {}
+        self.vehicle_types = {}
+
+    def position(self, x, y):
+        position = self.positions.get((x, y))
+        if position is None:
+            position = self.positions[(x, y)] = Position(x, y)
+        return position
+
+    def vehicle_type(self, name, transportation, fuel_capacity, weight_capacity, volume_capacity, average_velocity):
+        key = (name, transportation, fuel_capacity, weight_capacity, volume_capacity, average_velocity)
+        vehicle_type = self.vehicle_types.get(key)
+        if vehicle_type is None:
+            vehicle_type = self.vehicle_types[key] = VehicleType(*key)
+        return vehicle_type
+
+def assign_depots(start_points, vehicles, depots):
+    """
+    Sets the depot of each vehicle: the one given by the dataset, else the depot at its position, else the first.
+
+    :param start_points: The depots of the dataset
+    :param vehicles: The vehicles of the dataset
+    :param depots: The depot index given for each vehicle, None where the dataset gives none
+    """
+    depot_at = {}
+    for index, start_point in enumerate(start_points):
+        depot_at.setdefault(start_point.position, index)
+    for vehicle, depot in zip(vehicles, depots):
+        vehicle.depot = depot if depot is not None else depot_at.get(vehicle.position, 0)
+
+def read_json_dataset(dataset_path):
+    """
+    Reads a dataset in the original JSON format.
+    Several depots are given as a list of start points under "start_points", instead of "start_point".
+
+    :param dataset_path: Path to the JSON dataset file
+    :return: A Scenario with the objects of the dataset
+    """
+    with open(dataset_path, 'r') as file:
+        dataset = json.load(file)
+
+    interner = Interner()
+    start_points = [
+        StartPoint(interner.position(*start_point['position']), inventory_from_supplies(start_point['supplies']))
+        for start_point in dataset.get('start_points', [dataset.get('start_point')])
+    ]
+    end_points = [EndPoint(interner.position(*ep['position']), inventory_from_names(ep['needs_supplies']), ep['priority'])
+                  for ep in dataset['end_points']]
+
+    vehicles = []
+    for vehicle in dataset['vehicles']:
+        vehicle_type = interner.vehicle_type(*(vehicle['type'][field] for field in VEHICLE_TYPE_FIELDS))
+        vehicles.append(Vehicle(
+            vehicle['id'], interner.position(*vehicle['position']), vehicle_type, vehicle['current_fuel'],
+            vehicle['current_weight'], vehicle['current_volume'], VehicleStatus[vehicle['status']]
+        ))
+    assign_depots(start_points, vehicles, [vehicle.get('depot') for vehicle in dataset['vehicles']])
+
+    return Scenario(dataset.get('name'), dataset['geography'], start_points, end_points, vehicles, dataset.get('forecast'),
+                    dataset.get('no_fly_zones', []))
+
+def read_scenario(scenario_path):
+    """
+    Reads a dataset in the streaming scenario format, one record at a time.
+
+    :param scenario_path: Path to the scenario file
+    :return: A Scenario with the objects of the dataset
+    """
+    interner = Interner()
+    name = geography = forecast = None
+    no_fly_zones = []
+    start_points = []
+    depots = []
+    vehicle_types = []
+    end_points = []
+    vehicles = []
+
+    with open(scenario_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record['record']
+
+            if kind == 'scenario':
+                name, geography = record.get('name'), record['geography']
+                no_fly_zones = record.get('no_fly_zones', [])
+            elif kind == 'vehicle_types':
+                vehicle_types.extend(interner.vehicle_type(*row) for row in zip(*(record[field] for field in VEHICLE_TYPE_FIELDS)))
+            elif kind == 'start_point':
+                start_points.append(StartPoint(
+                    interner.position(*record['position']),
+                    inventory_from_supplies(record['supplies'])
+                ))
+            elif kind == 'vehicles':
+                for id, x, y, type_row, fuel, weight, volume, status in zip(*(record[field] for field in VEHICLE_FIELDS)):
+                    vehicles.append(Vehicle(id, interner.position(x, y), vehicle_types[type_row], fuel, weight, volume,
+                                            VehicleStatus[status]))
+                depots.extend(record.get('depot', [None] * len(record['id'])))
+            elif kind == 'end_points':
+                # The needs of the chunk are read as one array, each end point keeping a row of it
+                needs = np.zeros((len(record['x']), len(SUPPLY_TYPES)))
+                for supply_type, column in record['needs'].items():
+                    needs[:, SUPPLY_INDEX[SupplyType[supply_type]]] = [0 if quantity is None else quantity for quantity in column]
+                for row, (x, y, priority) in enumerate(zip(record['x'], record['y'], record['priority'])):
+                    end_points.append(EndPoint(interner.position(x, y), Inventory(needs[row]), priority))
+            elif kind == 'forecast':
+                forecast = {'regions': record.get('regions', []), 'nodes': record.get('nodes', [])}
+            else:
+                raise ValueError(f"Unknown scenario record: {kind}")
+
+    assign_depots(start_points, vehicles, depots)
+    return Scenario(name, geography, start_points, end_points, vehicles, forecast, no_fly_zones)
+
+def read_dataset(dataset_path):
+    """
+    Reads a dataset in either format, chosen by the extension of the file.
+
+    :param dataset_path: Path to a JSON dataset or to a scenario file
+    :return: A Scenario with the objects of the dataset
+    """
+    if dataset_path.endswith(SCENARIO_EXTENSION):
+        return read_scenario(dataset_path)
+    return read_json_dataset(dataset_path)
+
+def chunks(items, chunk_size):
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
+
+def convert_dataset(dataset_path, scenario_path, chunk_size=4096):
+    """
+    Converts a JSON dataset into the streaming scenario format.
+
+    :param dataset_path: Path to the JSON dataset file
+    :param scenario_path: Path of the scenario file to write
+    :param chunk_size: Number of vehicles or end points per record
+    """
+    with open(dataset_path, 'r') as file:
+        dataset = json.load(file)
+
+    with open(scenario_path, 'w', encoding='utf-8') as file:
+        def write(record):
+            file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            file.write('\n')
+
+        write({'record': 'scenario', 'name': dataset.get('name'), 'geography': dataset['geography'],
+               'no_fly_zones': dataset.get('no_fly_zones', [])})
+
+        type_rows = {}
+        for vehicle in dataset['vehicles']:
+            type_rows.setdefault(tuple(vehicle['type'][field] for field in VEHICLE_TYPE_FIELDS), len(type_rows))
+        write(dict({'record': 'vehicle_types'},
+                   **{field: [key[i] for key in type_rows] for i, field in enumerate(VEHICLE_TYPE_FIELDS)}))
+
+        for start_point in dataset.get('start_points', [dataset.get('start_point')]):
+            write({'record': 'start_point', 'position': start_point['position'], 'supplies': start_point['supplies']})
+
+        for chunk in chunks(dataset['vehicles'], chunk_size):
+            depots = {'depot': [v.get('depot') for v in chunk]} if any('depot' in v for v in chunk) else {}
+            write(dict({
+                'record': 'vehicles',
+                'id': [v['id'] for v in chunk],
+                'x': [v['position'][0] for v in chunk],
+                'y': [v['position'][1] for v in chunk],
+                'type': [type_rows[tuple(v['type'][field] for field in VEHICLE_TYPE_FIELDS)] for v in chunk],
+                'current_fuel': [v['current_fuel'] for v in chunk],
+                'current_weight': [v['current_weight'] for v in chunk],
+                'current_volume': [v['current_volume'] for v in chunk],
+                'status': [v['status'] for v in chunk],
+            }, **depots))
+
+        for chunk in chunks(dataset['end_points'], chunk_size):
+            write({
+                'record': 'end_points',
+                'x': [ep['position'][0] for ep in chunk],
+                'y': [ep['position'][1] for ep in chunk],
+                'priority': [ep['priority'] for ep in chunk],
+                'needs': {supply_type.name: [ep['needs_supplies'].get(supply_type.name) for ep in chunk]
+                          for supply_type in SupplyType
+                          if any(supply_type.name in ep['needs_supplies'] for ep in chunk)},
+            })
+
+        if 'forecast' in dataset:
+            write(dict({'record': 'forecast'}, **dataset['forecast']))
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(f"Usage: {sys.argv[0]} <dataset.json> <scenario{SCENARIO_EXTENSION}>")
+        sys.exit(1)
+    convert_dataset(sys.argv[1], sys.argv[2])
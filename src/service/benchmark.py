@@ -0,0 +1,80 @@
+"""
+Benchmark client for the routing service: sends route queries between random nodes from many
+concurrent connections and reports the latency percentiles and the throughput.
+
+Run from the root of the repository, with the service running, with bin/benchmark-service.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def client(host, port, queries, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while queries:
+            payload = queries.pop()
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, "POST", "/route", payload)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run(host, port, concurrency, count, terrain, timeout, seed):
+    reader, writer = await asyncio.open_connection(host, port)
+    _, health = await request(reader, writer, "GET", "/health")
+    writer.close()
+
+    rng = random.Random(seed)
+    nodes = health["nodes"]
+    queries = [{"from": rng.randrange(nodes), "to": rng.randrange(nodes), "terrain": terrain, "timeout": timeout}
+               for _ in range(count)]
+    latencies = []
+    statuses = {}
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, queries, latencies, statuses) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(latencies)} requests over {concurrency} connections in {elapsed:.2f} s")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} requests/s")
+    print(f"Latency p50: {percentile(latencies, 0.50) * 1000:.1f} ms, p99: {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"Statuses: {dict(sorted(statuses.items()))}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the routing service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--terrain", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.concurrency, args.requests, args.terrain, args.timeout, args.seed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Local routing service: answers route and delivery-planning queries over HTTP/JSON.
+
+    POST /route  {"from": 12, "to": [-8.39, 41.56], "terrain": 0, "blocked_routes": ["3,4"], "timeout": 2}
+    POST /plan   {"algorithm": "a_star", "heuristic": "haversine_heuristic", "end_point": 0, "terrain": 0}
+    POST /alternatives  {"from": 12, "to": 42, "terrain": 0, "blocked_routes": ["3,4"], "k": 5}
+    GET  /health
+    GET  /metrics  (Prometheus text format)
+
+Requests are answered by a pool of worker processes sharing the loaded state (see service.worker).
+Requests arriving close together are batched, so a single round trip to a worker answers several
+of them, and every request is answered within its timeout: with 504 if its result isn't ready.
+The metrics the workers record are merged into those of the server after every batch.
+
+Run from the root of the repository with bin/serve.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from metrics import SERVICE_REQUESTS, dump_metrics, registry
+from service import worker
+
+DEFAULT_PORT = 8080
+BATCH_SIZE = 16  # Most requests sent to a worker at once
+BATCH_WINDOW = 0.002  # Seconds a batch waits for more requests before being sent
+DEFAULT_TIMEOUT = 5.0  # Seconds a request may take, unless it asks for less
+MAX_TIMEOUT = 60.0
+MAX_BODY = 1024 * 1024
+ENDPOINTS = {"/route", "/plan", "/alternatives", "/health", "/metrics"}  # Paths requests are counted under
+
+class Batcher:
+    """
+    Groups queued requests into batches and runs each batch on the process pool.
+
+    A batch is sent as soon as it is full or BATCH_WINDOW has passed since its first request, and
+    several batches run at once, one per worker.
+    """
+    def __init__(self, pool):
+        self.pool = pool
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def submit(self, kind, request, timeout):
+        """
+        Queues a request and waits for its answer.
+
+        Returns:
+            tuple: The HTTP status and the JSON response.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((kind, request, time.time() + timeout, future))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return 504, {"error": "Timed out."}
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            window_end = loop.time() + BATCH_WINDOW
+            while len(batch) < BATCH_SIZE:
+                remaining = window_end - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            asyncio.create_task(self.dispatch(batch))
+
+    async def dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results, worker_metrics = await loop.run_in_executor(
+                self.pool, worker.run_batch, [(kind, request, deadline) for kind, request, deadline, _ in batch]
+            )
+            registry.merge(worker_metrics)
+        except Exception as error:
+            results = [(500, {"error": f"{type(error).__name__}: {error}"})] * len(batch)
+        for (_, _, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+async def read_request(reader):
+    """
+    Reads an HTTP/1.1 request.
+
+    Returns:
+        tuple: The method, path, headers and body, or None when the client closed the connection.
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY:
+        raise ValueError("Request body too large.")
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+def write_response(writer, status, response, keep_alive):
+    """
+    Writes a JSON response, or a plain text one if the response is a string.
+    """
+    if isinstance(response, str):
+        body, content_type = response.encode(), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body, content_type = json.dumps(response).encode(), "application/json"
+    writer.write(
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+    )
+
+class RoutingService:
+    """
+    The HTTP front end of the service, running on the asyncio event loop of the server process.
+    """
+    def __init__(self, pool):
+        self.batcher = Batcher(pool)
+
+    async def handle(self, method, path, body):
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok", "nodes": worker.node_count()}
+        if path == "/metrics" and method == "GET":
+            return 200, registry.exposition()
+        kind = path.strip("/")
+        if kind not in worker.HANDLERS:
+            return 404, {"error": f"Unknown endpoint: {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST."}
+        try:
+            request = json.loads(body or b'{}')
+            timeout = min(float(request.get("timeout", DEFAULT_TIMEOUT)), MAX_TIMEOUT)
+        except (ValueError, TypeError, AttributeError) as error:
+            return 400, {"error": f"Invalid request: {error}"}
+        return await self.batcher.submit(kind, request, timeout)
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except (ValueError, asyncio.IncompleteReadError) as error:
+                    write_response(writer, 400, {"error": str(error) or "Malformed request."}, False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                started = time.perf_counter()
+                status, response = await self.handle(method, path, body)
+                endpoint = path if path in ENDPOINTS else "other"
+                SERVICE_REQUESTS.observe(time.perf_counter() - started, (endpoint, status))
+                write_response(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        self.batcher.start()
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        print(f"Routing service listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves route and delivery-planning queries over HTTP.")
+    parser.add_argument("dataset", nargs="?", default="data/dataset1.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--metrics-jsonl", help="Also append the metrics to this JSON-lines file periodically")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="Seconds between metrics lines")
+    parser.add_argument("--contract", action="store_true",
+                        help="Plan deliveries on the road network with its chains of degree-2 nodes contracted")
+    args = parser.parse_args()
+
+    worker.load(args.dataset, args.contract)
+    # Forked workers share the state loaded above instead of loading their own. They start with empty
+    # metrics, so that what the server recorded before the fork isn't merged back into it.
+    with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("fork"),
+                             initializer=registry.drain) as pool:
+        # With fork, the first task starts every worker, before the event loop starts any thread
+        pool.submit(worker.node_count).result()
+        if args.metrics_jsonl:
+            dump_metrics(args.metrics_jsonl, args.metrics_interval)
+        asyncio.run(RoutingService(pool).serve(args.host, args.port))
+
+if __name__ == '__main__':
+    main()
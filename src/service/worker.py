@@ -0,0 +1,184 @@
+"""
+The routing work done by the processes of the service's pool.
+
+The state is loaded once by the server process before the pool is started. The pool forks its
+workers, so they all share the pages of the graph (and of the cost tables and layers warmed up
+before the fork) with the server instead of each loading or unpickling a copy. Workers treat the
+shared state as read-only: delivery plans are computed without being committed to it.
+"""
+
+import time
+
+import numpy as np
+
+from algorithms.depots import nearest_depot
+from algorithms.k_shortest import k_shortest_routes
+from algorithms.registry import SEARCHES, supply_plan
+from algorithms.shortest_path import hierarchical_route, shortest_route
+from graph.contraction import contracted_search
+from graph.edge_costs import edge_cost_table
+from graph.graph import Graph
+from graph.layers import terrain_layer
+from graph.partition import overlay
+from graph.position import Position
+from load_dataset import load_dataset
+from metrics import registry
+from vehicle import Transportation
+
+MAX_ALTERNATIVES = 20  # Most alternative routes a query may ask for
+
+state = None
+node_positions = []  # Position of each node, indexed by node id
+node_xs = node_ys = None  # Coordinates of each node, indexed by node id, to find the node nearest to a position
+
+class RequestError(Exception):
+    """
+    Raised for requests that can't be answered, reported to the client with status 400.
+    """
+
+def load(dataset_path, contract=False):
+    """
+    Loads the state served by the workers and warms up the caches shared with them.
+
+    Must be called in the server process before the pool is started.
+
+    Args:
+        dataset_path (str): Path to the dataset (see load_dataset).
+        contract (bool, optional): Whether plans search the contracted road network (see load_dataset).
+    """
+    global state, node_positions, node_xs, node_ys
+    state = load_dataset(dataset_path, contract)
+    nodes = list(state.graph.nodes.values())
+    node_positions = [None] * (max(node.id for node in nodes) + 1)
+    for node in nodes:
+        node_positions[node.id] = node.position
+    node_xs = np.array([p.x if p else np.nan for p in node_positions])
+    node_ys = np.array([p.y if p else np.nan for p in node_positions])
+
+    # Built before the fork, so every worker reads the same pages
+    edge_cost_table(state.graph, state.weather)
+    for terrain in Transportation:
+        layer = terrain_layer(state.graph, terrain.value, set())
+        edge_cost_table(layer.graph, state.weather)
+        if isinstance(state.graph, Graph):
+            # Route queries search the overlay, partitioned and customized once here
+            overlay(state.graph, terrain.value, state.weather, set())
+        depot = state.start_point.position
+        contracted_search(state.graph, terrain.value, state.weather, set(), depot, depot)
+    # The searches too, rather than by each worker on its first plan
+    for algorithm in SEARCHES:
+        supply_plan(algorithm, "haversine_heuristic")
+
+def node_count():
+    return len(state.graph.nodes)
+
+def resolve_position(value):
+    """
+    Maps a node id, or an [x, y] position snapped to its nearest node, to the position of a node.
+    """
+    if isinstance(value, int):
+        if not 0 <= value < len(node_positions) or node_positions[value] is None:
+            raise RequestError(f"Unknown node: {value}")
+        return node_positions[value]
+    if isinstance(value, list) and len(value) == 2:
+        position = Position(*value)
+        if position in state.graph.nodes:
+            return position
+        return node_positions[int(np.nanargmin((node_xs - position.x) ** 2 + (node_ys - position.y) ** 2))]
+    raise RequestError(f"Expected a node id or an [x, y] position, got: {value!r}")
+
+def algorithm_function(algorithm, heuristic):
+    """
+    Returns the delivery planning search of an algorithm, with the same names as in main.
+
+    Raises:
+        RequestError: If the algorithm or heuristic is unknown.
+    """
+    try:
+        return supply_plan(algorithm, heuristic)
+    except ValueError as error:
+        raise RequestError(str(error))
+
+def route(request):
+    """
+    Answers a route query: {"from": node, "to": node, "terrain": 0, "blocked_routes": ["id1,id2", ...]}.
+    """
+    source = resolve_position(request.get("from"))
+    target = resolve_position(request.get("to"))
+    search = hierarchical_route if isinstance(state.graph, Graph) else shortest_route
+    path, distance = search(state.graph, state.weather, request.get("terrain", 0),
+                            set(request.get("blocked_routes", [])), source, target)
+    if path is None:
+        return {"path": None, "message": "No path found."}
+    return {"path": [[p.x, p.y] for p in path], "distance_km": distance}
+
+def plan(request):
+    """
+    Answers a delivery-planning query: {"algorithm": "ucs", "heuristic": "haversine_heuristic",
+    "end_point": 0, "terrain": 0, "blocked_routes": [...], "start_point": 0}. The plan is not applied to
+    the served state. Without a start point, the delivery starts from the depot nearest to the end point.
+    """
+    search = algorithm_function(request.get("algorithm", "ucs"), request.get("heuristic", "haversine_heuristic"))
+    index = request.get("end_point", 0)
+    if not isinstance(index, int) or not 0 <= index < len(state.end_points):
+        raise RequestError(f"Unknown end point: {index}")
+    depot = request.get("start_point")
+    if depot is not None and (not isinstance(depot, int) or not 0 <= depot < len(state.start_points)):
+        raise RequestError(f"Unknown start point: {depot}")
+    terrain = request.get("terrain", 0)
+    blocked_routes = set(request.get("blocked_routes", []))
+    end_point = state.end_points[index]
+    start_point = nearest_depot(state, end_point, terrain, blocked_routes) if depot is None else state.start_points[depot]
+
+    path, total_distance, total_time, supplies_info = search(
+        state, start_point, end_point, terrain, state.weather, blocked_routes
+    ).result()
+    if not path:
+        return {"path": None, "message": supplies_info if isinstance(supplies_info, str) else "No available path."}
+    return {"path": [[p.x, p.y] for p in path], "distance_km": total_distance, "time_hours": total_time,
+            "supplies": {str(vehicle_id): supplies for vehicle_id, supplies in supplies_info.items()}}
+
+def alternatives(request):
+    """
+    Answers an alternative routes query: {"from": node, "to": node, "terrain": 0, "blocked_routes": [...], "k": 5}.
+    Routes are timed for the slowest vehicle type of the terrain, as vehicles travel together.
+    """
+    source = resolve_position(request.get("from"))
+    target = resolve_position(request.get("to"))
+    k = request.get("k", 5)
+    if not isinstance(k, int) or not 1 <= k <= MAX_ALTERNATIVES:
+        raise RequestError(f"k must be between 1 and {MAX_ALTERNATIVES}")
+    terrain = request.get("terrain", 0)
+    vehicle_type = min((v.type for v in state.vehicles if v.type.can_access_terrain(terrain)),
+                       key=lambda vehicle_type: vehicle_type.average_velocity, default=None)
+    routes = k_shortest_routes(state.graph, state.weather, terrain, set(request.get("blocked_routes", [])),
+                               source, target, k, vehicle_type)
+    return {"routes": [{"path": [[p.x, p.y] for p in path], "distance_km": distance, "time_hours": time}
+                       for path, distance, time in routes]}
+
+HANDLERS = {"route": route, "plan": plan, "alternatives": alternatives}
+
+def run_batch(batch):
+    """
+    Answers a batch of requests in a worker process.
+
+    Args:
+        batch (list): (kind, request, deadline) triples, deadline being a time.time() value.
+
+    Returns:
+        tuple: A (status, response) pair per request, and the metrics recorded by the worker since its last
+               batch (see metrics.Registry.drain). Requests whose deadline passed before they were started
+               are skipped with status 504, their client has already been answered.
+    """
+    results = []
+    for kind, request, deadline in batch:
+        if time.time() > deadline:
+            results.append((504, {"error": "Timed out."}))
+            continue
+        try:
+            results.append((200, HANDLERS[kind](request)))
+        except RequestError as error:
+            results.append((400, {"error": str(error)}))
+        except Exception as error:
+            results.append((500, {"error": f"{type(error).__name__}: {error}"}))
+    return results, registry.drain()
@@ -1,6 +1,7 @@
 class StartPoint:
     """
     Represents the start point of the simulation, including its position and initial supplies.
+    The supplies are an Inventory of the quantity held of each supply type.
     """
     def __init__(self, position, supplies):
         self.position = position
@@ -0,0 +1,86 @@
+"""
+Benchmark of the startup time of every entry point: the time to import its module in a fresh
+interpreter, and the heavy dependencies the import pulls in.
+
+Each import runs in a new process with -X importtime, so nothing is shared between runs besides
+the operating system's file cache. The wall time includes the interpreter's own startup, which is
+measured on its own as a baseline.
+
+Run from the root of the repository with bin/benchmark-startup.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# The module each entry point imports first, by the bin script that runs it
+ENTRY_POINTS = {
+    "run": "main",
+    "serve": "service.server",
+    "robustness": "algorithms.robustness",
+    "convert-scenario": "scenario",
+    "benchmark-dispatch": "algorithms.dispatch_benchmark",
+    "benchmark-depots": "algorithms.depots_benchmark",
+    "benchmark-heap": "algorithms.heap_benchmark",
+    "benchmark-service": "service.benchmark",
+}
+# Dependencies worth deferring until they are used
+HEAVY_MODULES = ("osmnx", "networkx", "geopandas", "shapely", "pandas", "tkinter", "PIL", "numpy")
+
+def import_profile(module):
+    """
+    Imports a module in a fresh interpreter.
+
+    Returns:
+        tuple: The wall time of the process in seconds, and the cumulative import time in seconds of
+               every module imported, the entry point's own module included.
+    """
+    environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], env=environment,
+                             stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr[-2000:]}")
+
+    modules = {}
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.split("|")
+        if line.startswith("import time:") and len(fields) == 3 and fields[1].strip().isdigit():
+            modules[fields[2].strip()] = int(fields[1]) / 1e6
+    return elapsed, modules
+
+def run(entry_points, repeats, budget):
+    baseline = min(import_profile("sys")[0] for _ in range(repeats))
+    print(f"interpreter startup: {baseline * 1000:.0f} ms")
+    print(f"{'entry point':20s} {'wall':>8s} {'imports':>8s}  heavy dependencies loaded")
+    over_budget = []
+    for name in entry_points:
+        module = ENTRY_POINTS[name]
+        elapsed, modules = min((import_profile(module) for _ in range(repeats)), key=lambda run: run[0])
+        heavy = [f"{package} ({modules[package] * 1000:.0f} ms)" for package in HEAVY_MODULES if package in modules]
+        print(f"{name:20s} {elapsed * 1000:6.0f}ms {modules.get(module, 0) * 1000:6.0f}ms  {', '.join(heavy) or '-'}")
+        if budget is not None and elapsed > budget:
+            over_budget.append(name)
+    if over_budget:
+        print(f"Over the budget of {budget * 1000:.0f} ms: {', '.join(over_budget)}")
+    return not over_budget
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the import time of every entry point.")
+    parser.add_argument("entry_points", nargs="*", metavar="entry_point",
+                        help=f"The entry points to measure, of {', '.join(ENTRY_POINTS)}. Defaults to all of them.")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs of each import, the fastest is reported")
+    parser.add_argument("--budget", type=float, help="Exit with an error if an entry point takes more seconds")
+    args = parser.parse_args()
+    unknown = [name for name in args.entry_points if name not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"Unknown entry points: {', '.join(unknown)}")
+    if not run(args.entry_points or list(ENTRY_POINTS), args.repeats, args.budget):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+import numpy as np
 from enum import Enum
 
 class SupplyType(Enum):
@@ -29,4 +30,103 @@ class Supply:
     """
     def __init__(self, quantity, type):
         self.quantity = quantity
-        self.type = type
\ No newline at end of file
+        self.type = type
+
+SUPPLY_TYPES = list(SupplyType)  # The supply type of each slot of an inventory
+SUPPLY_INDEX = {supply_type: index for index, supply_type in enumerate(SUPPLY_TYPES)}
+UNIT_WEIGHTS = np.array([get_weight_volume_per_supply(supply_type)[0] for supply_type in SUPPLY_TYPES], dtype=float)
+UNIT_VOLUMES = np.array([get_weight_volume_per_supply(supply_type)[1] for supply_type in SUPPLY_TYPES], dtype=float)
+
+class Inventory:
+    """
+    Quantities of every supply type, as a fixed-width vector indexed like SupplyType.
+
+    Start points keep the supplies they hold in an inventory, end points the supplies they still
+    need and vehicles the supplies they carry, so supply accounting is array arithmetic.
+    Operations that change an inventory do so in place, so an inventory can be a row of a larger
+    array (e.g. the needs of every end point of a scenario).
+    """
+    def __init__(self, quantities=None):
+        """
+        Args:
+            quantities (array, optional): The quantity of each supply type, indexed like SUPPLY_TYPES.
+                                          Defaults to no supplies. An array of floats is used as is.
+        """
+        if quantities is None:
+            quantities = np.zeros(len(SUPPLY_TYPES))
+        elif not isinstance(quantities, np.ndarray) or quantities.dtype != float:
+            quantities = np.array(quantities, dtype=float)
+        self.quantities = quantities
+
+    def __getitem__(self, supply_type):
+        return self.quantities[SUPPLY_INDEX[supply_type]]
+
+    def __setitem__(self, supply_type, quantity):
+        self.quantities[SUPPLY_INDEX[supply_type]] = quantity
+
+    def copy(self):
+        return Inventory(self.quantities.copy())
+
+    def total(self):
+        return float(self.quantities.sum())
+
+    def weight(self):
+        return float(self.quantities @ UNIT_WEIGHTS)
+
+    def volume(self):
+        return float(self.quantities @ UNIT_VOLUMES)
+
+    def items(self):
+        """
+        Returns the (SupplyType, quantity) pairs of the supply types with a positive quantity.
+        """
+        return [(SUPPLY_TYPES[index], float(self.quantities[index])) for index in np.flatnonzero(self.quantities > 0)]
+
+    def supplies(self):
+        """
+        Returns the inventory as a list of Supply objects, one per supply type with a positive quantity.
+        """
+        return [Supply(quantity, supply_type) for supply_type, quantity in self.items()]
+
+    def deficit(self, available):
+        """
+        Returns what is missing from another inventory to cover this one.
+        """
+        return Inventory(np.maximum(self.quantities - available.quantities, 0))
+
+    def allocate(self, needed):
+        """
+        Returns what this inventory can send towards the needs of another.
+        """
+        return Inventory(np.minimum(self.quantities, np.maximum(needed.quantities, 0)))
+
+    def add(self, other):
+        self.quantities += other.quantities
+
+    def consume(self, other):
+        """
+        Takes the quantities of another inventory out of this one, down to no supplies.
+        """
+        np.subtract(self.quantities, other.quantities, out=self.quantities)
+        np.maximum(self.quantities, 0, out=self.quantities)
+
+def inventory_from_supplies(supplies):
+    """
+    Builds an inventory from a list of Supply objects or of {"quantity": ..., "type": name} records.
+    """
+    inventory = Inventory()
+    for supply in supplies:
+        if isinstance(supply, Supply):
+            inventory[supply.type] += supply.quantity
+        else:
+            inventory[SupplyType[supply['type']]] += supply['quantity']
+    return inventory
+
+def inventory_from_names(quantities):
+    """
+    Builds an inventory from a dictionary mapping supply type names to quantities.
+    """
+    inventory = Inventory()
+    for name, quantity in quantities.items():
+        inventory[SupplyType[name]] = quantity
+    return inventory
@@ -6,6 +6,8 @@ class GraphCanvas(tk.Canvas):
 
     Attributes:
         scale_factor (float): The current zoom level of the canvas.
+        offset_x (float): The horizontal translation applied by zooming and dragging.
+        offset_y (float): The vertical translation applied by zooming and dragging.
         drag_data (dict): A dictionary to store the starting coordinates for dragging.
 
     Methods:
@@ -20,10 +22,18 @@ class GraphCanvas(tk.Canvas):
         
         drag(event):
             Drags the canvas by calculating the distance moved since the last event.
+
+        to_screen(x, y):
+            Maps an unzoomed canvas coordinate to its current on-screen coordinate.
+
+        visible_region(margin):
+            Returns the rectangle of unzoomed canvas coordinates currently visible.
     """
     def __init__(self, master, **kwargs):
         super().__init__(master, **kwargs)
         self.scale_factor = 1.0  # Initial scale factor
+        self.offset_x = 0.0
+        self.offset_y = 0.0
         self.bind_all("<MouseWheel>", self.zoom)  # Bind mouse wheel event (cross-platform)
         self.bind_all("<Button-4>", self.zoom_linux)  # For Linux scrolling
         self.bind_all("<Button-5>", self.zoom_linux)
@@ -33,18 +43,23 @@ class GraphCanvas(tk.Canvas):
         self.bind("<B1-Motion>", self.drag)
         self.drag_data = {"x": 0, "y": 0}
 
+        self.view_listeners = []  # Called whenever the visible region changes
+
     def zoom(self, event):
         if event.delta:  # For Windows and macOS
-            scale = 1.1 if event.delta > 0 else 0.9
-            self.scale_factor *= scale
-            self.scale("all", event.x, event.y, scale, scale)
-            self.configure(scrollregion=self.bbox("all"))  # Adjust scroll region
+            self.apply_zoom(event.x, event.y, 1.1 if event.delta > 0 else 0.9)
 
     def zoom_linux(self, event):
-        scale = 1.1 if event.num == 4 else 0.9  # For Linux
+        self.apply_zoom(event.x, event.y, 1.1 if event.num == 4 else 0.9)  # For Linux
+
+    def apply_zoom(self, x, y, scale):
         self.scale_factor *= scale
-        self.scale("all", event.x, event.y, scale, scale)
+        # Keep track of the transform so new items can be placed where the zoomed ones are
+        self.offset_x = (self.offset_x - x) * scale + x
+        self.offset_y = (self.offset_y - y) * scale + y
+        self.scale("all", x, y, scale, scale)
         self.configure(scrollregion=self.bbox("all"))  # Adjust scroll region
+        self.notify_view_change()
 
     def start_drag(self, event):
         self.drag_data["x"] = event.x
@@ -56,6 +71,54 @@ class GraphCanvas(tk.Canvas):
         dy = event.y - self.drag_data["y"]
         # Move all items on the canvas
         self.move("all", dx, dy)
+        self.offset_x += dx
+        self.offset_y += dy
+        self.notify_view_change()
         # Update drag data
         self.drag_data["x"] = event.x
         self.drag_data["y"] = event.y
+
+    def reset_view(self):
+        """
+        Forgets the current zoom and drag, used when every item is about to be redrawn.
+        """
+        self.scale_factor = 1.0
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+
+    def to_screen(self, x, y):
+        """
+        Maps an unzoomed canvas coordinate to the coordinate it currently has on screen.
+
+        Args:
+            x (float): The unzoomed x-coordinate.
+            y (float): The unzoomed y-coordinate.
+
+        Returns:
+            tuple: The (x, y) coordinate after the current zoom and drag are applied.
+        """
+        return x * self.scale_factor + self.offset_x, y * self.scale_factor + self.offset_y
+
+    def visible_region(self, margin=0):
+        """
+        Returns the rectangle of unzoomed canvas coordinates that is currently visible.
+
+        Args:
+            margin (float, optional): Fraction of the width and height added around the viewport. Defaults to 0.
+
+        Returns:
+            tuple: The (x1, y1, x2, y2) corners of the visible rectangle.
+        """
+        width, height = self.winfo_width(), self.winfo_height()
+        if width <= 1:  # Not mapped yet, use the requested size
+            width, height = int(self.cget("width")), int(self.cget("height"))
+        margin_x, margin_y = width * margin, height * margin
+        return ((-margin_x - self.offset_x) / self.scale_factor, (-margin_y - self.offset_y) / self.scale_factor,
+                (width + margin_x - self.offset_x) / self.scale_factor, (height + margin_y - self.offset_y) / self.scale_factor)
+
+    def add_view_listener(self, listener):
+        self.view_listeners.append(listener)
+
+    def notify_view_change(self):
+        for listener in self.view_listeners:
+            listener()
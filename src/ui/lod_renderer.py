@@ -0,0 +1,216 @@
+import time
+from math import floor, log2
+from tkinter import CENTER, HIDDEN, NORMAL
+from ui.spatial_index import SpatialIndex
+
+DETAIL_NODE_LIMIT = 1500  # Above this many visible nodes the coarse level of detail is drawn
+MERGE_PIXELS = 8  # When zoomed out, edges are snapped to a grid of roughly this many screen pixels
+FRAME_BUDGET_MS = 12  # Drawing work done per frame before handing control back to Tk
+VIEW_MARGIN = 0.25  # Fraction of the viewport also drawn around it, so short pans draw nothing new
+
+class LodRenderer:
+    """
+    Draws the nodes and edges of a graph on a GraphCanvas, but only those inside the viewport.
+
+    Node and edge coordinates are kept in spatial indexes over the unzoomed canvas coordinates, so
+    every time the view changes only the visible items are looked up. When many nodes are visible
+    (zoomed out) a coarse level of detail is drawn: edges are snapped to a pixel grid and merged,
+    and only closed or blocked edges and nodes with notable weather are drawn individually. Zooming
+    in switches back to every node, weather marker and edge tooltip square. Drawing is spread over
+    several frames so that panning and zooming stay responsive on large graphs.
+
+    Attributes:
+        canvas (GraphCanvas): The canvas to draw on.
+        projection (Projection): The canvas coordinates of the nodes of the graph being drawn.
+        node_coords (dict): Unzoomed canvas coordinates of each node, keyed by node id.
+        edges (dict): The (node id, neighbour id, open) triple of each edge, keyed by route ("id1,id2").
+        edge_colors (dict): The current colour of each edge, keyed by route.
+        node_fills (dict): The current weather colour of each node (None if hidden), keyed by node id.
+        rendered (dict): Canvas item ids of each drawn item, keyed by ("edge" | "node" | "weather" | "merged", key).
+    """
+    def __init__(self, canvas, root, bind_tooltip, edge_sprite):
+        """
+        Initializes a renderer for a canvas.
+
+        Args:
+            canvas (GraphCanvas): The canvas to draw on.
+            root (Tk): The Tk root, used to schedule drawing work.
+            bind_tooltip (function): Called with a canvas tag and a text to attach a tooltip.
+            edge_sprite (function): Returns the image drawn on the midpoint of each edge.
+        """
+        self.canvas = canvas
+        self.root = root
+        self.bind_tooltip = bind_tooltip
+        self.edge_sprite = edge_sprite
+        self.projection = None
+        self.node_coords = {}
+        self.edges = {}
+        self.edge_colors = {}
+        self.node_fills = {}
+        self.node_index = SpatialIndex()
+        self.edge_index = SpatialIndex()
+        self.rendered = {}
+        self.merged_lines = {}
+        self.pending = []
+        self.render_scheduled = False
+        self.generation = 0
+        canvas.add_view_listener(self.request_render)
+
+    def set_graph(self, projection, edges, edge_colors):
+        """
+        Replaces the graph being drawn, indexing its nodes and edges.
+
+        Args:
+            projection (Projection): The canvas coordinates of the nodes of the graph.
+            edges (dict): The (node id, neighbour id, open) triple of each edge, keyed by route.
+            edge_colors (dict): The colour of each edge, keyed by route.
+        """
+        self.clear()
+        self.projection = projection
+        self.node_coords = dict(zip(projection.node_rows, zip(projection.base_x.tolist(), projection.base_y.tolist())))
+        node_coords = self.node_coords
+        self.edges = edges
+        self.edge_colors = dict(edge_colors)
+        self.node_fills = {}
+        self.node_index = SpatialIndex()
+        self.edge_index = SpatialIndex()
+        for node_id, (x, y) in node_coords.items():
+            self.node_index.insert(node_id, x, y)
+        for route, (node_id, neighbour_id, _) in edges.items():
+            x1, y1 = node_coords[node_id]
+            x2, y2 = node_coords[neighbour_id]
+            self.edge_index.insert(route, x1, y1, x2, y2)
+
+    def clear(self):
+        """
+        Removes every drawn item and forgets any pending drawing work.
+        """
+        for items in self.rendered.values():
+            self.canvas.delete(*items)
+        self.rendered = {}
+        self.pending = []
+        self.generation += 1
+
+    def set_edge_color(self, route, color):
+        self.edge_colors[route] = color
+        items = self.rendered.get(("edge", route))
+        if items:
+            self.canvas.itemconfig(items[0], fill=color)
+
+    def set_node_fill(self, node_id, fill):
+        self.node_fills[node_id] = fill
+        items = self.rendered.get(("node", node_id)) or self.rendered.get(("weather", node_id))
+        if items:
+            self.canvas.itemconfig(items[0], fill=fill or "", state=NORMAL if fill else HIDDEN)
+
+    def request_render(self):
+        """
+        Schedules a render on the next frame, coalescing the many events fired while dragging or zooming.
+        """
+        if not self.render_scheduled:
+            self.render_scheduled = True
+            self.root.after(1, self.render)
+
+    def render(self):
+        """
+        Works out which items the current viewport and zoom level need, removes the items that are no
+        longer needed right away and queues the missing ones to be drawn within the frame budget.
+        """
+        self.render_scheduled = False
+        region = self.canvas.visible_region(VIEW_MARGIN)
+        nodes = self.node_index.query(*region)
+        edges = self.edge_index.query(*region)
+
+        wanted = []
+        if len(nodes) <= DETAIL_NODE_LIMIT:
+            wanted.extend(("edge", route) for route in edges)
+            wanted.extend(("node", node_id) for node_id in nodes)
+        else:
+            # Snap edges to a grid that only changes at every doubling of the zoom
+            grid = MERGE_PIXELS / 2 ** floor(log2(self.canvas.scale_factor))
+            self.merged_lines = {}
+            for route in edges:
+                if self.edge_colors[route] != "black":
+                    wanted.append(("edge", route))
+                    continue
+                node_id, neighbour_id, _ = self.edges[route]
+                x1, y1 = self.node_coords[node_id]
+                x2, y2 = self.node_coords[neighbour_id]
+                start = (floor(x1 / grid), floor(y1 / grid))
+                end = (floor(x2 / grid), floor(y2 / grid))
+                if start == end:
+                    continue
+                key = (grid,) + min(start, end) + max(start, end)
+                if key not in self.merged_lines:
+                    self.merged_lines[key] = tuple((cell + 0.5) * grid for cell in start + end)
+                    wanted.append(("merged", key))
+            wanted.extend(("weather", node_id) for node_id in nodes
+                          if self.node_fills.get(node_id) not in (None, "gold"))
+
+        wanted_keys = set(wanted)
+        for key in [key for key in self.rendered if key not in wanted_keys]:
+            self.canvas.delete(*self.rendered.pop(key))
+
+        self.pending = [key for key in reversed(wanted) if key not in self.rendered]
+        self.generation += 1
+        self.draw_pending(self.generation)
+
+    def draw_pending(self, generation):
+        if generation != self.generation:
+            return  # A newer render replaced this one
+        deadline = time.perf_counter() + FRAME_BUDGET_MS / 1000
+        self.projection.update_view(self.canvas)
+        while self.pending and time.perf_counter() < deadline:
+            key = self.pending.pop()
+            self.rendered[key] = self.draw(key)
+
+        # Keep edges under nodes and nodes under the start, end point and vehicle markers
+        self.canvas.tag_lower("square")
+        self.canvas.tag_lower("line")
+        self.canvas.tag_raise("weather")
+        self.canvas.tag_raise("node")
+        self.canvas.tag_raise("marker")
+        self.canvas.tag_raise("path")
+
+        if self.pending:
+            self.root.after(1, lambda: self.draw_pending(generation))
+
+    def draw(self, key):
+        """
+        Creates the canvas items of a single node, edge or merged edge.
+
+        Args:
+            key (tuple): The key of the item, as used in rendered.
+
+        Returns:
+            tuple: The ids of the created canvas items.
+        """
+        kind, value = key
+        node_screen_coords = self.projection.node_screen_coords
+
+        if kind == "edge":
+            node_id, neighbour_id, _ = self.edges[value]
+            x1, y1 = node_screen_coords(node_id)
+            x2, y2 = node_screen_coords(neighbour_id)
+            tag = f"edge:{value}"
+            line = self.canvas.create_line(x1, y1, x2, y2, fill=self.edge_colors[value], tags=(tag, "line"))
+            square = self.canvas.create_image((x1 + x2) / 2, (y1 + y2) / 2, image=self.edge_sprite(),
+                                              anchor=CENTER, tags=(tag, "square"))
+            self.bind_tooltip(tag, f"Edge: {value}")
+            return line, square
+
+        if kind == "merged":
+            x1, y1, x2, y2 = self.merged_lines[value]
+            to_screen = self.canvas.to_screen
+            return (self.canvas.create_line(*to_screen(x1, y1), *to_screen(x2, y2), fill="black", tags=("line",)),)
+
+        x, y = node_screen_coords(value)
+        tag = f"node:{value}"
+        fill = self.node_fills.get(value)
+        weather_oval = self.canvas.create_oval(x - 5, y - 5, x + 5, y + 5, fill=fill or "",
+                                               state=NORMAL if fill else HIDDEN, tags=(tag, "weather"))
+        if kind == "weather":
+            return (weather_oval,)
+        node_oval = self.canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill="blue", tags=(tag, "node"))
+        self.bind_tooltip(tag, f"Node: {value}")
+        return weather_oval, node_oval
@@ -0,0 +1,72 @@
+import numpy as np
+
+class Projection:
+    """
+    Precomputed canvas coordinates of every node of a graph.
+
+    The bounds of the graph and the unzoomed canvas coordinates of its nodes are computed once, when
+    the projection is built. The on-screen coordinates (with the zoom and drag of the canvas applied)
+    are recomputed for all nodes at once, and only when the view of the canvas has changed.
+
+    Attributes:
+        bounds (tuple): The (min_x, max_x, min_y, max_y) bounds of the graph positions.
+        node_rows (dict): A dictionary where keys are node ids and values are their row in the coordinate arrays.
+        position_rows (dict): A dictionary where keys are node positions and values are their row in the coordinate arrays.
+        base_x (np.ndarray): The unzoomed x canvas coordinate of each node.
+        base_y (np.ndarray): The unzoomed y canvas coordinate of each node.
+        screen_x (np.ndarray): The on-screen x canvas coordinate of each node.
+        screen_y (np.ndarray): The on-screen y canvas coordinate of each node.
+        view (tuple): The (scale_factor, offset_x, offset_y) of the canvas the screen coordinates were computed for.
+    """
+    def __init__(self, graph):
+        """
+        Builds the projection of a graph.
+
+        Args:
+            graph (Graph): The graph to project.
+        """
+        nodes = list(graph.nodes.values())
+        xs = np.fromiter((node.position.x for node in nodes), dtype=np.float64, count=len(nodes))
+        ys = np.fromiter((node.position.y for node in nodes), dtype=np.float64, count=len(nodes))
+        self.bounds = (xs.min(), xs.max(), ys.min(), ys.max())
+        self.node_rows = {node.id: row for row, node in enumerate(nodes)}
+        self.position_rows = {node.position: row for row, node in enumerate(nodes)}
+
+        min_x, max_x, min_y, max_y = self.bounds
+        self.base_x = 50 + (xs - min_x) / (max_x - min_x) * 700
+        self.base_y = 50 + (ys - min_y) / (max_y - min_y) * 500
+        self.screen_x = self.base_x
+        self.screen_y = self.base_y
+        self.view = (1.0, 0.0, 0.0)
+
+    def base_coords(self, x, y):
+        """
+        Maps any geographic position (not only node positions) to its unzoomed canvas coordinate.
+
+        Args:
+            x (float): The longitude.
+            y (float): The latitude.
+
+        Returns:
+            tuple: The unzoomed (x, y) canvas coordinate.
+        """
+        min_x, max_x, min_y, max_y = self.bounds
+        return 50 + (x - min_x) / (max_x - min_x) * 700, 50 + (y - min_y) / (max_y - min_y) * 500
+
+    def update_view(self, canvas):
+        """
+        Recomputes the on-screen coordinates of every node if the zoom or drag of the canvas changed.
+
+        Args:
+            canvas (GraphCanvas): The canvas the graph is drawn on.
+        """
+        view = (canvas.scale_factor, canvas.offset_x, canvas.offset_y)
+        if view != self.view:
+            scale_factor, offset_x, offset_y = view
+            self.screen_x = self.base_x * scale_factor + offset_x
+            self.screen_y = self.base_y * scale_factor + offset_y
+            self.view = view
+
+    def node_screen_coords(self, node_id):
+        row = self.node_rows[node_id]
+        return float(self.screen_x[row]), float(self.screen_y[row])
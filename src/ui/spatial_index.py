@@ -0,0 +1,88 @@
+from math import floor
+
+class SpatialIndex:
+    """
+    A uniform grid over canvas coordinates used to quickly find the items inside a rectangle.
+
+    Each item is stored in every cell its bounding box overlaps, so a query only has to look at
+    the cells covered by the queried rectangle instead of at every item.
+
+    Attributes:
+        cell_size (float): The width and height of each grid cell.
+        cells (dict): A dictionary where keys are (column, row) pairs and values are lists of item keys.
+        bounds (dict): A dictionary where keys are item keys and values are their (x1, y1, x2, y2) bounding boxes.
+    """
+    def __init__(self, cell_size=25):
+        """
+        Initializes a new empty spatial index.
+
+        Args:
+            cell_size (float, optional): The width and height of each grid cell. Defaults to 25.
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.bounds = {}
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def cell_range(self, x1, y1, x2, y2):
+        """
+        Returns the ranges of columns and rows covered by a rectangle.
+
+        Args:
+            x1, y1, x2, y2 (float): The corners of the rectangle.
+
+        Returns:
+            tuple: A (columns, rows) pair of ranges.
+        """
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        columns = range(floor(x1 / self.cell_size), floor(x2 / self.cell_size) + 1)
+        rows = range(floor(y1 / self.cell_size), floor(y2 / self.cell_size) + 1)
+        return columns, rows
+
+    def insert(self, key, x1, y1, x2=None, y2=None):
+        """
+        Adds an item to the index. Points are inserted by leaving out the second corner.
+
+        Args:
+            key (hashable): The key identifying the item.
+            x1, y1 (float): The first corner of the bounding box of the item.
+            x2, y2 (float, optional): The second corner of the bounding box of the item.
+        """
+        if x2 is None:
+            x2, y2 = x1, y1
+        self.bounds[key] = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+        columns, rows = self.cell_range(x1, y1, x2, y2)
+        for column in columns:
+            for row in rows:
+                self.cells.setdefault((column, row), []).append(key)
+
+    def query(self, x1, y1, x2, y2):
+        """
+        Finds the items whose bounding boxes intersect a rectangle.
+
+        Args:
+            x1, y1, x2, y2 (float): The corners of the rectangle.
+
+        Returns:
+            set: The keys of the intersecting items.
+        """
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        columns, rows = self.cell_range(x1, y1, x2, y2)
+        # Clamp huge queries (zoomed far out) to the cells that actually exist
+        if len(columns) * len(rows) > len(self.cells):
+            candidates = (key for keys in self.cells.values() for key in keys)
+        else:
+            candidates = (key for column in columns for row in rows for key in self.cells.get((column, row), ()))
+
+        found = set()
+        for key in candidates:
+            if key in found:
+                continue
+            bx1, by1, bx2, by2 = self.bounds[key]
+            if bx1 <= x2 and bx2 >= x1 and by1 <= y2 and by2 >= y1:
+                found.add(key)
+        return found
@@ -2,9 +2,13 @@ from os import path
 from tkinter import *
 from PIL import Image, ImageTk
 from ui.graph_canvas import GraphCanvas
+from ui.lod_renderer import LodRenderer
+from ui.projection import Projection
 import time
 from weather import Weather, WeatherCondition
+from graph.layers import BlockedRoutes
 from graph.position import Position
+from algorithms import trace
 
 algorithms = {
     "bfs": "Breadth-first search",
@@ -13,9 +17,11 @@ algorithms = {
     "ucs": "Uniform-Cost search",
     "a_star": "A* search",
     "greedy": "Greedy search",
+    "td_a_star": "Time-dependent A* search",
 }
 
 heuristics = {
+    "haversine_heuristic": "Haversine Distance",
     "manhattan_heuristic": "Manhattan Distance",
     "time_estimation_heuristic": "Time Estimation",
     "blocked_route_heuristic": "Blocked Route",
@@ -30,13 +36,23 @@ terrains = {
     2: "WATER"
 }
 
+# Colour of each alternative route, from the cheapest
+route_colors = ["green", "orange", "deep sky blue", "magenta", "brown"]
+
+weather_colors = {
+    WeatherCondition.STORM: "dark violet",
+    WeatherCondition.SNOWY: "light sky blue",
+    WeatherCondition.RAINY: "navy",
+    WeatherCondition.SUNNY: "gold",
+}
+
 class Viewer:
     """
     Viewer class that provides the user interface (UI) and graphical rendering for the simulation.
     It allows interaction with the simulation like selecting algorithms, heuristics, blocking routes, and displaying simulation results.
     """
 
-    def __init__(self, root, algorithm_callback, start_simulation_callback, restart_simulation_callback, endpoints_callback, reposition_vehicles_callback, change_weather_callback):
+    def __init__(self, root, algorithm_callback, start_simulation_callback, restart_simulation_callback, endpoints_callback, reposition_vehicles_callback, change_weather_callback, alternatives_callback=None, replay_callback=None):
         self.root = root
         self.algorithm_callback = algorithm_callback
         self.start_simulation_callback = start_simulation_callback
@@ -44,6 +60,9 @@ class Viewer:
         self.endpoints_callback = endpoints_callback
         self.reposition_vehicles_callback = reposition_vehicles_callback
         self.change_weather_callback = change_weather_callback
+        self.alternatives_callback = alternatives_callback
+        self.replay_callback = replay_callback
+        self.record_trace = False  # Whether the searches of the simulation record their trace
         self.selected_end_point_index = 0
 
         root.geometry("1200x600")
@@ -57,7 +76,7 @@ class Viewer:
         self.selected_terrain = list(terrains.keys())[0]
         self.setup_ui()
 
-        self.blocked_routes = set()
+        self.blocked_routes = BlockedRoutes()
 
         end_image_path = path.join(path.dirname(__file__), "..", "assets", "images", "end_position.png")
         self.original_end_point_image = Image.open(end_image_path)
@@ -83,7 +102,11 @@ class Viewer:
         self.tooltip = Label(root, text="", bg="white", fg="black", bd=1, relief=SOLID, padx=5, pady=2)
         self.tooltip.place_forget()
 
-        self.images_on_canvas = []
+        self.sprites = {}  # Resized sprites, keyed by (image name, size)
+        self.tooltip_texts = {}  # Tooltip text of each canvas tag
+        self.displayed_graph = None
+        self.projection = None
+        self.renderer = LodRenderer(self.canvas, root, self.bind_tooltip, lambda: self.get_sprite("square", 5))
 
     def setup_ui(self):
         menu = Menu(self.root)
@@ -127,6 +150,16 @@ class Viewer:
         # Block Route
         menu.add_command(label="● Block Route", command=self.block_route_ui)
 
+        if self.alternatives_callback:
+            menu.add_command(label="⑂ Alternatives", command=self.alternatives_callback)
+
+        if self.replay_callback:
+            trace_menu = Menu(menu, tearoff=0)
+            trace_menu.add_command(label="Stop Recording" if self.record_trace else "Record",
+                                   command=self.toggle_trace)
+            trace_menu.add_command(label="Replay", command=self.replay_callback)
+            menu.add_cascade(label=f"⏺ Trace: {'on' if self.record_trace else 'off'}", menu=trace_menu)
+
         menu.add_command(label="☸ Reposition Vehicles", command=self.reposition_vehicles_callback)
 
         # Weather
@@ -180,6 +213,10 @@ class Viewer:
     def update_menu_label(self):
         self.setup_ui()
 
+    def toggle_trace(self):
+        self.record_trace = not self.record_trace
+        self.update_menu_label()
+
     def show_tooltip(self, event, text):
         self.tooltip.config(text=text)
         self.tooltip.place(x=event.x_root - self.root.winfo_rootx() + 10,
@@ -188,155 +225,218 @@ class Viewer:
     def hide_tooltip(self, event):
         self.tooltip.place_forget()
 
-    def display_graph(self, graph, start_point, end_points, vehicles, weather):
-        self.canvas.delete("all")
-        # Scale function for node positions
-        min_x = min(node.position.x for node in graph.nodes.values())
-        max_x = max(node.position.x for node in graph.nodes.values())
-        min_y = min(node.position.y for node in graph.nodes.values())
-        max_y = max(node.position.y for node in graph.nodes.values())
-
-        def scale(x, y):
-            scaled_x = 50 + (x - min_x) / (max_x - min_x) * 700
-            scaled_y = 50 + (y - min_y) / (max_y - min_y) * 500
-            return scaled_x, scaled_y
-
-        # Draw edges
-        drawn_edges = set()
+    def get_sprite(self, name, size):
+        """
+        Returns a resized sprite, resizing the original image only the first time it is requested.
+
+        Args:
+            name (str): The name of the original image (e.g. "truck", "square").
+            size (int): The width and height of the sprite in pixels.
+
+        Returns:
+            ImageTk.PhotoImage: The cached sprite.
+        """
+        key = (name, size)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            original = getattr(self, f"original_{name}_image")
+            sprite = ImageTk.PhotoImage(original.resize((size, size), Image.BILINEAR))
+            self.sprites[key] = sprite
+        return sprite
+
+    def bind_tooltip(self, tag, text):
+        """
+        Sets the tooltip text of a canvas tag, binding the tooltip events only once per tag.
+
+        Args:
+            tag (str): The canvas tag the tooltip belongs to.
+            text (str): The text to show when hovering the tagged items.
+        """
+        if tag not in self.tooltip_texts:
+            self.canvas.tag_bind(tag, "<Enter>", lambda e, tag=tag: self.show_tooltip(e, self.tooltip_texts[tag]))
+            self.canvas.tag_bind(tag, "<Leave>", self.hide_tooltip)
+        self.tooltip_texts[tag] = text
+
+    def scale(self, x, y):
+        """
+        Maps a geographic position of the displayed graph to its current coordinate on the canvas.
+
+        Args:
+            x (float): The longitude.
+            y (float): The latitude.
+
+        Returns:
+            tuple: The (x, y) canvas coordinate, with the current zoom and drag applied.
+        """
+        return self.canvas.to_screen(*self.projection.base_coords(x, y))
+
+    def edge_color(self, route, open):
+        if route in self.blocked_routes:
+            return "red"
+        return "black" if open else "green"
+
+    def display_graph(self, graph, start_points, end_points, vehicles, weather):
+        """
+        Draws the simulation on the canvas.
+
+        The graph itself is only indexed the first time it is displayed, and its nodes and edges are
+        drawn by the level-of-detail renderer as they come into view. Later calls only touch the canvas
+        items (tagged by node, edge and vehicle id) whose state has changed.
+
+        Args:
+            graph (Graph): The graph to display.
+            start_points (list): The start points (depots) of the simulation.
+            end_points (list): The end points of the simulation.
+            vehicles (list): The vehicles of the simulation.
+            weather (Weather): The current weather conditions.
+        """
+        if graph is not self.displayed_graph:
+            self.draw_graph(graph)
+        self.canvas.delete("path")
+
+        # Recolour the edges whose blocked state changed
+        for route in self.blocked_routes ^ self.displayed_blocked_routes:
+            if route in self.renderer.edges:
+                self.renderer.set_edge_color(route, self.edge_color(route, self.renderer.edges[route][2]))
+        self.displayed_blocked_routes = set(self.blocked_routes)
+
+        # Recolour the nodes whose weather changed
         for node in graph.nodes.values():
-            for neighbour, open in node.neighbours:
-                route = f'{node.id},{neighbour.id}'
-                if route in drawn_edges or f'{neighbour.id},{node.id}' in drawn_edges:
-                    continue
-                drawn_edges.add(route)
-                
-                x1, y1 = scale(node.position.x, node.position.y)
-                x2, y2 = scale(neighbour.position.x, neighbour.position.y)
-                
-                # Draw the line
-                if route in self.blocked_routes:
-                    self.canvas.create_line(x1, y1, x2, y2, fill="red")
-                else:
-                    self.canvas.create_line(x1, y1, x2, y2, fill="black" if open else "green")
-                
-                # Calculate the midpoint of the edge
-                mid_x = (x1 + x2) / 2
-                mid_y = (y1 + y2) / 2
-                
-                # Tooltip information
-                square_image = self.original_square_image.resize((5, 5), Image.BILINEAR)
-                tk_edge_image = ImageTk.PhotoImage(square_image)
-                self.images_on_canvas.append(tk_edge_image)
-                idEdge = self.canvas.create_image(mid_x, mid_y, image=tk_edge_image, anchor=CENTER)
-                edge_text = f"Edge: {node.id},{neighbour.id}"
-
-                # Bind tooltip to the graphical edge ID
-                self.canvas.tag_bind(idEdge, "<Enter>", lambda e, t=edge_text: self.show_tooltip(e, t))
-                self.canvas.tag_bind(idEdge, "<Leave>", self.hide_tooltip)
-        
-        # Draw Weather & Nodes
-        for node in graph.nodes.values():
-            x, y = scale(node.position.x, node.position.y)
-
             node_weather = weather.get_condition(Position(node.position.x, node.position.y))
-        
-            if node_weather == WeatherCondition.STORM:
-                self.canvas.create_oval(x - 5, y - 5, x + 5, y + 5, fill="dark violet") 
-            elif node_weather == WeatherCondition.SNOWY:
-                self.canvas.create_oval(x - 5, y - 5, x + 5, y + 5, fill="light sky blue") 
-            elif node_weather == WeatherCondition.RAINY:
-                self.canvas.create_oval(x - 5, y - 5, x + 5, y + 5, fill="navy")
-            elif node_weather == WeatherCondition.SUNNY:
-                self.canvas.create_oval(x - 5, y - 5, x + 5, y + 5, fill="gold")
-
-            x, y = scale(node.position.x, node.position.y)
-            node_id = self.canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill="blue")
-
-            # Bind tooltip to the graphical edge ID
-            self.canvas.tag_bind(node_id, "<Enter>", lambda e, t="Node: "+str(node.id): self.show_tooltip(e, t))
-            self.canvas.tag_bind(node_id, "<Leave>", self.hide_tooltip)
-
-        # Draw start point
-        x, y = scale(start_point.position.x, start_point.position.y)
-        start_image = self.original_start_point_image.resize((30, 30), Image.BILINEAR)
-        tk_start_image = ImageTk.PhotoImage(start_image)
-        self.images_on_canvas.append(tk_start_image)
-        start_id = self.canvas.create_image(x, y, image=tk_start_image, anchor=CENTER)
-
-        # Tooltip for start point
-        supplies_text = "Contains: \n" + "\n".join(f"{supply.type.name}: {supply.quantity}" for supply in start_point.supplies)
-        self.canvas.tag_bind(start_id, "<Enter>", lambda e, t=supplies_text: self.show_tooltip(e, t))
-        self.canvas.tag_bind(start_id, "<Leave>", self.hide_tooltip)
-
-        # Draw end points
+            if self.displayed_weather.get(node.id) != node_weather:
+                self.displayed_weather[node.id] = node_weather
+                self.renderer.set_node_fill(node.id, weather_colors.get(node_weather))
+
+        # Start points
+        for idx, start_point in enumerate(start_points):
+            tag = f"start_point:{idx}"
+            if not self.canvas.find_withtag(tag):
+                x, y = self.scale(start_point.position.x, start_point.position.y)
+                self.canvas.create_image(x, y, image=self.get_sprite("start_point", 30), anchor=CENTER, tags=(tag, "marker"))
+            supplies_text = f"Depot {idx}\nContains: \n" + "\n".join(f"{supply_type.name}: {quantity:g}" for supply_type, quantity in start_point.supplies.items())
+            self.bind_tooltip(tag, supplies_text)
+
+        # End points
         for idx, end_point in enumerate(end_points):
-            x, y = scale(end_point.position.x, end_point.position.y)
-            
-            if end_point.priority == 1:
-                end_image = self.original_priority_point_image.resize((25, 25), Image.BILINEAR)
-            else:
-                end_image = self.original_end_point_image.resize((30, 30), Image.BILINEAR)
-            
-            tk_end_image = ImageTk.PhotoImage(end_image)
-            self.images_on_canvas.append(tk_end_image)
-            end_id = self.canvas.create_image(x, y, image=tk_end_image, anchor=CENTER)
-
-            self.canvas.create_text(x + 15, y - 15,text=str(idx + 1),fill="black",font=("Arial", 12, "bold"))
-            # Tooltip para os endpoints
+            tag = f"end_point:{idx}"
+            if not self.canvas.find_withtag(tag):
+                x, y = self.scale(end_point.position.x, end_point.position.y)
+                if end_point.priority == 1:
+                    end_image = self.get_sprite("priority_point", 25)
+                else:
+                    end_image = self.get_sprite("end_point", 30)
+                self.canvas.create_image(x, y, image=end_image, anchor=CENTER, tags=(tag, "marker"))
+                self.canvas.create_text(x + 15, y - 15, text=str(idx + 1), fill="black", font=("Arial", 12, "bold"), tags=("marker",))
             needed_supplies_text = "Needed supplies: \n" + "\n".join(
-                f"{supply_type}: {quantity}" for supply_type, quantity in end_point.get_supplies_needed().items()
+                f"{supply_type}: {quantity:g}" for supply_type, quantity in end_point.get_supplies_needed().items()
             )
-            self.canvas.tag_bind(end_id, "<Enter>", lambda e, t=needed_supplies_text: self.show_tooltip(e, t))
-            self.canvas.tag_bind(end_id, "<Leave>", self.hide_tooltip)
-
-        # Draw vehicles
-        i = 1
-        for vehicle in vehicles:
-            x, y = scale(vehicle.position.x + 0.0006 * i, vehicle.position.y)
-
-            if (vehicle.type.transportation == 0):
-                truck_image = self.original_truck_image.resize((20, 20), Image.BILINEAR)
-                tk_vehicle_image = ImageTk.PhotoImage(truck_image)
-            elif (vehicle.type.transportation == 1):
-                drone_image = self.original_drone_image.resize((25, 25), Image.BILINEAR)
-                tk_vehicle_image = ImageTk.PhotoImage(drone_image)
-            elif (vehicle.type.transportation == 2):
-                boat_image = self.original_boat_image.resize((20, 20), Image.BILINEAR)
-                tk_vehicle_image = ImageTk.PhotoImage(boat_image)
-            self.images_on_canvas.append(tk_vehicle_image)
-            vehicle_id = self.canvas.create_image(x, y, image=tk_vehicle_image, anchor=CENTER)
-            i += 1
-
-            # Tooltip for vehicles
+            self.bind_tooltip(tag, needed_supplies_text)
+
+        # Vehicles, only moved when their position changed
+        for i, vehicle in enumerate(vehicles, start=1):
+            tag = f"vehicle:{vehicle.id}"
+            position = (vehicle.position.x + 0.0006 * i, vehicle.position.y)
+            if self.displayed_vehicles.get(vehicle.id) != position:
+                x, y = self.scale(*position)
+                if vehicle.id in self.displayed_vehicles:
+                    self.canvas.coords(tag, x, y)
+                else:
+                    if vehicle.type.transportation == 1:
+                        vehicle_image = self.get_sprite("drone", 25)
+                    elif vehicle.type.transportation == 2:
+                        vehicle_image = self.get_sprite("boat", 20)
+                    else:
+                        vehicle_image = self.get_sprite("truck", 20)
+                    self.canvas.create_image(x, y, image=vehicle_image, anchor=CENTER, tags=(tag, "marker"))
+                self.displayed_vehicles[vehicle.id] = position
+
             vehicle_text = f"Vehicle {vehicle.id} ({vehicle.type.name}) \nFuel: {vehicle.current_fuel}/{vehicle.type.fuel_capacity} \nWeight: {vehicle.current_weight}/{vehicle.type.weight_capacity} \nVolume: {vehicle.current_volume}/{vehicle.type.volume_capacity} \n Average speed: {vehicle.type.average_velocity} km/h"
-            self.canvas.tag_bind(vehicle_id, "<Enter>", lambda e, t=vehicle_text: self.show_tooltip(e, t))
-            self.canvas.tag_bind(vehicle_id, "<Leave>", self.hide_tooltip)
+            self.bind_tooltip(tag, vehicle_text)
+
+        self.renderer.request_render()
+
+    def draw_graph(self, graph):
+        """
+        Clears the canvas, builds the projection of a graph and hands its nodes and edges to the
+        level-of-detail renderer, which draws them as they become visible.
+
+        Args:
+            graph (Graph): The graph to draw.
+        """
+        self.canvas.delete("all")
+        self.canvas.reset_view()
+        self.displayed_graph = graph
+        self.displayed_blocked_routes = set(self.blocked_routes)
+        self.displayed_weather = {}
+        self.displayed_vehicles = {}
+
+        self.projection = Projection(graph)
+
+        edges = {}
+        edge_colors = {}
+        for node in graph.nodes.values():
+            for neighbour, open in node.neighbours:
+                if neighbour.id not in self.projection.node_rows:
+                    continue  # Leads into a tile of a tiled graph that is not in memory
+                route = f'{node.id},{neighbour.id}'
+                if route in edges or f'{neighbour.id},{node.id}' in edges:
+                    continue
+                edges[route] = (node.id, neighbour.id, open)
+                edge_colors[route] = self.edge_color(route, open)
+
+        self.renderer.set_graph(self.projection, edges, edge_colors)
 
     def run(self):
         self.root.mainloop()
 
-    def draw_path(self, graph, positions, on_complete=None):
+    def draw_path(self, graph, positions, on_complete=None, profile=None, vehicle_type=None):
+        """
+        Animates a path segment by segment, all of it in 1.5 seconds.
+
+        Args:
+            graph (Graph or TiledGraph): The graph the path goes through.
+            positions (list): The positions of the path.
+            on_complete (callable, optional): Called once the whole path is drawn.
+            profile (PathProfile, optional): The profile of the path. With a vehicle type, each segment takes
+                                             its share of the travel time of the vehicle, and the time left to
+                                             the end point is shown at the head of the path.
+            vehicle_type (VehicleType, optional): The vehicle type the path is timed for.
+        """
         if not positions or len(positions) < 2:
             print("Error: Path requires at least two positions to draw.")
             return
 
-        min_x = min(node.position.x for node in graph.nodes.values())
-        max_x = max(node.position.x for node in graph.nodes.values())
-        min_y = min(node.position.y for node in graph.nodes.values())
-        max_y = max(node.position.y for node in graph.nodes.values())
+        if graph is not self.displayed_graph:
+            self.draw_graph(graph)
 
-        def scale(x, y):
-            scaled_x = 50 + (x - min_x) / (max_x - min_x) * 700
-            scaled_y = 50 + (y - min_y) / (max_y - min_y) * 500
-            return scaled_x, scaled_y
+        # Look every position up by node id once, so each segment only reads the projection arrays
+        node_ids = [graph.nodes[position].id if position in graph.nodes else None for position in positions]
+        timed = profile is not None and vehicle_type is not None
+        total_time = profile.time(vehicle_type) if timed else 0
+        timed = timed and 0 < total_time < float('inf')
+
+        def path_coords(i):
+            if node_ids[i] is None:
+                return self.scale(positions[i].x, positions[i].y)
+            return self.projection.node_screen_coords(node_ids[i])
 
         def draw_segment(i):
             if i < len(positions) - 1:
-                x1, y1 = scale(positions[i].x, positions[i].y)
-                x2, y2 = scale(positions[i + 1].x, positions[i + 1].y)
-                self.canvas.create_line(x1, y1, x2, y2, fill="green", width=4)
-                # All segments get drawn in 1.5 seconds
-                self.root.after(int((1.5 * 1000) // len(positions)), lambda: draw_segment(i + 1))
+                self.projection.update_view(self.canvas)
+                x1, y1 = path_coords(i)
+                x2, y2 = path_coords(i + 1)
+                # Tagged so the next display_graph call can remove it
+                self.canvas.create_line(x1, y1, x2, y2, fill="green", width=4, tags=("path",))
+                if timed:
+                    # Each segment and the time left are read from the prefix sums of the profile
+                    delay = 1.5 * 1000 * profile.time(vehicle_type, i, i + 1) / total_time
+                    self.canvas.delete("eta")
+                    self.canvas.create_text(x2, y2 - 12, text=f"ETA {profile.time(vehicle_type, i + 1):.2f} h",
+                                            fill="green", font=("Arial", 10, "bold"), tags=("path", "eta"))
+                else:
+                    # All segments get drawn in 1.5 seconds
+                    delay = (1.5 * 1000) // len(positions)
+                self.root.after(int(delay), lambda: draw_segment(i + 1))
             else:
                 if on_complete:
                     time.sleep(1)
@@ -345,6 +445,108 @@ class Viewer:
         # Start drawing the path from the first segment
         draw_segment(0)
 
+    def replay_trace(self, graph, records):
+        """
+        Replays the trace of a search, drawing the nodes it added to its frontier and expanded step by step,
+        at a speed set with a slider.
+
+        Args:
+            graph (Graph or TiledGraph): The graph the search went through, whose node ids the records refer to.
+            records (list): (step, node id, kind, g, h) records, oldest first (see algorithms.trace).
+        """
+        if not records:
+            print("No search trace was recorded.")
+            return
+        if self.displayed_graph is None:
+            self.draw_graph(graph)
+        self.canvas.delete("trace")
+        positions = {node.id: node.position for node in graph.nodes.values()}
+        first_step, last_step = records[0][0], records[-1][0]
+
+        controls = Toplevel(self.root)
+        controls.title("Search Replay")
+        controls.resizable(False, False)
+        speed = Scale(controls, from_=1, to=500, orient=HORIZONTAL, length=250, label="Speed (steps per second)")
+        speed.set(50)
+        speed.pack(padx=10, pady=5)
+        progress = Label(controls, text="", font=("Arial", 10))
+        progress.pack(pady=5)
+        replay = {"next": 0, "step": first_step, "paused": False}
+
+        def toggle_pause():
+            replay["paused"] = not replay["paused"]
+            pause_button.config(text="Resume" if replay["paused"] else "Pause")
+
+        pause_button = Button(controls, text="Pause", command=toggle_pause)
+        pause_button.pack(side=LEFT, padx=10, pady=10)
+        Button(controls, text="Close", command=controls.destroy).pack(side=RIGHT, padx=10, pady=10)
+
+        def draw_step():
+            if not controls.winfo_exists():
+                return
+            if not replay["paused"]:
+                # Steps are drawn every 40 ms, as many as the speed calls for
+                replay["step"] += max(speed.get() * 0.04, 0)
+                self.projection.update_view(self.canvas)
+                i = replay["next"]
+                while i < len(records) and records[i][0] <= replay["step"]:
+                    step, node_id, kind, g, h = records[i]
+                    position = positions.get(node_id)
+                    if position is not None:
+                        x, y = self.scale(position.x, position.y)
+                        radius = 3 if kind == trace.EXPAND else 2
+                        # Tagged so the next display_graph call can remove it
+                        self.canvas.create_oval(x - radius, y - radius, x + radius, y + radius,
+                                                fill="orange" if kind == trace.EXPAND else "light sky blue",
+                                                outline="", tags=("path", "trace"))
+                    i += 1
+                replay["next"] = i
+                progress.config(text=f"Step {min(int(replay['step']), last_step)} of {last_step} "
+                                     f"({i} of {len(records)} records)")
+                if i >= len(records):
+                    return
+            self.root.after(40, draw_step)
+
+        draw_step()
+
+    def draw_routes(self, graph, routes):
+        """
+        Draws ranked alternative routes at once, the cheapest on top, and lists them in an info box.
+
+        Args:
+            graph (Graph or TiledGraph): The graph the routes go through.
+            routes (list): (positions, distance in km, time in hours) triples, cheapest first.
+        """
+        if graph is not self.displayed_graph:
+            self.draw_graph(graph)
+        self.canvas.delete("path")
+        self.projection.update_view(self.canvas)
+
+        for rank in range(len(routes) - 1, -1, -1):
+            positions = routes[rank][0]
+            coords = []
+            for position in positions:
+                node = graph.nodes.get(position)
+                coords.extend(self.scale(position.x, position.y) if node is None
+                              else self.projection.node_screen_coords(node.id))
+            if len(coords) >= 4:
+                # Tagged so the next display_graph call can remove it
+                self.canvas.create_line(*coords, fill=route_colors[rank % len(route_colors)],
+                                        width=6 if rank == 0 else 3, dash=() if rank == 0 else (6, 3), tags=("path",))
+
+        info_box = Toplevel(self.root)
+        info_box.title("Alternative Routes")
+        info_box.resizable(False, False)
+        lines = [f"{rank + 1}. {distance:.2f} km" + ("" if time is None else f", {time:.2f} hours")
+                 for rank, (_, distance, time) in enumerate(routes)]
+        Label(info_box,
+            text="\n".join(lines) if lines else "No route found.",
+            font=("Arial", 12),
+            justify="left",
+            padx=30,
+            pady=20).pack()
+        Button(info_box, text="OK", command=info_box.destroy).pack(pady=10)
+
     def show_info_box(self, total_distance, total_time):
         info_box = Toplevel(self.root)
         info_box.title("Simulation Info")
@@ -1,5 +1,6 @@
 from enum import Enum
 
+from supply import Inventory
 from weather import Weather, WeatherCondition
 
 class VehicleStatus(Enum):
@@ -42,16 +43,30 @@ class VehicleType:
     def can_access_terrain(self, terrain):
         return self.transportation == terrain
 
+# Attributes the vehicle registry indexes vehicles by
+INDEXED_ATTRIBUTES = {"position", "vehicle_status", "current_fuel", "current_weight", "current_volume"}
+
 class Vehicle:
     """
     Class representing an individual vehicle.
-    Includes attributes for tracking the vehicle's current fuel, weight, volume, and status.
+    Includes attributes for tracking the vehicle's current fuel, weight, volume, status and the supplies it carries.
+    Once added to a VehicleRegistry, the vehicle updates the registry whenever those change.
+    The depot is the index of the start point the vehicle belongs to.
     """
-    def __init__(self, id, position, type, current_fuel, current_weight, current_volume, vehicle_status):
+    def __init__(self, id, position, type, current_fuel, current_weight, current_volume, vehicle_status, depot=0):
+        self.registry = None
+        self.fleet_index = None
         self.id = id
         self.position = position
         self.type = type
         self.current_fuel = current_fuel
         self.current_weight = current_weight
         self.current_volume = current_volume
-        self.vehicle_status = vehicle_status
\ No newline at end of file
+        self.vehicle_status = vehicle_status
+        self.cargo = Inventory()
+        self.depot = depot
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in INDEXED_ATTRIBUTES and self.registry is not None:
+            self.registry.update(self)
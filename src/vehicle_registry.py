@@ -0,0 +1,182 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from vehicle import VehicleStatus
+
+MAX_FIT_LOADS = 32  # Most loads whose best capacity fits are kept up to date
+
+class VehicleRegistry:
+    """
+    The vehicles of the simulation, indexed for the queries the searches make.
+
+    Vehicles tell their registry whenever their position, status, fuel or load changes, so the indexes
+    are always up to date:
+    - the vehicles of each (position, status, transportation), sorted by remaining fuel, answer which
+      vehicles can leave a position for a given distance in O(log n) plus the vehicles returned;
+    - the idle vehicles sorted by remaining fuel, with the best fit of their remaining capacity for a
+      load from each position on, answer how well an idle vehicle with enough fuel can carry it in
+      O(log n). The best fits of a load are computed in O(n) the first time it is asked about, then
+      kept up to date as vehicles change: an idle vehicle added or removed at a position only changes
+      the best fits before it, and only until one of them is already as good, so an update usually
+      costs a few steps per load besides moving the list (the best fits of at most MAX_FIT_LOADS loads
+      are kept);
+    - the idle vehicles grouped by velocity answer which idle vehicle is the fastest in O(1).
+
+    It can be used wherever a list of vehicles is expected: iterating it yields the vehicles in the
+    order they were added, which is also the order of every query result.
+
+    Attributes:
+        vehicles (list): The vehicles, in the order they were added.
+        entries (list): The (group, fuel, weight, volume) each vehicle is indexed under, by fleet index.
+        groups (dict): (position, status, transportation) -> sorted list of (fuel, fleet index).
+        idle_by_fuel (list): Sorted list of (fuel, fleet index) of the idle vehicles.
+        idle_by_velocity (defaultdict): Average velocity -> fleet indexes of the idle vehicles.
+        top_velocity (float): The velocity of the fastest idle vehicle, None if it must be found again.
+        fits (dict): (weight, volume) -> best capacity fit of the idle vehicles from each position of idle_by_fuel on,
+                     with a last 0 for none, in the order the loads were first asked about.
+    """
+    def __init__(self, vehicles=()):
+        self.vehicles = []
+        self.entries = []
+        self.groups = {}
+        self.idle_by_fuel = []
+        self.idle_by_velocity = defaultdict(set)
+        self.top_velocity = None
+        self.fits = {}
+        for vehicle in vehicles:
+            self.add(vehicle)
+
+    def __iter__(self):
+        return iter(self.vehicles)
+
+    def __len__(self):
+        return len(self.vehicles)
+
+    def __getitem__(self, index):
+        return self.vehicles[index]
+
+    def add(self, vehicle):
+        vehicle.fleet_index = len(self.vehicles)
+        vehicle.registry = self
+        self.vehicles.append(vehicle)
+        self.entries.append(None)
+        self.index(vehicle)
+
+    def update(self, vehicle):
+        """
+        Moves a vehicle to the indexes matching its current position, status, fuel and load.
+        """
+        entry = self.entries[vehicle.fleet_index]
+        if entry == (self.group_of(vehicle), vehicle.current_fuel, vehicle.current_weight, vehicle.current_volume):
+            return
+        self.unindex(vehicle)
+        self.index(vehicle)
+
+    def group_of(self, vehicle):
+        return vehicle.position, vehicle.vehicle_status, vehicle.type.transportation
+
+    def index(self, vehicle):
+        i = vehicle.fleet_index
+        group = self.group_of(vehicle)
+        self.entries[i] = (group, vehicle.current_fuel, vehicle.current_weight, vehicle.current_volume)
+        insort(self.groups.setdefault(group, []), (vehicle.current_fuel, i))
+        if vehicle.vehicle_status == VehicleStatus.IDLE:
+            position = bisect_left(self.idle_by_fuel, (vehicle.current_fuel, i))
+            self.idle_by_fuel.insert(position, (vehicle.current_fuel, i))
+            for (weight, volume), fits in self.fits.items():
+                fit = self.capacity_fit(i, weight, volume)
+                fits.insert(position, max(fit, fits[position]))
+                # The vehicles with less fuel now have this one among those with enough fuel
+                for before in range(position - 1, -1, -1):
+                    if fits[before] >= fit:
+                        break
+                    fits[before] = fit
+            velocity = vehicle.type.average_velocity
+            self.idle_by_velocity[velocity].add(i)
+            if self.top_velocity is not None and velocity > self.top_velocity:
+                self.top_velocity = velocity
+
+    def unindex(self, vehicle):
+        i = vehicle.fleet_index
+        group, fuel, _, _ = self.entries[i]
+        vehicles = self.groups[group]
+        del vehicles[bisect_left(vehicles, (fuel, i))]
+        if not vehicles:
+            del self.groups[group]
+        if group[1] == VehicleStatus.IDLE:
+            position = bisect_left(self.idle_by_fuel, (fuel, i))
+            del self.idle_by_fuel[position]
+            for (weight, volume), fits in self.fits.items():
+                del fits[position]
+                for before in range(position - 1, -1, -1):
+                    fit = max(self.capacity_fit(self.idle_by_fuel[before][1], weight, volume), fits[before + 1])
+                    if fit == fits[before]:
+                        break
+                    fits[before] = fit
+            velocity = vehicle.type.average_velocity
+            self.idle_by_velocity[velocity].discard(i)
+            if not self.idle_by_velocity[velocity]:
+                del self.idle_by_velocity[velocity]
+                if velocity == self.top_velocity:
+                    self.top_velocity = None
+
+    def available(self, position, transportation, min_fuel=0):
+        """
+        Returns the idle vehicles at a position with the given transportation and at least some fuel.
+
+        Args:
+            position (Position): The position the vehicles must be at.
+            transportation (int): The terrain the vehicles must travel (Transportation value).
+            min_fuel (float, optional): The fuel the vehicles must have at least. Defaults to 0.
+
+        Returns:
+            list: The vehicles, in fleet order.
+        """
+        vehicles = self.groups.get((position, VehicleStatus.IDLE, transportation), [])
+        start = bisect_left(vehicles, (min_fuel, -1))
+        return [self.vehicles[i] for i in sorted(i for _, i in vehicles[start:])]
+
+    def fastest_idle(self):
+        """
+        Returns the fastest idle vehicle, or None if every vehicle is busy.
+        """
+        if not self.idle_by_velocity:
+            return None
+        if self.top_velocity is None:
+            self.top_velocity = max(self.idle_by_velocity)
+        return self.vehicles[next(iter(self.idle_by_velocity[self.top_velocity]))]
+
+    def best_capacity_fit(self, min_fuel, weight, volume):
+        """
+        Scores how well the best idle vehicle with enough fuel can carry a load.
+
+        The fit of a vehicle is the share of the weight it can carry times the share of the volume,
+        each at most 1.
+
+        Args:
+            min_fuel (float): The fuel the vehicles must have at least.
+            weight (float): The weight of the load.
+            volume (float): The volume of the load.
+
+        Returns:
+            float: The best fit, 0 if no idle vehicle has enough fuel.
+        """
+        fits = self.fits.get((weight, volume))
+        if fits is None:
+            if len(self.fits) >= MAX_FIT_LOADS:
+                del self.fits[next(iter(self.fits))]
+            # Best fit of the idle vehicles from each position on, from the most fuel down
+            fits = [0] * (len(self.idle_by_fuel) + 1)
+            for position in range(len(self.idle_by_fuel) - 1, -1, -1):
+                fit = self.capacity_fit(self.idle_by_fuel[position][1], weight, volume)
+                fits[position] = max(fits[position + 1], fit)
+            self.fits[(weight, volume)] = fits
+        return fits[bisect_left(self.idle_by_fuel, (min_fuel, -1))]
+
+    def capacity_fit(self, i, weight, volume):
+        """
+        Returns the share of the weight the vehicle at a fleet index can carry times the share of the volume.
+        """
+        vehicle = self.vehicles[i]
+        weight_factor = min(1, (vehicle.type.weight_capacity - vehicle.current_weight) / weight)
+        volume_factor = min(1, (vehicle.type.volume_capacity - vehicle.current_volume) / volume)
+        return weight_factor * volume_factor
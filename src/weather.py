@@ -1,4 +1,9 @@
+from bisect import bisect_right
+from collections import deque
 from enum import Enum
+from graph.position import Position
+
+MAX_LOGGED_CHANGES = 1 << 16  # Most recent changes kept in the log of a Weather
 
 class WeatherCondition(Enum):
     """
@@ -12,15 +17,108 @@ class WeatherCondition(Enum):
 class Weather:
     """
     Class for managing weather conditions in the simulation.
+    Positions without a condition of their own have the default condition.
+    Every change is logged, so caches built from the weather can catch up with only what changed.
+    The log only keeps the most recent changes; a cache further behind gets every position with a
+    condition of its own instead.
+
+    The weather can also be forecast: a schedule is a list of (time, condition) pairs sorted by time
+    (in hours since the start of the simulation), each condition holding until the next one starts.
+    Schedules are given per position or per rectangular region (e.g. the cells of a forecast grid),
+    and condition_at looks the condition of a position up at any time.
     """
-    def __init__(self):
+    def __init__(self, default=None):
         self.conditions = {}
+        self.default = default
+        self.changes = deque(maxlen=MAX_LOGGED_CHANGES)  # Positions whose condition changed, in order
+        self.version = 0  # The number of changes made so far
+        self.schedules = {}  # Position -> (start times, conditions)
+        self.region_schedules = []  # ((min_x, min_y, max_x, max_y), start times, conditions)
+        self.forecast_version = 0  # Increased whenever a schedule is added
 
     def set_condition(self, position, condition):
+        if self.get_condition(position) != condition:
+            self.changes.append(position)
+            self.version += 1
         self.conditions[position] = condition
 
+    def changes_since(self, version):
+        """
+        Returns the positions whose condition changed since a version, or every position with a
+        condition of its own if the changes since then are no longer all logged.
+        """
+        missed = self.version - version
+        if missed > len(self.changes):
+            return list(self.conditions)
+        # The deque is indexed from its end, which stays fast however long it is
+        return [self.changes[-index] for index in range(missed, 0, -1)]
+
     def get_condition(self, position):
-        return self.conditions.get(position)
+        return self.conditions.get(position, self.default)
     
     def blocked_position(self, position):
-        return self.conditions[position] == WeatherCondition.STORM
\ No newline at end of file
+        return self.get_condition(position) == WeatherCondition.STORM
+
+    def set_schedule(self, position, schedule):
+        """
+        Sets the forecast of a position, which takes precedence over the forecast of its region.
+
+        Args:
+            position (Position): The position the forecast is for.
+            schedule (list): (time, WeatherCondition) pairs sorted by time, in hours.
+        """
+        self.schedules[position] = ([time for time, _ in schedule], [condition for _, condition in schedule])
+        self.forecast_version += 1
+
+    def add_region_schedule(self, bounds, schedule):
+        """
+        Sets the forecast of a rectangular region. When regions overlap the one added last wins.
+
+        Args:
+            bounds (tuple): The (min_x, min_y, max_x, max_y) bounds of the region.
+            schedule (list): (time, WeatherCondition) pairs sorted by time, in hours.
+        """
+        self.region_schedules.append((tuple(bounds), [time for time, _ in schedule], [condition for _, condition in schedule]))
+        self.forecast_version += 1
+
+    def load_forecast(self, forecast):
+        """
+        Adds the schedules of a forecast as stored in a dataset:
+        {"regions": [{"bounds": [...], "schedule": [[time, "STORM"], ...]}], "nodes": [{"position": [x, y], "schedule": [...]}]}
+
+        Args:
+            forecast (dict): The forecast of a dataset.
+        """
+        for region in forecast.get('regions', []):
+            self.add_region_schedule(region['bounds'], [(time, WeatherCondition[name]) for time, name in region['schedule']])
+        for node in forecast.get('nodes', []):
+            self.set_schedule(Position(*node['position']), [(time, WeatherCondition[name]) for time, name in node['schedule']])
+
+    def schedule_of(self, position):
+        schedule = self.schedules.get(position)
+        if schedule is not None:
+            return schedule
+        for (min_x, min_y, max_x, max_y), times, conditions in reversed(self.region_schedules):
+            if min_x <= position.x <= max_x and min_y <= position.y <= max_y:
+                return times, conditions
+        return None
+
+    def condition_at(self, position, time):
+        """
+        Returns the forecast condition of a position at a time. Before the first forecast condition,
+        and at positions without a forecast, it is the current condition of the position.
+
+        Args:
+            position (Position): The position to look up.
+            time (float): The time, in hours since the start of the simulation.
+
+        Returns:
+            WeatherCondition: The condition of the position at that time.
+        """
+        schedule = self.schedule_of(position)
+        if schedule is not None:
+            times, conditions = schedule
+            index = bisect_right(times, time)
+            if index:
+                return conditions[index - 1]
+        return self.get_condition(position)
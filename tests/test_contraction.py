@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from algorithms.contraction_benchmark import road_grid
+from algorithms.shortest_path import shortest_route
+from algorithms.uninformed.uniform_cost import ucs_route
+from end_point import EndPoint
+from graph.contraction import contracted_graph, enable_contraction
+from graph.layers import BlockedRoutes
+from load_dataset import State
+from start_point import StartPoint
+from supply import Inventory
+from weather import Weather, WeatherCondition
+
+def linked(graph, path):
+    return all(any(neighbour.position == b for neighbour, _ in graph.nodes[a].neighbours)
+               for a, b in zip(path, path[1:]))
+
+@pytest.mark.parametrize("two_way", [False, True])
+def test_contracted_routes_cost_the_same_as_on_the_road_network(two_way):
+    rng = random.Random(0)
+    # The same road network twice, only one of them contracted
+    graph = road_grid(6, 4, two_way, seed=1)
+    reference = road_grid(6, 4, two_way, seed=1)
+    positions = list(graph.nodes)
+    keep = rng.sample(positions, 20)
+    enable_contraction(graph, keep)
+    contracted = contracted_graph(graph)
+    assert len(contracted.nodes) < len(graph.nodes) // 2
+
+    weather = Weather(WeatherCondition.SUNNY)
+    blocked_routes = BlockedRoutes()
+    ids = {position: node.id for position, node in graph.nodes.items()}
+    routes = 0
+    for step in range(60):
+        if step % 10 == 0:
+            for position in rng.sample(positions, 15):
+                weather.set_condition(position, rng.choice(list(WeatherCondition)))
+            position = rng.choice(positions)
+            neighbour = graph.nodes[position].neighbours[0][0]
+            blocked_routes.add(f"{ids[position]},{neighbour.id}")
+        source, target = rng.sample(keep, 2)
+        path, cost = shortest_route(graph, weather, 0, blocked_routes, source, target)
+        expected_path, expected_cost = shortest_route(reference, weather, 0, blocked_routes, source, target)
+        assert (path is None) == (expected_path is None)
+        if path is None:
+            continue
+        routes += 1
+        assert cost == pytest.approx(expected_cost, abs=1e-9)
+        # Routes are expanded back to the nodes of the road network
+        assert (path[0], path[-1]) == (source, target)
+        assert linked(graph, path)
+
+        state = State(0, [], StartPoint(source, Inventory()), [], graph, weather)
+        ucs_path, ucs_cost = ucs_route(state, StartPoint(source, Inventory()), EndPoint(target, Inventory(), 0), 0,
+                                       weather, blocked_routes)
+        assert ucs_cost == pytest.approx(expected_cost, abs=1e-9)
+        assert linked(graph, ucs_path)
+    assert routes > 30
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from algorithms.depots_benchmark import grid_graph
+from algorithms.heap import BucketQueue, IndexedHeap, LazyHeap
+
+FRONTIERS = [lambda: IndexedHeap(2), lambda: IndexedHeap(4), LazyHeap]
+
+def dijkstra(frontier, adjacency, source):
+    costs = {}
+    frontier.push(source, 0)
+    while frontier:
+        node, cost = frontier.pop()
+        costs[node] = cost
+        for neighbour, weight in adjacency[node]:
+            if neighbour not in costs:
+                frontier.push(neighbour, cost + weight)
+    return costs
+
+@pytest.mark.parametrize("make_frontier", FRONTIERS)
+def test_decrease_key_lowers_the_priority(make_frontier):
+    frontier = make_frontier()
+    assert frontier.push("a", 5)
+    assert frontier.push("b", 3)
+    assert not frontier.push("a", 7)
+    assert frontier.priority("a") == 5
+    assert frontier.push("a", 1)
+    assert frontier.priority("a") == 1
+    assert len(frontier) == 2
+    assert "a" in frontier and "c" not in frontier
+    assert frontier.pop() == ("a", 1)
+    assert "a" not in frontier
+    assert frontier.pop() == ("b", 3)
+    assert len(frontier) == 0
+
+@pytest.mark.parametrize("make_frontier", FRONTIERS)
+def test_pops_in_priority_order_with_ties_in_push_order(make_frontier):
+    rng = random.Random(0)
+    frontier = make_frontier()
+    expected = {}
+    for key in range(500):
+        priority = rng.randrange(50)
+        frontier.push(key, priority)
+        expected[key] = priority
+    for key in rng.sample(range(500), 200):
+        priority = rng.randrange(50)
+        if frontier.push(key, priority):
+            expected[key] = priority
+        else:
+            assert priority >= expected[key]
+    popped = [frontier.pop() for _ in range(len(frontier))]
+    assert sorted(popped, key=lambda entry: entry[1]) == popped
+    assert dict(popped) == expected
+
+@pytest.mark.parametrize("make_frontier", FRONTIERS)
+def test_ties_go_to_the_key_pushed_last_before_the_key_lowered_last(make_frontier):
+    frontier = make_frontier()
+    frontier.push("a", 2)
+    frontier.push("b", 1)
+    frontier.push("c", 1)
+    frontier.push("a", 1)
+    assert [frontier.pop()[0] for _ in range(3)] == ["b", "c", "a"]
+
+def test_frontiers_find_the_same_costs_on_a_grid():
+    rng = random.Random(1)
+    graph, _ = grid_graph(30)
+    adjacency = {node.id: [(neighbour.id, rng.uniform(0.05, 0.15)) for neighbour, _ in node.neighbours]
+                 for node in graph.nodes.values()}
+    expected = dijkstra(LazyHeap(), adjacency, 0)
+    assert len(expected) == len(adjacency)
+    for make_frontier in FRONTIERS:
+        assert dijkstra(make_frontier(), adjacency, 0) == pytest.approx(expected)
+    # The bucket queue finds each cost within its width per edge
+    quantized = dijkstra(BucketQueue(0.001), adjacency, 0)
+    assert all(abs(quantized[node] - cost) <= 0.001 * 60 for node, cost in expected.items())
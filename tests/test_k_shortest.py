@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from algorithms.depots_benchmark import grid_graph
+from algorithms.k_shortest import k_shortest_routes
+from algorithms.shortest_path import shortest_route
+from graph.position import Position
+from graph.edge_costs import WEATHER_MULTIPLIERS
+from weather import Weather, WeatherCondition
+
+def simple_path_costs(graph, weather, source, target):
+    """
+    Returns the cost of every loopless path between two positions, by enumerating them all.
+    """
+    costs = []
+
+    def extend(node, visited, cost):
+        if node.position == target:
+            costs.append(cost)
+            return
+        for (neighbour, _), edge in zip(node.neighbours, node.edge_ids):
+            if neighbour.position not in visited:
+                multiplier = WEATHER_MULTIPLIERS.get(weather.get_condition(neighbour.position), 1)
+                visited.add(neighbour.position)
+                extend(neighbour, visited, cost + graph.edge_length[edge] / 1000 * multiplier)
+                visited.discard(neighbour.position)
+
+    extend(graph.nodes[source], {source}, 0)
+    return sorted(costs)
+
+@pytest.fixture
+def grid():
+    rng = random.Random(0)
+    graph, positions = grid_graph(4)
+    weather = Weather(WeatherCondition.SUNNY)
+    for position in rng.sample(positions, 5):
+        weather.set_condition(position, rng.choice([WeatherCondition.RAINY, WeatherCondition.SNOWY]))
+    return graph, positions, weather
+
+def test_routes_are_the_cheapest_loopless_paths_in_order(grid):
+    graph, positions, weather = grid
+    source, target = positions[0], positions[-1]
+    routes = k_shortest_routes(graph, weather, 0, set(), source, target, k=12)
+    assert len(routes) == 12
+    costs = [cost for _, cost, _ in routes]
+    assert costs == sorted(costs)
+    assert costs == pytest.approx(simple_path_costs(graph, weather, source, target)[:12])
+    assert costs[0] == pytest.approx(shortest_route(graph, weather, 0, set(), source, target)[1])
+
+    for path, _, _ in routes:
+        assert (path[0], path[-1]) == (source, target)
+        assert len(set(path)) == len(path)
+        assert all(any(neighbour.position == b for neighbour, _ in graph.nodes[a].neighbours)
+                   for a, b in zip(path, path[1:]))
+    assert len({tuple(path) for path, _, _ in routes}) == len(routes)
+
+def test_stops_when_there_are_fewer_routes(grid):
+    graph, positions, weather = grid
+    # Opposite corners of a 2 x 2 grid only have the two routes around it
+    small, small_positions = grid_graph(2)
+    routes = k_shortest_routes(small, weather, 0, set(), small_positions[0], small_positions[-1], k=5)
+    assert len(routes) == 2
+    isolated = Position(0, 0)
+    graph.add_node(isolated, len(graph.nodes))
+    assert k_shortest_routes(graph, weather, 0, set(), positions[0], isolated) == []
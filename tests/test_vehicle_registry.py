@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from graph.position import Position
+from vehicle import Vehicle, VehicleStatus, VehicleType
+from vehicle_registry import VehicleRegistry
+
+POSITIONS = [Position(-8.4 + i * 0.001, 41.5) for i in range(3)]
+TYPES = [VehicleType("Camião", 0, 100, 100, 100, 60), VehicleType("Carrinha", 0, 60, 40, 30, 90),
+         VehicleType("Helicóptero", 1, 80, 20, 10, 200)]
+LOADS = [(10, 10), (50, 20), (150, 200)]
+
+def fleet(rng, size):
+    return [Vehicle(i, rng.choice(POSITIONS), rng.choice(TYPES), rng.randrange(0, 100, 5), rng.randrange(0, 30),
+                    rng.randrange(0, 20), rng.choice(list(VehicleStatus))) for i in range(size)]
+
+def fit(vehicle, weight, volume):
+    return (min(1, (vehicle.type.weight_capacity - vehicle.current_weight) / weight)
+            * min(1, (vehicle.type.volume_capacity - vehicle.current_volume) / volume))
+
+def check(registry, vehicles):
+    idle = [vehicle for vehicle in vehicles if vehicle.vehicle_status == VehicleStatus.IDLE]
+    for position in POSITIONS:
+        for transportation in (0, 1):
+            for min_fuel in (0, 25, 50, 95):
+                assert registry.available(position, transportation, min_fuel) == [
+                    vehicle for vehicle in idle if vehicle.position == position
+                    and vehicle.type.transportation == transportation and vehicle.current_fuel >= min_fuel]
+    for min_fuel in (0, 25, 50, 95):
+        for weight, volume in LOADS:
+            assert registry.best_capacity_fit(min_fuel, weight, volume) == pytest.approx(max(
+                [fit(vehicle, weight, volume) for vehicle in idle if vehicle.current_fuel >= min_fuel], default=0))
+    fastest = registry.fastest_idle()
+    if idle:
+        assert fastest in idle
+        assert fastest.type.average_velocity == max(vehicle.type.average_velocity for vehicle in idle)
+    else:
+        assert fastest is None
+
+def test_indexes_follow_every_attribute_change():
+    rng = random.Random(0)
+    vehicles = fleet(rng, 40)
+    registry = VehicleRegistry(vehicles)
+    assert list(registry) == vehicles
+    check(registry, vehicles)
+    for _ in range(300):
+        vehicle = rng.choice(vehicles)
+        name = rng.choice(["position", "vehicle_status", "current_fuel", "current_weight", "current_volume"])
+        value = {
+            "position": lambda: rng.choice(POSITIONS),
+            "vehicle_status": lambda: rng.choice(list(VehicleStatus)),
+            "current_fuel": lambda: rng.randrange(0, 100, 5),
+            "current_weight": lambda: rng.randrange(0, 30),
+            "current_volume": lambda: rng.randrange(0, 20),
+        }[name]()
+        setattr(vehicle, name, value)
+        check(registry, vehicles)
+
+def test_vehicles_added_later_are_indexed():
+    rng = random.Random(1)
+    vehicles = fleet(rng, 20)
+    registry = VehicleRegistry(vehicles[:10])
+    check(registry, vehicles[:10])
+    for vehicle in vehicles[10:]:
+        registry.add(vehicle)
+    check(registry, vehicles)
+    for vehicle in vehicles:
+        vehicle.vehicle_status = VehicleStatus.BUSY
+    check(registry, vehicles)
+    assert registry.fastest_idle() is None